@@ -9,6 +9,7 @@ than from internal module paths.
 Example:
 
     from postpay import (
+        Payment,
         PaymentImporter,
         MessageFormatter,
         Scheduler,
@@ -23,7 +24,10 @@ Example:
     )
 """
 
-from .VERSION import __version__
+from .version import __version__
+
+# Domain model
+from .models import Payment
 
 # Service Layer
 from .services.payments.importer import fetch_and_persist_new_payments as PaymentImporter
@@ -39,9 +43,10 @@ from .parsers.zelle_parser import ZelleParser
 
 # Utilities
 from .utils.logging_utils import setup_logger
-from .utils.sleep_window import is_sleep_window
+from .services.scheduling.sleep_window import is_sleep_window
 
 __all__ = [
+    "Payment",
     "PaymentImporter",
     "MessageFormatter",
     "Scheduler",
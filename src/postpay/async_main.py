@@ -0,0 +1,255 @@
+"""
+Async Runtime
+-------------
+asyncio-native alternative to postpay.main.main, selected with
+``postpay run --async``.
+
+The poll is split into four stages connected by bounded asyncio.Queues:
+
+    fetch  ->  parse  ->  persist  ->  deliver
+
+- fetch:   list new Gmail ids, drop ledger hits, batch-download headers,
+           then bodies of the messages that pass the header pre-filter
+- parse:   decode + classify + extract on a worker executor
+- persist: the db.access.Database writer thread (payments + outbox rows
+           in one transaction per batch)
+- deliver: hand new payments to the outbox delivery worker, which posts
+           them to Slack with retries
+
+Each stage waits on its own I/O, so a slow Slack post no longer delays the
+next Gmail fetch; full queues apply backpressure to the stages before them.
+"""
+
+import asyncio
+import logging
+
+from postpay.config import load_config
+from postpay.db.access import Database
+from postpay.db.dedupe import DedupeIndex
+from postpay.db.ledger import filter_unprocessed
+from postpay.db.sync_state import get_history_id
+from postpay.services.email.push import configure_push
+from postpay.services.notifications.outbox_worker import OutboxWorker
+from postpay.services.notifications.routing import SlackRouter
+from postpay.services.notifications.slack import SlackClient
+from postpay.services.payments.importer import (
+    build_gmail_client,
+    fetch_candidates,
+    has_transient_failures,
+    parse_fetched,
+    persist_payments,
+)
+from postpay.services.scheduling.scheduler import Scheduler
+from postpay.utils.metrics import start_metrics
+
+logger = logging.getLogger("postpay")
+
+
+class AsyncPipeline:
+    """
+    Owns the stage tasks, queues and executors for one async run.
+
+    SQLite access goes through one shared Database: lookups on its reader
+    pool (from a worker thread), writes awaited on its writer thread. The
+    outbox worker shares the same Database.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        gmail,
+        slack,
+        queue_size: int = 4,
+        sync_trigger=None,
+        poll_interval=None,
+    ):
+        self.config = config
+        self.gmail = gmail
+        self.slack = slack
+        self.sync_trigger = sync_trigger
+        # Same adaptive interval, jitter and quiet hours as postpay.main
+        self.scheduler = Scheduler.from_config(
+            config, base_interval=poll_interval, wake_event=sync_trigger
+        )
+        self.outbox_worker = None
+
+        self.parse_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.persist_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.deliver_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size * 25)
+
+        self.db = None
+        self._dedupe = None
+        self._router = SlackRouter.from_config(config)
+
+        # In-memory cursor: batches in flight are not yet in the ledger, so the
+        # next listing must start where the previous one ended, not at the
+        # last committed cursor. A batch that fails to parse or persist
+        # rewinds it to the committed cursor and bumps the generation, so
+        # batches listed before the rewind no longer move either cursor.
+        self._history_id = None
+        self._generation = 0
+
+    async def _read(self, func, *args):
+        return await asyncio.to_thread(self.db.read, func, *args)
+
+    async def _write(self, func, *args, **kwargs):
+        return await asyncio.wrap_future(self.db.submit(func, *args, **kwargs))
+
+    def _open_db(self):
+        self.db = Database.from_config(self.config)
+        self._dedupe = self.db.read(DedupeIndex.from_config, self.config)
+        return self.db.read(get_history_id)
+
+    async def _rewind(self, generation: int) -> None:
+        """Re-list from the committed cursor after batch ``generation`` was lost."""
+        if generation != self._generation:
+            return  # already rewound past this batch
+        self._generation += 1
+        self._history_id = await self._read(get_history_id)
+        logger.warning("Batch failed; re-listing from history id %s.", self._history_id)
+
+    async def _wait_for_next_poll(self) -> None:
+        # Returns early when the push ingress signals new mail. Waits are
+        # sliced so a cancelled pipeline never leaves a long-blocked thread.
+        wake = self.scheduler.next_wake()
+        while self.scheduler.clock() < wake:
+            if await asyncio.to_thread(self.scheduler.wait_until, wake, 1.0):
+                return
+
+    async def fetch_stage(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.scheduler.wait_out_quiet_window)
+                generation = self._generation
+
+                if self.config["GMAIL_INCREMENTAL_SYNC"]:
+                    messages, new_history_id = await asyncio.to_thread(
+                        self.gmail.sync_messages, self._history_id
+                    )
+                else:
+                    messages = await asyncio.to_thread(self.gmail.list_messages)
+                    new_history_id = None
+
+                new_ids = await self._read(filter_unprocessed, [m["id"] for m in messages])
+                fetched, filtered = await asyncio.to_thread(
+                    fetch_candidates,
+                    self.gmail,
+                    new_ids,
+                    self.config["GMAIL_HEADER_PREFILTER"],
+                )
+
+                # Blocks here when parsing/persisting falls behind
+                await self.parse_queue.put((fetched, filtered, new_history_id, generation))
+
+                if (
+                    new_history_id
+                    and generation == self._generation
+                    and not has_transient_failures(fetched)
+                ):
+                    self._history_id = new_history_id
+
+            except Exception as exc:
+                logger.exception("Unhandled exception in fetch stage: %s", exc)
+
+            await self._wait_for_next_poll()
+
+    async def parse_stage(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            fetched, filtered, new_history_id, generation = await self.parse_queue.get()
+            try:
+                processed, payments, fetch_failed = await loop.run_in_executor(
+                    None, parse_fetched, fetched, filtered
+                )
+                await self.persist_queue.put(
+                    (processed, payments, None if fetch_failed else new_history_id, generation)
+                )
+            except Exception as exc:
+                logger.exception("Unhandled exception in parse stage: %s", exc)
+                await self._rewind(generation)
+            finally:
+                self.parse_queue.task_done()
+
+    async def persist_stage(self) -> None:
+        while True:
+            processed, payments, new_history_id, generation = await self.persist_queue.get()
+            try:
+                # Batches listed before a rewind must not commit their cursor:
+                # it would skip the failed batch on restart
+                new_payments = await self._write(
+                    persist_payments,
+                    payments,
+                    processed,
+                    new_history_id if generation == self._generation else None,
+                    dedupe=self._dedupe,
+                    router=self._router,
+                )
+                # Stretches the interval while idle, tightens it after activity
+                self.scheduler.record_poll(len(new_payments))
+                if new_payments:
+                    logger.info("Imported %d new payments.", len(new_payments))
+                for payment in new_payments:
+                    await self.deliver_queue.put(payment)
+            except Exception as exc:
+                logger.exception("Unhandled exception in persist stage: %s", exc)
+                await self._rewind(generation)
+            finally:
+                self.persist_queue.task_done()
+
+    async def deliver_stage(self) -> None:
+        while True:
+            payment = await self.deliver_queue.get()
+            try:
+                # The notification is already durable in the outbox
+                self.outbox_worker.notify()
+                logger.info(
+                    "Queued new %s payment: %s", payment.provider, payment.formatted_message
+                )
+            except Exception as exc:
+                logger.exception("Unhandled exception in deliver stage: %s", exc)
+            finally:
+                self.deliver_queue.task_done()
+
+    async def run(self) -> None:
+        self._history_id = await asyncio.to_thread(self._open_db)
+        self.outbox_worker = OutboxWorker(
+            self.db,
+            self.slack,
+            poll_interval=self.config.get("OUTBOX_POLL_SECONDS", 5.0),
+            delivery_workers=self.config.get("SLACK_DELIVERY_WORKERS", 4),
+        ).start()
+        try:
+            await asyncio.gather(
+                self.fetch_stage(),
+                self.parse_stage(),
+                self.persist_stage(),
+                self.deliver_stage(),
+            )
+        finally:
+            self.outbox_worker.stop(timeout=1)
+            await asyncio.to_thread(self.db.close, 1)
+
+
+def main_async() -> None:
+    """
+    Async counterpart of postpay.main.main: same configuration, same
+    sleep-window handling, but with overlapping pipeline stages.
+    """
+    config = load_config()
+    start_metrics(config)
+
+    slack = SlackClient.from_config(config)
+    gmail = build_gmail_client(config)
+
+    sync_trigger, poll_interval = configure_push(config)
+
+    pipeline = AsyncPipeline(
+        config,
+        gmail,
+        slack,
+        queue_size=config["PIPELINE_QUEUE_SIZE"],
+        sync_trigger=sync_trigger,
+        poll_interval=poll_interval,
+    )
+    asyncio.run(pipeline.run())
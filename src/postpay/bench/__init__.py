@@ -0,0 +1,15 @@
+"""
+Benchmarks for PostPay (``postpay bench ...``).
+"""
+
+from .corpus import iter_corpus, load_samples, load_templates
+from .parsers import compare_results, format_report, run_parser_bench
+
+__all__ = [
+    "iter_corpus",
+    "load_samples",
+    "load_templates",
+    "compare_results",
+    "format_report",
+    "run_parser_bench",
+]
@@ -0,0 +1,123 @@
+"""
+Synthetic Email Corpus
+----------------------
+Expands the hand-written samples in sample_emails.json (shipped as package
+data next to this module) into a corpus of any size for parser benchmarks.
+
+Each sample is turned into a template by letting its own parser locate the
+sender, amount and date, which are then replaced with placeholders. Bodies
+are generated lazily in chunks, so a corpus of millions never has to be
+held in memory at once.
+"""
+
+import json
+import random
+import re
+from datetime import datetime, timedelta
+from importlib import resources
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from postpay.models import UNKNOWN_SENDER
+from postpay.parsers.registry import build_parsers
+from postpay.parsers.spec import AMOUNT_PATTERN, DATE_PATTERN
+
+SAMPLES_RESOURCE = "sample_emails.json"
+
+FIRST_NAMES = (
+    "John", "Jane", "Mike", "Ana", "Luis", "Priya", "Wei", "Fatima",
+    "Olga", "Kwame", "Sofia", "Noah", "Emma", "Diego", "Aiko", "Liam",
+)
+LAST_NAMES = (
+    "Doe", "Roe", "Smith", "Thompson", "Garcia", "Nguyen", "Patel", "Kim",
+    "Okafor", "Rossi", "Novak", "Silva", "Cohen", "Larsen", "Mendes", "Lee",
+)
+
+_AMOUNT = re.compile(AMOUNT_PATTERN)
+_DATE = re.compile(DATE_PATTERN)
+_EPOCH = datetime(2020, 1, 1)
+
+
+class Template(NamedTuple):
+    """One sample with {name}, {amount} and {date} placeholders."""
+
+    provider: str
+    text: str
+
+
+def load_samples(path: Optional[Path] = None) -> List[dict]:
+    """The bundled sample emails, or those in a sample_emails.json-style file."""
+    if path is None:
+        text = resources.files(__package__).joinpath(SAMPLES_RESOURCE).read_text(encoding="utf-8")
+    else:
+        text = Path(path).read_text(encoding="utf-8")
+    return json.loads(text)
+
+
+def load_templates(path: Optional[Path] = None) -> List[Template]:
+    """
+    Build templates from the bundled samples, or a sample_emails.json-style file.
+
+    Raises ValueError if a sample's parser cannot find its sender, since
+    the template would then never vary the name.
+    """
+    samples = load_samples(path)
+
+    parsers = {parser.provider: parser for parser in build_parsers()}
+    templates = []
+
+    for sample in samples:
+        provider = sample["provider"]
+        body = sample["raw_email_body"]
+        sender = parsers[provider].extract(body).sender
+        if sender == UNKNOWN_SENDER:
+            raise ValueError(f"No sender found in {provider} sample: {body!r}")
+
+        text = body.replace("{", "{{").replace("}", "}}")
+        text = _AMOUNT.sub("${amount}", text)
+        text = _DATE.sub("{date}", text)
+        text = text.replace(sender, "{name}")
+        templates.append(Template(provider, text))
+
+    return templates
+
+
+def _format_date(value: datetime) -> str:
+    """Render a date the way payment alerts do ("February 3, 2024 1:14 PM")."""
+    return f"{value:%B} {value.day}, {value.year} {value.hour % 12 or 12}:{value:%M %p}"
+
+
+def iter_corpus(
+    size: int,
+    seed: int = 0,
+    chunk_size: int = 10_000,
+    templates: Optional[List[Template]] = None,
+) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Yield the corpus as lists of ``(expected_provider, body)``.
+
+    The same ``size`` and ``seed`` always produce the same bodies, so runs
+    on different commits parse identical input.
+    """
+    templates = templates or load_templates()
+    rng = random.Random(seed)
+    remaining = size
+
+    while remaining > 0:
+        count = min(chunk_size, remaining)
+        chunk = []
+        for _ in range(count):
+            template = rng.choice(templates)
+            sent_at = _EPOCH + timedelta(minutes=rng.randrange(60 * 24 * 365 * 5))
+            chunk.append(
+                (
+                    template.provider,
+                    template.text.format(
+                        name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                        amount=f"{rng.randrange(1, 500_000) / 100:,.2f}",
+                        date=_format_date(sent_at),
+                    ),
+                )
+            )
+        remaining -= count
+        yield chunk
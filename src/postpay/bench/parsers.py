@@ -0,0 +1,191 @@
+"""
+Parser Benchmark
+----------------
+Measures every parser, and the classifier dispatch used by the importer,
+over a synthetic corpus (``postpay bench parsers``).
+
+For each target the report holds wall time, emails/sec, matches and the
+peak memory allocated while parsing a sample of the corpus. Results are
+plain JSON so runs can be saved and compared across commits with
+compare_results().
+"""
+
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from postpay.bench.corpus import Template, iter_corpus
+from postpay.models import Payment
+from postpay.parsers.classifier import ProviderClassifier
+from postpay.parsers.executor import ParseExecutor
+from postpay.parsers.registry import FALLBACK_PROVIDER, build_parsers
+from postpay.version import __version__
+
+DISPATCH = "dispatch"
+POOL = "dispatch_pool"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_targets() -> Dict[str, Callable[[str], Optional[Payment]]]:
+    """
+    Return ``{name: parse function}``: each parser's parse(), plus the
+    importer's routing path (one classifier scan, then extract()).
+    """
+    parsers = build_parsers()
+    fallback = next(p for p in parsers if p.provider == FALLBACK_PROVIDER)
+    classifier = ProviderClassifier(parsers, fallback=fallback)
+
+    def dispatch(body: str) -> Optional[Payment]:
+        parser = classifier.classify(body)
+        return parser.extract(body) if parser else None
+
+    targets = {parser.provider: parser.parse for parser in parsers}
+    targets[DISPATCH] = dispatch
+    return targets
+
+
+def _peak_bytes(parse: Callable[[str], Optional[Payment]], bodies: List[str]) -> int:
+    tracemalloc.start()
+    try:
+        for body in bodies:
+            parse(body)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_parser_bench(
+    size: int = 100_000,
+    seed: int = 0,
+    chunk_size: int = 10_000,
+    memory_sample: int = 2_000,
+    templates: Optional[List[Template]] = None,
+    parse_workers: int = 0,
+) -> dict:
+    """
+    Benchmark every target over ``size`` synthetic bodies.
+
+    Bodies are generated chunk by chunk outside the timed region, so only
+    parsing is measured and memory stays bounded for large corpora. Peak
+    memory is traced separately on the first ``memory_sample`` bodies,
+    since tracemalloc slows the code it watches.
+
+    With ``parse_workers`` > 1 the dispatch path is also timed through a
+    ParseExecutor with that many processes (target "dispatch_pool"); its
+    peak memory is not traced, as the work happens in other processes.
+    """
+    targets = build_targets()
+    stats = {
+        name: {"seconds": 0.0, "matched": 0, "peak_bytes": 0}
+        for name in targets
+    }
+    stats[DISPATCH]["correct"] = 0
+
+    executor = ParseExecutor(workers=parse_workers) if parse_workers > 1 else None
+    if executor is not None:
+        stats[POOL] = {"seconds": 0.0, "matched": 0, "peak_bytes": 0, "workers": parse_workers}
+        # Start every worker (and its parsers) outside the timed region
+        list(executor.parse_tuples([""] * parse_workers * executor.chunk_size))
+
+    memory_bodies: List[str] = []
+
+    for chunk in iter_corpus(size, seed=seed, chunk_size=chunk_size, templates=templates):
+        bodies = [body for _, body in chunk]
+        if len(memory_bodies) < memory_sample:
+            memory_bodies.extend(bodies[: memory_sample - len(memory_bodies)])
+
+        for name, parse in targets.items():
+            results = []
+            started = time.perf_counter()
+            for body in bodies:
+                results.append(parse(body))
+            stats[name]["seconds"] += time.perf_counter() - started
+            stats[name]["matched"] += sum(1 for result in results if result)
+
+            if name == DISPATCH:
+                stats[name]["correct"] += sum(
+                    1
+                    for (expected, _), result in zip(chunk, results)
+                    if result and result.provider == expected
+                )
+
+        if executor is not None:
+            started = time.perf_counter()
+            results = list(executor.parse_tuples(bodies))
+            stats[POOL]["seconds"] += time.perf_counter() - started
+            stats[POOL]["matched"] += sum(1 for result in results if result)
+
+    if executor is not None:
+        executor.close()
+
+    for name in stats:
+        entry = stats[name]
+        if name in targets:
+            entry["peak_bytes"] = _peak_bytes(targets[name], memory_bodies)
+        entry["emails_per_sec"] = round(size / entry["seconds"], 1) if entry["seconds"] else None
+        entry["us_per_email"] = round(entry["seconds"] * 1e6 / size, 3) if size else None
+        entry["seconds"] = round(entry["seconds"], 6)
+
+    stats[DISPATCH]["accuracy"] = round(stats[DISPATCH]["correct"] / size, 4) if size else None
+
+    return {
+        "benchmark": "parsers",
+        "postpay_version": __version__,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "corpus": {"size": size, "seed": seed, "chunk_size": chunk_size, "memory_sample": len(memory_bodies)},
+        "results": stats,
+    }
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float = 0.2) -> List[str]:
+    """
+    Return one message per target whose throughput fell more than
+    ``tolerance`` (a fraction) below the baseline run.
+    """
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        now = current["results"].get(name)
+        if not now or not base.get("emails_per_sec") or not now.get("emails_per_sec"):
+            continue
+        ratio = now["emails_per_sec"] / base["emails_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(
+                f"{name}: {now['emails_per_sec']:.0f} emails/sec vs "
+                f"{base['emails_per_sec']:.0f} baseline ({(1 - ratio) * 100:.0f}% slower)"
+            )
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    """Render a report as a fixed-width table."""
+    lines = [
+        f"{report['corpus']['size']:,} emails (seed {report['corpus']['seed']}), "
+        f"commit {report['commit'] or 'unknown'}",
+        f"{'target':<12} {'emails/sec':>12} {'us/email':>10} {'matched':>10} {'peak KiB':>10}",
+    ]
+    for name, entry in report["results"].items():
+        lines.append(
+            f"{name:<12} {entry['emails_per_sec'] or 0:>12,.0f} {entry['us_per_email'] or 0:>10.2f} "
+            f"{entry['matched']:>10,} {entry['peak_bytes'] / 1024:>10.1f}"
+        )
+    accuracy = report["results"][DISPATCH]["accuracy"]
+    if accuracy is not None:
+        lines.append(f"dispatch accuracy: {accuracy:.2%}")
+    return "\n".join(lines)
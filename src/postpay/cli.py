@@ -2,15 +2,276 @@
 PostPay CLI Entrypoint
 ----------------------
 
-This module exposes a simple CLI that maps to the main PostPay
-runtime orchestration function. It allows the package to be run as:
+This module exposes a simple CLI that maps to the PostPay runtime
+orchestration functions. It allows the package to be run as:
 
-    postpay run
+    postpay run            # sequential polling loop
+    postpay run --async    # asyncio pipeline with overlapping stages
+    postpay backfill --since 2024-01-01 [--workers 8] [--parse-workers 4] [--notify]
+    postpay bench parsers --size 1000000 --output bench.json [--baseline old.json]
+    postpay report --from 2024-01-01 --to 2024-01-31 --by provider|sender|day
+    postpay export --format csv|ndjson|parquet --output payments.csv [--since 2024-01-01]
+
+Running ``postpay`` with no command is the same as ``postpay run``.
 """
 
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+from typing import List, Optional
+
 from postpay.main import main
 
 
-def run():
+def run(use_async: bool = False):
     """Run the PostPay automation engine."""
-    main()
+    if use_async:
+        from postpay.async_main import main_async
+
+        main_async()
+    else:
+        main()
+
+
+def backfill(
+    since: date,
+    query: str,
+    workers: int,
+    notify: bool,
+    restart: bool,
+    parse_workers: Optional[int] = None,
+):
+    """Import historical payment emails received since ``since``."""
+    from postpay.config import load_config
+    from postpay.db.connection import get_connection
+    from postpay.db.dedupe import DedupeIndex
+    from postpay.db.migrate import initialize_schema
+    from postpay.parsers.executor import ParseExecutor
+    from postpay.services.notifications.routing import SlackRouter
+    from postpay.services.payments.backfill import run_backfill
+    from postpay.services.payments.importer import build_gmail_client
+
+    config = load_config()
+    conn = get_connection(config["DB_PATH"])
+    initialize_schema(conn)
+
+    with ParseExecutor.from_config(config, workers=parse_workers) as parse_executor:
+        totals = run_backfill(
+            conn,
+            build_gmail_client(config),
+            since,
+            query=query,
+            workers=workers,
+            notify=notify,
+            restart=restart,
+            prefilter=config["GMAIL_HEADER_PREFILTER"],
+            dedupe=DedupeIndex.from_config(conn, config),
+            parse_executor=parse_executor,
+            router=SlackRouter.from_config(config),
+        )
+    print(
+        f"Backfill complete: {totals['messages']} messages, "
+        f"{totals['payments']} payments imported, {totals['failed']} failed."
+    )
+
+
+def bench_parsers(
+    size: int,
+    seed: int,
+    chunk_size: int,
+    output: Optional[str],
+    baseline: Optional[str],
+    tolerance: float,
+    parse_workers: int = 0,
+):
+    """Benchmark the parsers on a synthetic corpus and optionally guard regressions."""
+    from postpay.bench.parsers import compare_results, format_report, run_parser_bench
+
+    report = run_parser_bench(
+        size=size, seed=seed, chunk_size=chunk_size, parse_workers=parse_workers
+    )
+    print(format_report(report))
+
+    if output:
+        with open(output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Results written to {output}")
+
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as fh:
+            regressions = compare_results(report, json.load(fh), tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+def report(start: Optional[date], end: Optional[date], by: str, as_json: bool):
+    """Print payment totals per provider, sender or day from the daily rollups."""
+    from postpay.config import load_config
+    from postpay.db.connection import get_connection
+    from postpay.db.migrate import initialize_schema
+    from postpay.db.reports import payment_report
+
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+
+    config = load_config()
+    conn = get_connection(config["DB_PATH"])
+    initialize_schema(conn)
+
+    rows = payment_report(conn, start, end, by=by)
+
+    if as_json:
+        print(json.dumps(
+            {
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "by": by,
+                "rows": [row._asdict() for row in rows],
+            },
+            indent=2,
+        ))
+        return
+
+    print(f"Payments {start.isoformat()} .. {end.isoformat()} by {by}")
+    print(f"{by:<24} {'count':>8} {'amount':>14}")
+    for row in rows:
+        print(f"{row.key:<24} {row.payment_count:>8,} {row.amount_cents / 100:>14,.2f}")
+    total_count = sum(row.payment_count for row in rows)
+    total_cents = sum(row.amount_cents for row in rows)
+    print(f"{'total':<24} {total_count:>8,} {total_cents / 100:>14,.2f}")
+
+
+def export(fmt: str, output: str, since: Optional[date], chunk_size: int):
+    """Stream payments to a CSV, NDJSON or Parquet file."""
+    from postpay.config import load_config
+    from postpay.db.connection import get_connection
+    from postpay.db.export import export_payments
+    from postpay.db.migrate import initialize_schema
+
+    config = load_config()
+    conn = get_connection(config["DB_PATH"])
+    initialize_schema(conn)
+
+    total = export_payments(conn, output, fmt=fmt, since=since, chunk_size=chunk_size)
+    print(f"Exported {total} payments to {output}.")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="postpay", description="PostPay payment ingestion engine.")
+    commands = parser.add_subparsers(dest="command")
+
+    run_cmd = commands.add_parser("run", help="Start the continuous ingestion loop.")
+    run_cmd.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Use the asyncio pipeline (fetch/parse/persist/deliver stages).",
+    )
+
+    backfill_cmd = commands.add_parser(
+        "backfill", help="Import historical payment emails (skips Slack by default)."
+    )
+    backfill_cmd.add_argument(
+        "--since", required=True, type=date.fromisoformat, help="Earliest date (YYYY-MM-DD)."
+    )
+    backfill_cmd.add_argument("--query", default="", help="Extra Gmail search filter.")
+    backfill_cmd.add_argument("--workers", type=int, default=4, help="Parallel fetch threads.")
+    backfill_cmd.add_argument(
+        "--notify", action="store_true", help="Queue Slack notifications for imported payments."
+    )
+    backfill_cmd.add_argument(
+        "--restart", action="store_true", help="Ignore the saved checkpoint and start over."
+    )
+    backfill_cmd.add_argument(
+        "--parse-workers",
+        type=int,
+        help="Parser processes (default: PARSE_WORKERS; 0 parses in-process).",
+    )
+
+    report_cmd = commands.add_parser(
+        "report", help="Payment totals per provider, sender or day (from daily rollups)."
+    )
+    report_cmd.add_argument(
+        "--from", dest="start", type=date.fromisoformat, help="First day (default: 30 days ago)."
+    )
+    report_cmd.add_argument(
+        "--to", dest="end", type=date.fromisoformat, help="Last day, inclusive (default: today)."
+    )
+    report_cmd.add_argument(
+        "--by", choices=("provider", "sender", "day"), default="provider", help="Grouping."
+    )
+    report_cmd.add_argument("--json", action="store_true", help="Print JSON instead of a table.")
+
+    export_cmd = commands.add_parser(
+        "export", help="Stream payments to CSV, NDJSON or Parquet (Parquet needs pyarrow)."
+    )
+    export_cmd.add_argument(
+        "--format",
+        dest="fmt",
+        choices=("csv", "ndjson", "parquet"),
+        default="csv",
+        help="Output format.",
+    )
+    export_cmd.add_argument("--output", required=True, help="File to write (overwritten).")
+    export_cmd.add_argument(
+        "--since", type=date.fromisoformat, help="Only payments on or after this date."
+    )
+    export_cmd.add_argument(
+        "--chunk-size", type=int, default=50_000, help="Rows read and written per chunk."
+    )
+
+    bench_cmd = commands.add_parser("bench", help="Run performance benchmarks.")
+    bench_targets = bench_cmd.add_subparsers(dest="target", required=True)
+    parsers_cmd = bench_targets.add_parser(
+        "parsers", help="Parser throughput over a synthetic corpus from the bundled sample emails."
+    )
+    parsers_cmd.add_argument("--size", type=int, default=100_000, help="Number of bodies.")
+    parsers_cmd.add_argument("--seed", type=int, default=0, help="Corpus random seed.")
+    parsers_cmd.add_argument(
+        "--chunk-size", type=int, default=10_000, help="Bodies generated per chunk."
+    )
+    parsers_cmd.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Also time dispatch on this many parser processes (dispatch_pool).",
+    )
+    parsers_cmd.add_argument("--output", help="Write the JSON report to this path.")
+    parsers_cmd.add_argument("--baseline", help="Earlier JSON report to compare against.")
+    parsers_cmd.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed throughput drop vs. the baseline (fraction, default 0.2).",
+    )
+
+    return parser
+
+
+def cli(argv: Optional[List[str]] = None) -> None:
+    """Parse command-line arguments and dispatch to the selected command."""
+    args = build_parser().parse_args(argv)
+
+    if args.command in (None, "run"):
+        run(use_async=getattr(args, "use_async", False))
+    elif args.command == "backfill":
+        backfill(
+            args.since, args.query, args.workers, args.notify, args.restart, args.parse_workers
+        )
+    elif args.command == "report":
+        report(args.start, args.end, args.by, args.json)
+    elif args.command == "export":
+        export(args.fmt, args.output, args.since, args.chunk_size)
+    elif args.command == "bench":
+        bench_parsers(
+            args.size,
+            args.seed,
+            args.chunk_size,
+            args.output,
+            args.baseline,
+            args.tolerance,
+            args.parse_workers,
+        )
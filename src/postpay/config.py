@@ -7,7 +7,7 @@ Provides a centralized, environment-based configuration system for:
 - Database location
 - Polling interval
 - Sleep window activation
-- Gmail credentials paths
+- Gmail credentials paths and sync behavior
 
 This replaces hardcoded variables and enables clean deployment.
 """
@@ -30,6 +30,19 @@ def load_config() -> dict:
         "SLACK_WEBHOOK_URL": os.getenv("SLACK_WEBHOOK_URL", ""),
         "SLACK_API_TOKEN": os.getenv("SLACK_API_TOKEN", ""),
         "SLACK_CHANNEL_ID": os.getenv("SLACK_CHANNEL_ID", ""),
+        "SLACK_CONNECT_TIMEOUT": float(os.getenv("SLACK_CONNECT_TIMEOUT", "3.05")),
+        "SLACK_READ_TIMEOUT": float(os.getenv("SLACK_READ_TIMEOUT", "10")),
+        "SLACK_MAX_RETRIES": int(os.getenv("SLACK_MAX_RETRIES", "3")),
+        # JSON list of routing rules ({"channel", "provider", "min_amount",
+        # "mailbox"}); empty sends everything to SLACK_CHANNEL_ID.
+        "SLACK_ROUTES_FILE": os.getenv("SLACK_ROUTES_FILE", ""),
+        # Per-channel pacing (Slack allows ~1 chat.postMessage/s per channel);
+        # 0 disables it. Channels are delivered concurrently.
+        "SLACK_CHANNEL_RATE": float(os.getenv("SLACK_CHANNEL_RATE", "1.0")),
+        "SLACK_CHANNEL_BURST": int(os.getenv("SLACK_CHANNEL_BURST", "1")),
+        "SLACK_DELIVERY_WORKERS": int(os.getenv("SLACK_DELIVERY_WORKERS", "4")),
+        # Idle re-check interval of the outbox delivery worker
+        "OUTBOX_POLL_SECONDS": float(os.getenv("OUTBOX_POLL_SECONDS", "5")),
 
         # ---- Gmail OAuth Credentials ----
         "CREDENTIALS_PATH": os.getenv(
@@ -41,14 +54,73 @@ def load_config() -> dict:
             str(BASE_DIR / "credentials" / "token.json")
         ),
 
+        # ---- Gmail Sync ----
+        "GMAIL_SEARCH_QUERY": os.getenv("GMAIL_SEARCH_QUERY", "newer_than:1d"),
+        # Use users.history.list with a persisted historyId instead of
+        # re-listing the mailbox on every poll.
+        "GMAIL_INCREMENTAL_SYNC": os.getenv("GMAIL_INCREMENTAL_SYNC", "true").lower() == "true",
+        # Fetch headers first and download bodies only for likely payments
+        "GMAIL_HEADER_PREFILTER": os.getenv("GMAIL_HEADER_PREFILTER", "true").lower() == "true",
+        # JSON list of extra inboxes ({"name", "token_path", "credentials_path",
+        # "query"}); empty means the single mailbox configured above.
+        "MAILBOXES_FILE": os.getenv("MAILBOXES_FILE", ""),
+        # Mailboxes synced in parallel when MAILBOXES_FILE is set
+        "MAILBOX_WORKERS": int(os.getenv("MAILBOX_WORKERS", "4")),
+
         # ---- Database ----
         "DB_PATH": os.getenv(
             "DB_PATH",
             str(BASE_DIR / "data" / "payments.db")
         ),
+        # Shared DB access layer: read-only connections in the pool, and how
+        # many queued writes (or how long a wait) make one transaction
+        "DB_READERS": int(os.getenv("DB_READERS", "4")),
+        "DB_WRITE_BATCH_SIZE": int(os.getenv("DB_WRITE_BATCH_SIZE", "100")),
+        "DB_WRITE_BATCH_SECONDS": float(os.getenv("DB_WRITE_BATCH_SECONDS", "0.01")),
+
+        # In-memory dedupe index (recent-id LRU + Bloom filter over stored
+        # transaction ids); the DB is queried only on a Bloom filter hit.
+        "DEDUPE_INDEX": os.getenv("DEDUPE_INDEX", "true").lower() == "true",
+        "DEDUPE_LRU_SIZE": int(os.getenv("DEDUPE_LRU_SIZE", "10000")),
+        "DEDUPE_ERROR_RATE": float(os.getenv("DEDUPE_ERROR_RATE", "0.001")),
+        # Periodic full rebuild, picking up rows written by other processes
+        "DEDUPE_REBUILD_SECONDS": float(os.getenv("DEDUPE_REBUILD_SECONDS", "3600")),
+
+        # ---- Parsing ----
+        # Worker processes for backfill parsing (0 or 1 parses in-process)
+        "PARSE_WORKERS": int(os.getenv("PARSE_WORKERS", "0")),
+        # Bodies sent to a worker per task
+        "PARSE_CHUNK_SIZE": int(os.getenv("PARSE_CHUNK_SIZE", "500")),
 
         # ---- Polling ----
         "POLL_INTERVAL_SECONDS": int(os.getenv("POLL_INTERVAL_SECONDS", "30")),
+        # Adaptive scheduling: tighten to the minimum after activity, back off
+        # towards the maximum while the mailbox is idle.
+        "POLL_MIN_INTERVAL_SECONDS": int(os.getenv("POLL_MIN_INTERVAL_SECONDS", "15")),
+        "POLL_MAX_INTERVAL_SECONDS": int(os.getenv("POLL_MAX_INTERVAL_SECONDS", "300")),
+        "POLL_BACKOFF_FACTOR": float(os.getenv("POLL_BACKOFF_FACTOR", "1.5")),
+        "POLL_JITTER": float(os.getenv("POLL_JITTER", "0.1")),
+
+        # ---- Push Ingress (Gmail watch / Pub/Sub push) ----
+        # 0 disables the endpoint; timer polling then runs at POLL_INTERVAL_SECONDS
+        "PUSH_INGRESS_PORT": int(os.getenv("PUSH_INGRESS_PORT", "0")),
+        "PUSH_INGRESS_HOST": os.getenv("PUSH_INGRESS_HOST", "127.0.0.1"),
+        "PUSH_VERIFICATION_TOKEN": os.getenv("PUSH_VERIFICATION_TOKEN", ""),
+        "PUSH_DEBOUNCE_SECONDS": float(os.getenv("PUSH_DEBOUNCE_SECONDS", "2")),
+        # Safety-net poll interval used while push ingress is enabled
+        "PUSH_SAFETY_POLL_SECONDS": int(os.getenv("PUSH_SAFETY_POLL_SECONDS", "300")),
+
+        # ---- Async Pipeline (postpay run --async) ----
+        # Max batches buffered between stages before upstream stages wait
+        "PIPELINE_QUEUE_SIZE": int(os.getenv("PIPELINE_QUEUE_SIZE", "4")),
+
+        # ---- Metrics ----
+        # 0 disables the local /metrics (Prometheus) + /metrics.json endpoint
+        "METRICS_PORT": int(os.getenv("METRICS_PORT", "0")),
+        "METRICS_HOST": os.getenv("METRICS_HOST", "127.0.0.1"),
+        # Empty disables the periodic JSON snapshot file
+        "METRICS_SNAPSHOT_PATH": os.getenv("METRICS_SNAPSHOT_PATH", ""),
+        "METRICS_SNAPSHOT_SECONDS": float(os.getenv("METRICS_SNAPSHOT_SECONDS", "60")),
 
         # ---- Sleep Window ----
         "ENABLE_SLEEP_MODE": os.getenv("ENABLE_SLEEP_MODE", "true").lower() == "true",
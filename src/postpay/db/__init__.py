@@ -3,11 +3,25 @@ Database package for PostPay.
 
 Exposes:
 - get_connection: create a SQLite connection
-- initialize_schema: create required tables
+- Database: shared access layer (batched single-writer thread + reader pool)
+- initialize_schema: apply pending versioned schema migrations (see migrate.py)
+- get_history_id / set_history_id: Gmail incremental sync cursor
+- filter_unprocessed / mark_processed: processed-message ledger
+- outbox: durable queue of pending Slack notifications
+- payment_report: per-provider / sender / day totals from the daily rollups
+- export_payments: chunked CSV / NDJSON / Parquet export of payments
+- DedupeIndex: in-memory duplicate check over stored transaction ids
 
 This package reflects the database logic originally embedded directly in
 PostPay4.py, now separated into a clean, modular structure.
 """
 
 from .connection import get_connection
+from .access import Database
 from .migrate import initialize_schema
+from . import outbox
+from .ledger import filter_unprocessed, mark_processed
+from .reports import payment_report
+from .export import export_payments
+from .dedupe import DedupeIndex
+from .sync_state import get_history_id, set_history_id
@@ -0,0 +1,316 @@
+"""
+Database Access Layer
+---------------------
+Lets several threads (Gmail pollers, the Slack outbox worker, reporters)
+share one SQLite database without ``database is locked`` errors or one
+commit per small write.
+
+- Writes: a single writer thread owns the only read-write connection. It
+  drains a queue of write operations and runs as many as arrive within
+  ``batch_seconds`` (up to ``batch_size``) in one transaction, each inside
+  its own savepoint, so one failing operation is rolled back alone while the
+  rest of the batch still commits.
+- Reads: a small pool of read-only connections, borrowed with
+  ``with db.reader() as conn:``. WAL mode lets them read while the writer
+  commits.
+
+    with Database(config["DB_PATH"]) as db:
+        new = db.write(persist_payments, payments, processed)
+        with db.reader() as conn:
+            rows = payment_report(conn, start, end)
+
+A write operation is any ``fn(conn, *args, **kwargs)``. Inside a batch,
+``with conn:`` blocks and ``conn.commit()`` in the existing db helpers are
+folded into the batch transaction; the operation's Future resolves only
+after that transaction commits. In-memory state that must only reflect
+committed rows is updated through after_commit().
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+from postpay.db.connection import get_connection
+from postpay.db.migrate import initialize_schema
+from postpay.utils.logging_utils import setup_logger
+from postpay.utils.metrics import DB_SECONDS, track
+
+logger = setup_logger(__name__)
+
+_STOP = object()
+
+
+class _WriteOp(NamedTuple):
+    fn: Callable
+    args: tuple
+    kwargs: dict
+    future: Future
+
+
+class _BatchConnection:
+    """
+    The writer connection as seen by one write operation.
+
+    Transaction control belongs to the writer thread: entering/leaving
+    ``with conn:`` and commit() are no-ops, and an exception raised by the
+    operation rolls back only its savepoint.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._after_commit: List[Callable[[], None]] = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        raise RuntimeError("Raise an exception to roll back a batched write operation")
+
+
+class Database:
+    """
+    Single-writer / multi-reader access to one SQLite file.
+
+    Args:
+        db_path: SQLite file (not ":memory:"; readers open separate connections)
+        readers: Maximum read-only connections kept in the pool
+        batch_size: Most write operations committed in one transaction
+        batch_seconds: How long the writer waits for more operations
+            before committing a batch
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 4,
+        batch_size: int = 100,
+        batch_seconds: float = 0.01,
+    ):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.batch_seconds = batch_seconds
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max(1, readers))
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+        # Schema first, on a normal connection, so readers see every table
+        conn = get_connection(db_path)
+        try:
+            initialize_schema(conn)
+        finally:
+            conn.close()
+
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="postpay-db-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Database":
+        return cls(
+            config["DB_PATH"],
+            readers=config["DB_READERS"],
+            batch_size=config["DB_WRITE_BATCH_SIZE"],
+            batch_seconds=config["DB_WRITE_BATCH_SECONDS"],
+        )
+
+    # -- Writes -----------------------------------------------------------------
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue ``fn(conn, *args, **kwargs)`` on the writer; returns its Future."""
+        if self._closed:
+            raise RuntimeError("Database is closed")
+        future: Future = Future()
+        self._queue.put(_WriteOp(fn, args, kwargs, future))
+        return future
+
+    def write(self, fn: Callable, *args, **kwargs):
+        """Run ``fn`` on the writer and wait until its batch has committed."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def execute(self, sql: str, params=()) -> Future:
+        """Queue one statement; the Future holds the number of rows changed."""
+        return self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    def _next_batch(self, first) -> List:
+        batch = [first]
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                op = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(op)
+            if op is _STOP:
+                break
+        return batch
+
+    def _run_batch(self, conn: sqlite3.Connection, ops: List[_WriteOp]) -> None:
+        proxy = _BatchConnection(conn)
+        outcomes = []
+
+        with track(DB_SECONDS, operation="write_batch") as result:
+            conn.execute("BEGIN IMMEDIATE")
+            for op in ops:
+                if not op.future.set_running_or_notify_cancel():
+                    continue
+                registered = len(proxy._after_commit)
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    value = op.fn(proxy, *op.args, **op.kwargs)
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    del proxy._after_commit[registered:]
+                    outcomes.append((op.future, exc, False))
+                else:
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((op.future, value, True))
+
+            try:
+                conn.execute("COMMIT")
+            except sqlite3.Error as exc:
+                result["outcome"] = "error"
+                logger.error("Write batch of %d operations failed to commit: %s", len(ops), exc)
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                outcomes = [(future, exc, False) for future, _, _ in outcomes]
+                proxy._after_commit.clear()
+
+        for callback in proxy._after_commit:
+            try:
+                callback()
+            except Exception as exc:
+                logger.exception("After-commit callback failed: %s", exc)
+
+        for future, value, ok in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _run(self) -> None:
+        conn = get_connection(self.db_path)
+        conn.isolation_level = None  # the writer issues BEGIN/COMMIT itself
+        self._ready.set()
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                batch = self._next_batch(first)
+                stop = batch[-1] is _STOP
+                ops = batch[:-1] if stop else batch
+                try:
+                    self._run_batch(conn, ops)
+                except Exception as exc:
+                    logger.exception("Writer thread failed on a batch: %s", exc)
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    for op in ops:
+                        if not op.future.done():
+                            op.future.set_exception(exc)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    # -- Reads ------------------------------------------------------------------
+
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        with self._readers_lock:
+            self._all_readers.append(conn)
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection; blocks while all of them are in use."""
+        if self._closed:
+            raise RuntimeError("Database is closed")
+        with self._reader_slots:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._open_reader()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._readers.put(conn)
+
+    def read(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(conn, *args, **kwargs)`` on a pooled reader."""
+        with self.reader() as conn:
+            return fn(conn, *args, **kwargs)
+
+    # -- Lifecycle --------------------------------------------------------------
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Commit queued writes, stop the writer and close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+
+    def __enter__(self) -> "Database":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def run_read(target, fn: Callable, *args, **kwargs):
+    """``fn(conn, ...)`` on a plain connection, or on a pooled reader of a Database."""
+    if isinstance(target, Database):
+        return target.read(fn, *args, **kwargs)
+    return fn(target, *args, **kwargs)
+
+
+def run_write(target, fn: Callable, *args, **kwargs):
+    """``fn(conn, ...)`` on a plain connection, or through a Database's writer thread."""
+    if isinstance(target, Database):
+        return target.write(fn, *args, **kwargs)
+    return fn(target, *args, **kwargs)
+
+
+def after_commit(conn, fn: Callable[[], None]) -> None:
+    """
+    Run ``fn()`` once the rows written through ``conn`` are committed.
+
+    Inside a Database write batch that is after the batch's COMMIT, and
+    never if the operation or the batch is rolled back. On a plain
+    connection call it after committing; ``fn`` runs immediately.
+    """
+    if isinstance(conn, _BatchConnection):
+        conn._after_commit.append(fn)
+    else:
+        fn()
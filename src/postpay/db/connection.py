@@ -16,4 +16,9 @@ def get_connection(db_path: str) -> sqlite3.Connection:
     """
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row  # allows convenient dict-like row access
+
+    # WAL lets readers proceed during writes, and synchronous=NORMAL only
+    # fsyncs at checkpoints instead of on every commit (still crash-safe).
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     return conn
@@ -0,0 +1,243 @@
+"""
+Dedupe Index
+------------
+Answers "is this transaction id already stored?" in memory, so the common
+case of re-parsed payments costs no SQL round trip.
+
+Three layers, checked in order:
+
+1. an exact LRU of recently seen ids (stored or just inserted)
+2. a Bloom filter over every stored id, built from one streaming scan of
+   the payments table; a miss here proves the id is new
+3. a batched SQLite lookup, only for Bloom hits, which separates real
+   duplicates from false positives
+
+The index belongs to the single DB writer (the thread that calls
+persist_payments) and is not thread-safe. Rows written by another process
+(e.g. ``postpay backfill`` next to ``postpay run``) are picked up at the
+next rebuild; until then the insert path's conflict check covers them.
+"""
+
+import hashlib
+import math
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Set
+
+from postpay.utils.logging_utils import setup_logger
+from postpay.utils.metrics import DEDUPE_LOOKUPS
+
+logger = setup_logger(__name__)
+
+# Rows per fetchmany() while streaming ids into a new filter
+_SCAN_CHUNK = 10_000
+# Stay well under SQLite's default host-parameter limit (999).
+_LOOKUP_CHUNK = 500
+
+_RESULTS = ("recent", "bloom_negative", "db_hit", "false_positive")
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter sized for ``capacity`` items at ``error_rate``.
+
+    Uses double hashing over one 128-bit BLAKE2b digest per item.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def expected_error_rate(self) -> float:
+        """False-positive probability at the current fill."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+class DedupeIndex:
+    """
+    LRU + Bloom filter + DB fallback over ``payments.transaction_id``.
+
+    The filter is rebuilt (one streaming scan) when it has been in use for
+    ``rebuild_seconds``, or when more ids have been added than it was sized
+    for, so its false-positive rate stays near ``error_rate``.
+    """
+
+    def __init__(
+        self,
+        lru_size: int = 10_000,
+        error_rate: float = 0.001,
+        rebuild_seconds: float = 3600,
+        min_capacity: int = 100_000,
+        clock=time.monotonic,
+    ):
+        self.lru_size = lru_size
+        self.error_rate = error_rate
+        self.rebuild_seconds = rebuild_seconds
+        self.min_capacity = min_capacity
+        self._clock = clock
+
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._bloom: Optional[BloomFilter] = None
+        self._built_at = 0.0
+
+        self.rebuilds = 0
+        self._stats = dict.fromkeys(("lookups", *_RESULTS), 0)
+
+    @classmethod
+    def from_config(cls, conn: sqlite3.Connection, config: dict) -> Optional["DedupeIndex"]:
+        """Build and load the index, or return None when DEDUPE_INDEX is off."""
+        if not config["DEDUPE_INDEX"]:
+            return None
+        index = cls(
+            lru_size=config["DEDUPE_LRU_SIZE"],
+            error_rate=config["DEDUPE_ERROR_RATE"],
+            rebuild_seconds=config["DEDUPE_REBUILD_SECONDS"],
+        )
+        index.rebuild(conn)
+        return index
+
+    # -- Building ---------------------------------------------------------------
+
+    def rebuild(self, conn: sqlite3.Connection) -> None:
+        """Replace the Bloom filter with one built from every stored id."""
+        started = time.perf_counter()
+
+        # MAX(id) is an index seek and an upper bound on the row count
+        max_id = conn.execute("SELECT MAX(id) FROM payments").fetchone()[0] or 0
+        bloom = BloomFilter(max(self.min_capacity, 2 * max_id), self.error_rate)
+
+        cursor = conn.execute("SELECT transaction_id FROM payments")
+        try:
+            while True:
+                rows = cursor.fetchmany(_SCAN_CHUNK)
+                if not rows:
+                    break
+                for (transaction_id,) in rows:
+                    bloom.add(transaction_id)
+        finally:
+            cursor.close()
+
+        self._bloom = bloom
+        self._built_at = self._clock()
+        self.rebuilds += 1
+        logger.info(
+            "Dedupe index built: %d ids, %.1f KiB, %d hashes in %.2fs.",
+            bloom.count,
+            bloom.size_bytes / 1024,
+            bloom.num_hashes,
+            time.perf_counter() - started,
+        )
+
+    def _needs_rebuild(self) -> bool:
+        if self._bloom is None:
+            return True
+        if self._bloom.count > self._bloom.capacity:
+            return True
+        return self.rebuild_seconds > 0 and self._clock() - self._built_at >= self.rebuild_seconds
+
+    # -- Lookups ----------------------------------------------------------------
+
+    def _remember(self, transaction_id: str) -> None:
+        self._recent[transaction_id] = None
+        self._recent.move_to_end(transaction_id)
+        if len(self._recent) > self.lru_size:
+            self._recent.popitem(last=False)
+
+    def existing(self, conn: sqlite3.Connection, transaction_ids: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of ``transaction_ids`` already stored.
+
+        Only ids that hit the Bloom filter (and are not in the LRU) are
+        checked against the database, in batches.
+        """
+        if self._needs_rebuild():
+            self.rebuild(conn)
+
+        counts = dict.fromkeys(_RESULTS, 0)
+        existing: Set[str] = set()
+        candidates = []
+        for transaction_id in dict.fromkeys(transaction_ids):
+            if transaction_id in self._recent:
+                self._recent.move_to_end(transaction_id)
+                existing.add(transaction_id)
+                counts["recent"] += 1
+            elif transaction_id in self._bloom:
+                candidates.append(transaction_id)
+            else:
+                counts["bloom_negative"] += 1
+
+        for start in range(0, len(candidates), _LOOKUP_CHUNK):
+            chunk = candidates[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT transaction_id FROM payments WHERE transaction_id IN ({placeholders})",
+                chunk,
+            )
+            found = {row[0] for row in rows}
+            for transaction_id in found:
+                self._remember(transaction_id)
+            existing |= found
+            counts["db_hit"] += len(found)
+            counts["false_positive"] += len(chunk) - len(found)
+
+        for result, count in counts.items():
+            if count:
+                self._stats[result] += count
+                self._stats["lookups"] += count
+                DEDUPE_LOOKUPS.inc(count, result=result)
+        return existing
+
+    def add(self, transaction_ids: Iterable[str]) -> None:
+        """Record ids that are now stored (call after the insert commits)."""
+        for transaction_id in transaction_ids:
+            if self._bloom is not None and transaction_id not in self._bloom:
+                self._bloom.add(transaction_id)
+            self._remember(transaction_id)
+
+    # -- Stats ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Lookup counters plus the observed false-positive rate: the share of
+        new ids (Bloom negatives + false positives) that still needed a query.
+        """
+        stats = dict(self._stats)
+        new_ids = stats["bloom_negative"] + stats["false_positive"]
+        stats["false_positive_rate"] = stats["false_positive"] / new_ids if new_ids else 0.0
+        stats["expected_false_positive_rate"] = (
+            self._bloom.expected_error_rate if self._bloom else None
+        )
+        stats["bloom_items"] = self._bloom.count if self._bloom else 0
+        stats["bloom_bytes"] = self._bloom.size_bytes if self._bloom else 0
+        stats["recent_items"] = len(self._recent)
+        stats["rebuilds"] = self.rebuilds
+        return stats
@@ -0,0 +1,183 @@
+"""
+Payment Export
+--------------
+Streams the payments table to CSV, NDJSON or Parquet (``postpay export``).
+
+Rows are read with ``fetchmany`` in chunks of ``chunk_size``; each chunk
+becomes a typed DataFrame that is appended to the output and then dropped,
+so memory stays flat whether the export holds a week or several years.
+
+Parquet needs the optional ``pyarrow`` package (``pip install postpay[parquet]``).
+"""
+
+import sqlite3
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from postpay.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+FORMATS = ("csv", "ndjson", "parquet")
+
+# Output columns, in order. payment_time is derived from ts_epoch; rows stored
+# before integer cents existed get amount_cents from their "$1,234.00" text.
+COLUMNS = (
+    "transaction_id",
+    "provider",
+    "sender",
+    "amount_cents",
+    "amount",
+    "payment_time",
+    "ts_epoch",
+    "created_at",
+)
+
+_QUERY = """
+    SELECT
+        transaction_id,
+        provider,
+        sender,
+        COALESCE(
+            amount_cents,
+            CAST(ROUND(CAST(REPLACE(REPLACE(amount, '$', ''), ',', '') AS REAL) * 100) AS INTEGER)
+        ),
+        ts_epoch,
+        created_at
+    FROM payments
+    {where}
+    ORDER BY id
+"""
+# Same day-of-payment rule as the daily rollups: the payment's own time,
+# else when it was stored.
+_SINCE = "WHERE COALESCE(ts_epoch, CAST(strftime('%s', created_at) AS INTEGER)) >= ?"
+
+_SOURCE_COLUMNS = ["transaction_id", "provider", "sender", "amount_cents", "ts_epoch", "created_at"]
+
+
+def _to_frame(rows: List[tuple]) -> pd.DataFrame:
+    """Build a DataFrame with fixed dtypes, so every chunk has the same schema."""
+    frame = pd.DataFrame.from_records(rows, columns=_SOURCE_COLUMNS)
+
+    cents = frame["amount_cents"].astype("Int64")
+    epoch = frame["ts_epoch"].astype("Int64")
+
+    return pd.DataFrame(
+        {
+            "transaction_id": frame["transaction_id"].astype("string"),
+            "provider": frame["provider"].astype("string"),
+            "sender": frame["sender"].astype("string"),
+            "amount_cents": cents,
+            "amount": (cents / 100).astype("Float64"),
+            "payment_time": pd.to_datetime(epoch, unit="s", utc=True),
+            "ts_epoch": epoch,
+            "created_at": frame["created_at"].astype("string"),
+        },
+        columns=list(COLUMNS),
+    )
+
+
+def iter_payment_frames(
+    conn: sqlite3.Connection,
+    since: Optional[date] = None,
+    chunk_size: int = 50_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the payments (optionally only those on or after ``since``) as
+    typed DataFrames of at most ``chunk_size`` rows, oldest first.
+    """
+    params: tuple = ()
+    where = ""
+    if since is not None:
+        where = _SINCE
+        params = (int(datetime.combine(since, datetime.min.time()).timestamp()),)
+
+    cursor = conn.execute(_QUERY.format(where=where), params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield _to_frame(rows)
+    finally:
+        cursor.close()
+
+
+def _write_csv(frames: Iterator[pd.DataFrame], path: str) -> int:
+    total = 0
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        header = True
+        for frame in frames:
+            frame.to_csv(fh, index=False, header=header, date_format="%Y-%m-%dT%H:%M:%SZ")
+            header = False
+            total += len(frame)
+        if header:
+            fh.write(",".join(COLUMNS) + "\n")
+    return total
+
+
+def _write_ndjson(frames: Iterator[pd.DataFrame], path: str) -> int:
+    total = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        for frame in frames:
+            if frame.empty:
+                continue
+            lines = frame.to_json(orient="records", lines=True, date_format="iso", date_unit="s")
+            fh.write(lines if lines.endswith("\n") else lines + "\n")
+            total += len(frame)
+    return total
+
+
+def _write_parquet(frames: Iterator[pd.DataFrame], path: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError(
+            "Parquet export needs pyarrow: pip install 'postpay[parquet]'"
+        ) from exc
+
+    schema = pa.Schema.from_pandas(_to_frame([]), preserve_index=False)
+    total = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for frame in frames:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            total += len(frame)
+    return total
+
+
+_WRITERS: Dict[str, Callable[[Iterator[pd.DataFrame], str], int]] = {
+    "csv": _write_csv,
+    "ndjson": _write_ndjson,
+    "parquet": _write_parquet,
+}
+
+
+def export_payments(
+    conn: sqlite3.Connection,
+    path: str,
+    fmt: str = "csv",
+    since: Optional[date] = None,
+    chunk_size: int = 50_000,
+) -> int:
+    """
+    Write payments to ``path`` in ``fmt`` ("csv", "ndjson" or "parquet").
+
+    Args:
+        conn: Open SQLite connection
+        path: Output file (overwritten)
+        fmt: Output format
+        since: Only payments on or after this local date
+        chunk_size: Rows fetched and converted per chunk
+
+    Returns:
+        Number of rows written
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(FORMATS)}")
+
+    total = _WRITERS[fmt](iter_payment_frames(conn, since, chunk_size), path)
+    logger.info("Exported %d payments to %s (%s).", total, path, fmt)
+    return total
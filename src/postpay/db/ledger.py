@@ -0,0 +1,71 @@
+import sqlite3
+from typing import Iterable, List, Tuple
+
+from postpay.utils.metrics import DB_ROWS, DB_SECONDS, track
+
+# Outcomes recorded for each Gmail message once it has been handled.
+OUTCOME_PAYMENT = "payment"
+OUTCOME_DUPLICATE = "duplicate"
+OUTCOME_NO_MATCH = "no_match"
+OUTCOME_EMPTY = "empty"
+OUTCOME_FILTERED = "filtered"  # rejected on headers; body never downloaded
+OUTCOME_UNAVAILABLE = "unavailable"  # permanent fetch error, e.g. deleted before download
+
+# Stay well under SQLite's default host-parameter limit (999).
+_LOOKUP_CHUNK = 500
+
+
+def filter_unprocessed(conn: sqlite3.Connection, gmail_ids: Iterable[str]) -> List[str]:
+    """
+    Return the Gmail message ids that are not yet in the processed_messages
+    ledger, preserving input order.
+
+    Lookups are done in bulk (one indexed IN query per chunk) so callers can
+    skip already-seen messages before downloading anything.
+
+    Args:
+        conn: Open SQLite connection
+        gmail_ids: Candidate Gmail message ids
+
+    Returns:
+        List of ids that still need to be fetched
+    """
+    ids = list(dict.fromkeys(gmail_ids))
+    seen = set()
+
+    with track(DB_SECONDS, operation="dedupe_lookup"):
+        for start in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT gmail_id FROM processed_messages WHERE gmail_id IN ({placeholders})",
+                chunk,
+            )
+            seen.update(row[0] for row in rows)
+
+    if seen:
+        DB_ROWS.inc(len(seen), operation="dedupe_lookup", outcome="seen")
+    if len(ids) > len(seen):
+        DB_ROWS.inc(len(ids) - len(seen), operation="dedupe_lookup", outcome="new")
+
+    return [gmail_id for gmail_id in ids if gmail_id not in seen]
+
+
+def mark_processed(conn: sqlite3.Connection, entries: Iterable[Tuple[str, str]]) -> None:
+    """
+    Record ``(gmail_id, outcome)`` pairs in the ledger.
+
+    The caller owns the transaction so ledger rows commit together with the
+    payments they produced. Messages that failed to download should not be
+    marked, so they are retried on the next poll.
+    """
+    conn.executemany(
+        """
+        INSERT INTO processed_messages (gmail_id, outcome, processed_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(gmail_id) DO UPDATE SET
+            outcome = excluded.outcome,
+            processed_at = excluded.processed_at
+        """,
+        entries,
+    )
@@ -1,19 +1,103 @@
+"""
+Schema Migrations
+-----------------
+Ordered, versioned schema steps recorded in a ``schema_version`` table.
+
+initialize_schema() runs on every start and applies only the steps newer
+than the database's recorded version.
+"""
+
 import sqlite3
-from datetime import datetime
+from typing import Callable, List, Optional, Tuple
 
+from postpay.utils.logging_utils import setup_logger
 
-def initialize_schema(conn: sqlite3.Connection) -> None:
-    """
-    Create required tables if they do not already exist.
+logger = setup_logger(__name__)
+
+
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: dict) -> None:
+    """ALTER TABLE ... ADD COLUMN for each ``{name: type}`` the table lacks."""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+# Local calendar day of a payments row: its own time, else when it was stored
+_ROW_DAY = (
+    "COALESCE(date({row}.ts_epoch, 'unixepoch', 'localtime'), "
+    "date({row}.created_at, 'localtime'))"
+)
+# Integer cents, deriving them from the "$1,234.00" text for older rows
+_ROW_CENTS = (
+    "COALESCE({row}.amount_cents, "
+    "CAST(ROUND(CAST(REPLACE(REPLACE({row}.amount, '$', ''), ',', '') AS REAL) * 100) AS INTEGER), 0)"
+)
+_ROLLUPS = (("daily_provider_totals", "provider"), ("daily_sender_totals", "sender"))
 
-    Your original PostPay4.py used a single SQLite database to record every
-    formatted Slack message that was already posted, preventing duplicates.
 
-    This function creates the equivalent schema.
+def _create_rollup_triggers(cursor: sqlite3.Cursor) -> None:
     """
+    Keep the daily rollups in step with payments, and seed them from any
+    rows stored before the rollups existed.
+    """
+    for table, key in _ROLLUPS:
+        day, cents = _ROW_DAY.format(row="NEW"), _ROW_CENTS.format(row="NEW")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_insert
+            AFTER INSERT ON payments
+            BEGIN
+                INSERT INTO {table} (day, {key}, payment_count, amount_cents)
+                VALUES ({day}, COALESCE(NEW.{key}, ''), 1, {cents})
+                ON CONFLICT(day, {key}) DO UPDATE SET
+                    payment_count = payment_count + 1,
+                    amount_cents = amount_cents + excluded.amount_cents;
+            END;
+            """
+        )
+
+        day, cents = _ROW_DAY.format(row="OLD"), _ROW_CENTS.format(row="OLD")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_delete
+            AFTER DELETE ON payments
+            BEGIN
+                UPDATE {table}
+                SET payment_count = payment_count - 1,
+                    amount_cents = amount_cents - {cents}
+                WHERE day = {day} AND {key} = COALESCE(OLD.{key}, '');
+            END;
+            """
+        )
+
+        if cursor.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+            _seed_rollup(cursor, table, key)
+
+
+def _seed_rollup(cursor: sqlite3.Cursor, table: str, key: str) -> None:
+    """Fill an empty rollup table from the payments already stored."""
+    day, cents = _ROW_DAY.format(row="p"), _ROW_CENTS.format(row="p")
+    cursor.execute(
+        f"""
+        INSERT INTO {table} (day, {key}, payment_count, amount_cents)
+        SELECT {day}, COALESCE(p.{key}, ''), COUNT(*), SUM({cents})
+        FROM payments AS p
+        GROUP BY 1, 2
+        """
+    )
+
 
-    cursor = conn.cursor()
+# -- Migration steps ---------------------------------------------------------
+# Each step runs once, in order, inside its own transaction together with its
+# schema_version row. Steps must stay idempotent (IF NOT EXISTS, column
+# checks) because databases created before schema_version existed already
+# hold some of these objects and start from version 0.
 
+
+def _v1_initial_tables(cursor: sqlite3.Cursor) -> None:
+    # Your original PostPay4.py used a single SQLite database to record every
+    # formatted Slack message that was already posted, preventing duplicates.
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS logged_payments (
@@ -28,4 +112,262 @@ def initialize_schema(conn: sqlite3.Connection) -> None:
         """
     )
 
-    conn.commit()
+    # Imported payments; transaction_id is the dedupe key used by the importer
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id TEXT NOT NULL,
+            provider TEXT,
+            sender TEXT,
+            amount TEXT,
+            timestamp TEXT,
+            formatted_message TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+    cursor.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_transaction_id
+        ON payments (transaction_id);
+        """
+    )
+
+
+def _v2_outbox(cursor: sqlite3.Cursor) -> None:
+    # Slack notifications written in the same transaction as their payment and
+    # drained by the outbox delivery worker (at-least-once delivery).
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id TEXT NOT NULL,
+            text TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            delivered_at TEXT
+        );
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_outbox_pending
+        ON outbox (next_attempt_at)
+        WHERE delivered_at IS NULL;
+        """
+    )
+
+
+def _v3_sync_state(cursor: sqlite3.Cursor) -> None:
+    # Gmail incremental sync cursor (users.history.list startHistoryId)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            mailbox TEXT PRIMARY KEY,
+            history_id TEXT NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+
+    # Resume points for `postpay backfill`, one row per backfill query
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+            query TEXT PRIMARY KEY,
+            page_token TEXT,
+            messages_seen INTEGER NOT NULL DEFAULT 0,
+            payments_imported INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+
+
+def _v4_processed_ledger(cursor: sqlite3.Cursor) -> None:
+    # Ledger of every Gmail message already handled, keyed by message id so
+    # re-listed messages are skipped before they are downloaded.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS processed_messages (
+            gmail_id TEXT PRIMARY KEY,
+            outcome TEXT NOT NULL,
+            processed_at TEXT DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID;
+        """
+    )
+
+
+def _v5_payment_cents_and_epoch(cursor: sqlite3.Cursor) -> None:
+    # Payment records carry integer cents and epoch seconds
+    _add_missing_columns(cursor, "payments", {"amount_cents": "INTEGER", "ts_epoch": "INTEGER"})
+
+
+def _v6_daily_rollups(cursor: sqlite3.Cursor) -> None:
+    # Daily rollups maintained by triggers in the same transaction as each
+    # payment insert/delete, so reports never scan the payments table.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_provider_totals (
+            day TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            payment_count INTEGER NOT NULL DEFAULT 0,
+            amount_cents INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, provider)
+        ) WITHOUT ROWID;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_sender_totals (
+            day TEXT NOT NULL,
+            sender TEXT NOT NULL,
+            payment_count INTEGER NOT NULL DEFAULT 0,
+            amount_cents INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, sender)
+        ) WITHOUT ROWID;
+        """
+    )
+    _create_rollup_triggers(cursor)
+
+
+def _v7_payment_indexes(cursor: sqlite3.Cursor) -> None:
+    # Time-range and per-provider scans (export, ad-hoc queries) seek instead
+    # of walking the whole table; ANALYZE gives the planner row estimates.
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_payments_created_at
+        ON payments (created_at);
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_payments_provider_created_at
+        ON payments (provider, created_at);
+        """
+    )
+    cursor.execute("ANALYZE")
+
+
+def _v8_outbox_channel(cursor: sqlite3.Cursor) -> None:
+    # Slack channel chosen by the routing rules when the row was queued;
+    # NULL means the client's default channel.
+    _add_missing_columns(cursor, "outbox", {"channel": "TEXT"})
+
+
+def _v9_rollup_update_triggers(cursor: sqlite3.Cursor) -> None:
+    # Edits to a payment's amount, time, provider or sender move it between
+    # rollup rows: take the OLD values out and add the NEW ones. Rollups of
+    # existing databases may already have missed such edits, so rebuild them.
+    for table, key in _ROLLUPS:
+        old_day, old_cents = _ROW_DAY.format(row="OLD"), _ROW_CENTS.format(row="OLD")
+        new_day, new_cents = _ROW_DAY.format(row="NEW"), _ROW_CENTS.format(row="NEW")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+            AFTER UPDATE OF amount, amount_cents, ts_epoch, created_at, {key} ON payments
+            BEGIN
+                UPDATE {table}
+                SET payment_count = payment_count - 1,
+                    amount_cents = amount_cents - {old_cents}
+                WHERE day = {old_day} AND {key} = COALESCE(OLD.{key}, '');
+
+                INSERT INTO {table} (day, {key}, payment_count, amount_cents)
+                VALUES ({new_day}, COALESCE(NEW.{key}, ''), 1, {new_cents})
+                ON CONFLICT(day, {key}) DO UPDATE SET
+                    payment_count = payment_count + 1,
+                    amount_cents = amount_cents + excluded.amount_cents;
+            END;
+            """
+        )
+        cursor.execute(f"DELETE FROM {table}")
+        _seed_rollup(cursor, table, key)
+
+
+# (version, name, step) in the order they are applied. Append only: never
+# renumber or edit a step that has shipped; add a new one instead.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "initial tables", _v1_initial_tables),
+    (2, "slack outbox", _v2_outbox),
+    (3, "sync state and backfill checkpoints", _v3_sync_state),
+    (4, "processed message ledger", _v4_processed_ledger),
+    (5, "payment cents and epoch columns", _v5_payment_cents_and_epoch),
+    (6, "daily rollups", _v6_daily_rollups),
+    (7, "payment indexes", _v7_payment_indexes),
+    (8, "outbox channel", _v8_outbox_channel),
+    (9, "rollup update triggers", _v9_rollup_update_triggers),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the highest applied migration, or 0 for an unversioned database."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """
+    Apply pending migrations up to ``target`` (default: all of them).
+
+    Each step and its schema_version row commit together; a failing step is
+    rolled back and re-raised, leaving the database at the last good version.
+
+    Returns:
+        The versions applied by this call, in order
+    """
+    conn.commit()  # steps manage their own transactions
+    current = get_schema_version(conn)
+    target = SCHEMA_VERSION if target is None else target
+
+    if current > SCHEMA_VERSION:
+        logger.warning(
+            "Database schema version %d is newer than this PostPay (%d).", current, SCHEMA_VERSION
+        )
+
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            step(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error("Schema migration %d (%s) failed.", version, name)
+            raise
+
+        logger.info("Applied schema migration %d: %s.", version, name)
+        applied.append(version)
+
+    return applied
+
+
+def initialize_schema(conn: sqlite3.Connection) -> None:
+    """
+    Bring the database schema up to date.
+
+    Safe to call on every start: only migrations newer than the recorded
+    schema_version run.
+    """
+    migrate(conn)
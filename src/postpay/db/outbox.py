@@ -0,0 +1,69 @@
+import sqlite3
+from typing import Iterable, List, Optional, Tuple
+
+
+def enqueue(
+    conn: sqlite3.Connection, messages: Iterable[Tuple[str, str, Optional[str]]]
+) -> None:
+    """
+    Add ``(transaction_id, text, channel)`` notifications to the outbox.
+
+    ``channel`` is the routed Slack channel, or None for the default one.
+    Call inside the transaction that inserts the payments so a payment and
+    its notification are committed (or rolled back) together.
+    """
+    conn.executemany(
+        "INSERT INTO outbox (transaction_id, text, channel) VALUES (?, ?, ?)",
+        messages,
+    )
+
+
+def fetch_due(
+    conn: sqlite3.Connection, now: float, limit: int = 50
+) -> List[Tuple[int, str, int, Optional[str]]]:
+    """
+    Return up to ``limit`` undelivered ``(id, text, attempts, channel)``
+    rows whose next attempt is due, oldest first.
+    """
+    rows = conn.execute(
+        """
+        SELECT id, text, attempts, channel
+        FROM outbox
+        WHERE delivered_at IS NULL AND next_attempt_at <= ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (now, limit),
+    )
+    return [(row[0], row[1], row[2], row[3]) for row in rows]
+
+
+def mark_delivered(conn: sqlite3.Connection, outbox_id: int) -> None:
+    """Record a successful delivery."""
+    with conn:
+        conn.execute(
+            """
+            UPDATE outbox
+            SET delivered_at = CURRENT_TIMESTAMP, attempts = attempts + 1, last_error = NULL
+            WHERE id = ?
+            """,
+            (outbox_id,),
+        )
+
+
+def mark_failed(conn: sqlite3.Connection, outbox_id: int, error: str, next_attempt_at: float) -> None:
+    """Record a failed attempt and when the row becomes due again."""
+    with conn:
+        conn.execute(
+            """
+            UPDATE outbox
+            SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?
+            WHERE id = ?
+            """,
+            (error, next_attempt_at, outbox_id),
+        )
+
+
+def pending_count(conn: sqlite3.Connection) -> int:
+    """Number of notifications not yet delivered."""
+    return conn.execute("SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL").fetchone()[0]
@@ -0,0 +1,70 @@
+"""
+Payment Reports
+---------------
+Totals per provider, sender or day for a date range (``postpay report``).
+
+Queries read the daily_provider_totals / daily_sender_totals rollups, which
+triggers on the payments table keep current (see migrate.py), so a report
+never scans the payments table itself.
+"""
+
+import sqlite3
+from datetime import date
+from typing import List, NamedTuple
+
+# --by choice -> (rollup table, grouping column)
+REPORT_GROUPINGS = {
+    "provider": ("daily_provider_totals", "provider"),
+    "sender": ("daily_sender_totals", "sender"),
+    "day": ("daily_provider_totals", "day"),
+}
+
+
+class ReportRow(NamedTuple):
+    """One line of a payments report."""
+
+    key: str
+    payment_count: int
+    amount_cents: int
+
+
+def payment_report(
+    conn: sqlite3.Connection,
+    start: date,
+    end: date,
+    by: str = "provider",
+) -> List[ReportRow]:
+    """
+    Summarize payments received between ``start`` and ``end`` (inclusive).
+
+    Reads only the daily rollup tables with a primary-key range scan on
+    ``day``, so the cost depends on the length of the range, not on how
+    many payments are stored.
+
+    Args:
+        conn: Open SQLite connection
+        start: First day of the range
+        end: Last day of the range
+        by: "provider", "sender" or "day"
+
+    Returns:
+        Rows ordered by day for ``by="day"``, otherwise by amount (largest first)
+    """
+    if by not in REPORT_GROUPINGS:
+        raise ValueError(f"Unknown report grouping {by!r}; expected one of {sorted(REPORT_GROUPINGS)}")
+
+    table, column = REPORT_GROUPINGS[by]
+    order = "key" if by == "day" else "SUM(amount_cents) DESC, key"
+
+    rows = conn.execute(
+        f"""
+        SELECT {column} AS key, SUM(payment_count), SUM(amount_cents)
+        FROM {table}
+        WHERE day BETWEEN ? AND ?
+        GROUP BY {column}
+        HAVING SUM(payment_count) > 0
+        ORDER BY {order}
+        """,
+        (start.isoformat(), end.isoformat()),
+    )
+    return [ReportRow(*row) for row in rows]
@@ -0,0 +1,91 @@
+import sqlite3
+from typing import Optional, Tuple
+
+DEFAULT_MAILBOX = "default"
+
+
+def get_history_id(conn: sqlite3.Connection, mailbox: str = DEFAULT_MAILBOX) -> Optional[str]:
+    """
+    Return the persisted Gmail historyId cursor for a mailbox.
+
+    Args:
+        conn: Open SQLite connection with the sync_state table created
+        mailbox: Mailbox key (one row per synced inbox)
+
+    Returns:
+        The stored historyId, or None if the mailbox has never been synced
+    """
+    row = conn.execute(
+        "SELECT history_id FROM sync_state WHERE mailbox = ?",
+        (mailbox,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def set_history_id(
+    conn: sqlite3.Connection,
+    history_id: str,
+    mailbox: str = DEFAULT_MAILBOX,
+) -> None:
+    """
+    Upsert the Gmail historyId cursor for a mailbox.
+
+    The caller owns the transaction so the cursor can be committed together
+    with the payments it covers.
+    """
+    conn.execute(
+        """
+        INSERT INTO sync_state (mailbox, history_id, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(mailbox) DO UPDATE SET
+            history_id = excluded.history_id,
+            updated_at = excluded.updated_at
+        """,
+        (mailbox, str(history_id)),
+    )
+
+
+def get_backfill_checkpoint(conn: sqlite3.Connection, query: str) -> Optional[Tuple]:
+    """
+    Return ``(page_token, messages_seen, payments_imported, completed)`` for
+    a backfill query, or None if it has never run.
+    """
+    row = conn.execute(
+        """
+        SELECT page_token, messages_seen, payments_imported, completed
+        FROM backfill_checkpoints
+        WHERE query = ?
+        """,
+        (query,),
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def save_backfill_checkpoint(
+    conn: sqlite3.Connection,
+    query: str,
+    page_token: Optional[str],
+    messages_seen: int,
+    payments_imported: int,
+    completed: bool = False,
+) -> None:
+    """
+    Upsert the resume point of a backfill. ``page_token`` is the next page
+    still to be processed.
+    """
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO backfill_checkpoints (
+                query, page_token, messages_seen, payments_imported, completed, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(query) DO UPDATE SET
+                page_token = excluded.page_token,
+                messages_seen = excluded.messages_seen,
+                payments_imported = excluded.payments_imported,
+                completed = excluded.completed,
+                updated_at = excluded.updated_at
+            """,
+            (query, page_token, messages_seen, payments_imported, int(completed)),
+        )
@@ -3,13 +3,18 @@ import time
 import logging
 
 from postpay.config import load_config
-from postpay.db.connection import get_connection
-from postpay.db.migrate import initialize_schema
+from postpay.db.access import Database
+from postpay.db.dedupe import DedupeIndex
 
 # Updated imports based on new folder layout
 from postpay.services.payments.importer import fetch_and_persist_new_payments
-from postpay.services.scheduling.scheduler import maybe_sleep_until_window_ends
+from postpay.services.payments.mailboxes import MailboxPool
+from postpay.services.scheduling.scheduler import Scheduler
 from postpay.services.notifications.slack import SlackClient
+from postpay.services.notifications.outbox_worker import OutboxWorker
+from postpay.services.notifications.routing import SlackRouter
+from postpay.services.email.push import configure_push
+from postpay.utils.metrics import start_metrics
 
 logger = logging.getLogger("postpay")
 logging.basicConfig(
@@ -22,48 +27,75 @@ def main() -> None:
     """
     Orchestrates the PostPay service:
       - Loads configuration
-      - Initializes the database
-      - Starts polling loop (email → parse → dedupe → Slack)
-      - Respects sleep windows
+      - Opens the database: schema migrations, one writer thread, reader pool
+      - Starts the background Slack outbox delivery worker
+      - Starts the optional metrics endpoint / JSON snapshot writer
+      - Starts the optional push ingress (sync within seconds of arrival)
+      - Starts polling loop (email → parse → dedupe → persist + outbox),
+        across every configured mailbox in parallel when MAILBOXES_FILE is set
+      - Schedules polls adaptively and sleeps through quiet windows
       - Handles unexpected runtime errors gracefully
     """
     config = load_config()
-    conn = get_connection(config["DB_PATH"])
-    initialize_schema(conn)
+    # Every thread below shares this: writes are queued to its single writer
+    # thread and batched into transactions, reads use pooled connections.
+    db = Database.from_config(config)
+    start_metrics(config)
 
-    slack = SlackClient(
-        webhook_url=config["SLACK_WEBHOOK_URL"],
-        api_token=config["SLACK_API_TOKEN"],
-        channel_id=config["SLACK_CHANNEL_ID"],
+    # Duplicate checks answered from memory; built once from the payments table
+    dedupe = db.read(DedupeIndex.from_config, config)
+
+    slack = SlackClient.from_config(config)
+    # Per-provider / amount / mailbox channels, chosen when a payment is queued
+    router = SlackRouter.from_config(config)
+
+    # Slack delivery runs off the ingestion loop; payments and their
+    # notifications are committed together and drained from the outbox.
+    outbox_worker = OutboxWorker(
+        db,
+        slack,
+        poll_interval=config["OUTBOX_POLL_SECONDS"],
+        delivery_workers=config["SLACK_DELIVERY_WORKERS"],
+    ).start()
+
+    # A push notification ends the wait early; the timer is the safety net
+    sync_trigger, poll_interval = configure_push(config)
+    scheduler = Scheduler.from_config(
+        config, base_interval=poll_interval, wake_event=sync_trigger
     )
 
-    poll_interval = config["POLL_INTERVAL_SECONDS"]
+    # Several inboxes: Gmail work runs on a pool, this thread is the only DB writer
+    if config["MAILBOXES_FILE"]:
+        poll = MailboxPool.from_config(db, config, dedupe=dedupe, router=router).poll_once
+    else:
+        def poll():
+            return fetch_and_persist_new_payments(db, dedupe=dedupe, router=router)
 
     while True:
         try:
             # Sleep window enforcement (00:00–09:00)
-            maybe_sleep_until_window_ends(config["ENABLE_SLEEP_MODE"])
+            scheduler.wait_out_quiet_window()
 
             # Core workflow: fetch → parse → dedupe → persist
-            new_payments = fetch_and_persist_new_payments(conn)
+            new_payments = poll()
+            scheduler.record_poll(len(new_payments))
 
             if not new_payments:
                 logger.info("No new payments found.")
-                time.sleep(poll_interval)
+                scheduler.wait()
                 continue
 
-            # Push each formatted message to Slack
+            # Notifications are already in the outbox; deliver them now
+            outbox_worker.notify()
             for payment in new_payments:
-                formatted = payment["formatted_message"]
-                slack.post_message(formatted)
-                logger.info("Posted new %s payment: %s",
-                            payment["provider"], formatted)
+                logger.info("Queued new %s payment: %s",
+                            payment.provider, payment.formatted_message)
 
         except Exception as exc:
             logger.exception("Unhandled exception in main loop: %s", exc)
             time.sleep(5)
 
-        time.sleep(poll_interval)
+        scheduler.wait()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+"""
+Payment Model
+-------------
+The one record type that flows from the parsers through dedupe,
+persistence, notification and reporting.
+
+Amounts are integer cents and times are integer epoch seconds, so sorting,
+dedupe keys and aggregation are exact integer operations instead of string
+parsing. Provider names are interned (a handful of distinct values shared by
+every record) and senders are whitespace-normalized once, at construction.
+"""
+
+import sys
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from typing import Optional
+
+UNKNOWN_SENDER = "Unknown Sender"
+
+
+def parse_amount_cents(text: Optional[str]) -> Optional[int]:
+    """
+    Convert "$1,234.56" / "1,234.56" / "45" into integer cents.
+
+    Returns None for missing or malformed input. Works on the digits
+    directly, so no float rounding is involved.
+    """
+    if not text:
+        return None
+
+    digits = text.strip().lstrip("$").replace(",", "")
+    whole, _, fraction = digits.partition(".")
+    if not whole.isdigit() or (fraction and not fraction.isdigit()) or len(fraction) > 2:
+        return None
+
+    return int(whole) * 100 + int(fraction.ljust(2, "0") or 0)
+
+
+def normalize_sender(sender: Optional[str]) -> str:
+    """Collapse whitespace in a sender name; empty names become UNKNOWN_SENDER."""
+    normalized = " ".join(sender.split()) if sender else ""
+    return normalized or UNKNOWN_SENDER
+
+
+@dataclass(frozen=True, slots=True)
+class Payment:
+    """
+    One received payment.
+
+    ``ts_epoch`` is None only when neither the alert text nor the Gmail
+    message carried a usable date. Identity fields (``transaction_id``,
+    ``gmail_id``, ``mailbox``) and ``formatted_message`` are filled in by the
+    importer with with_fields().
+
+    Item access (``payment["amount"]``) is kept for code written against the
+    old dict records; new code should use attributes.
+    """
+
+    provider: str
+    sender: str
+    amount_cents: int
+    ts_epoch: Optional[int] = None
+    transaction_id: Optional[str] = None
+    gmail_id: Optional[str] = None
+    mailbox: Optional[str] = None
+    formatted_message: Optional[str] = field(default=None, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "provider", sys.intern(self.provider))
+        object.__setattr__(self, "sender", normalize_sender(self.sender))
+
+    @property
+    def amount(self) -> str:
+        """Display amount, e.g. "$1,234.00"."""
+        return f"${self.amount_cents // 100:,}.{self.amount_cents % 100:02d}"
+
+    @property
+    def timestamp(self) -> Optional[datetime]:
+        """Local datetime of the payment, or None when unknown."""
+        return datetime.fromtimestamp(self.ts_epoch) if self.ts_epoch is not None else None
+
+    def with_fields(self, **changes) -> "Payment":
+        """Return a copy with ``changes`` applied (records are immutable)."""
+        return replace(self, **changes)
+
+    def as_dict(self) -> dict:
+        """Plain dict of the stored fields plus the display amount."""
+        data = asdict(self)
+        data["amount"] = self.amount
+        return data
+
+    def __getitem__(self, key: str):
+        if key not in _ITEM_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+_ITEM_KEYS = frozenset((*Payment.__dataclass_fields__, "amount", "timestamp"))
@@ -1,7 +1,9 @@
 """
 Payment Parser Registry
 
-Exports all supported payment provider parsers.
+Exports all supported payment provider parsers, the declarative provider
+specs they are built from, the classifier that routes a body to one of
+them, and the process-pool ParseExecutor for bulk parsing.
 """
 
 from .zelle_parser import ZelleParser
@@ -9,6 +11,10 @@ from .venmo_parser import VenmoParser
 from .cashapp_parser import CashAppParser
 from .apple_parser import ApplePayParser
 from .other_parsers import OtherPaymentParser
+from .classifier import ProviderClassifier
+from .spec import PROVIDER_SPECS, ProviderSpec, SpecParser
+from .registry import build_parsers
+from .executor import ParseExecutor
 
 __all__ = [
     "ZelleParser",
@@ -16,4 +22,10 @@ __all__ = [
     "CashAppParser",
     "ApplePayParser",
     "OtherPaymentParser",
+    "ProviderClassifier",
+    "ProviderSpec",
+    "SpecParser",
+    "PROVIDER_SPECS",
+    "build_parsers",
+    "ParseExecutor",
 ]
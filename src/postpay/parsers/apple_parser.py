@@ -1,9 +1,7 @@
-import re
-from datetime import datetime
-from postpay.utils.logging_utils import info, error
+from postpay.parsers.spec import APPLE_CASH, SpecParser
 
 
-class ApplePayParser:
+class ApplePayParser(SpecParser):
     """
     Parser for Apple Cash / Apple Pay payment notifications.
 
@@ -12,65 +10,11 @@ class ApplePayParser:
     - Extract dollar amounts
     - Extract sender with natural-language patterns
     - Normalize timestamps when possible
-    """
-
-    KEYWORDS = [
-        "apple cash",
-        "apple pay",
-        "apple payment",
-        "sent you",
-        "you received",
-        "received payment",
-    ]
-
-    AMOUNT_REGEX = re.compile(r"\$([\d,]+\.\d{2})")
-
-    SENDER_REGEX = re.compile(
-        r"(?:from|sent you|payment from)\s+([A-Za-z .'-]+)",
-        re.IGNORECASE,
-    )
-
-    DATE_REGEX = re.compile(
-        r"(\w+\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}\s*(?:AM|PM)?)",
-        re.IGNORECASE,
-    )
-
-    def matches(self, text: str) -> bool:
-        """Return True if the email/sms content likely belongs to Apple Cash."""
-        body = text.lower()
-        return any(keyword in body for keyword in self.KEYWORDS)
 
-    def parse(self, text: str):
-        """Parse an Apple Cash message into a normalized payment object."""
-        if not self.matches(text):
-            return None
-
-        # Amount
-        amount_match = self.AMOUNT_REGEX.search(text)
-        amount = f"${amount_match.group(1)}" if amount_match else None
-
-        # Sender
-        sender_match = self.SENDER_REGEX.search(text)
-        sender = sender_match.group(1).strip() if sender_match else "Unknown Sender"
-
-        # Timestamp
-        timestamp = None
-        date_match = self.DATE_REGEX.search(text)
-        if date_match:
-            raw_ts = date_match.group(1)
-            try:
-                timestamp = datetime.strptime(raw_ts, "%B %d, %Y %I:%M %p").timestamp()
-            except Exception:
-                timestamp = datetime.now().timestamp()
+    Keywords and sender phrases live in the APPLE_CASH ProviderSpec.
+    """
 
-        return {
-            "provider": "Apple Cash",
-            "amount": amount,
-            "sender": sender,
-            "timestamp": timestamp or datetime.now().timestamp(),
-            "formatted_message": None,  # Filled later by MessageFormatter
-            "transaction_id": f"apple-{sender}-{timestamp}",
-        }
+    SPEC = APPLE_CASH
 
     # NEW: required by the importer
     def fetch(self):
@@ -81,3 +25,7 @@ class ApplePayParser:
         So fetch() returns an empty list.
         """
         return []
+
+
+# Short alias kept for callers that predate the ApplePayParser name
+AppleParser = ApplePayParser
@@ -0,0 +1,96 @@
+"""
+Provider Classifier
+-------------------
+Routes an email body to the single best-matching payment parser.
+
+Every parser's KEYWORDS are compiled into one case-insensitive alternation
+wrapped in a lookahead, so a single pass over the body reports every keyword
+occurrence (overlapping ones included, like an Aho-Corasick scan) without
+lowercasing or copying the text once per parser.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+
+class ProviderClassifier:
+    """
+    Scores parsers by the keywords found in a body and picks one.
+
+    A keyword listed by several parsers is split between them (weight
+    1 / number of owners), so generic phrases such as "you received" can
+    only break ties, while brand keywords such as "zelle" decide the match.
+    The optional ``fallback`` parser (the generic "Other" parser) only wins
+    when it scores strictly higher than every provider-specific parser.
+    """
+
+    def __init__(self, parsers: Sequence, fallback=None):
+        self.parsers = list(parsers)
+        self.fallback = fallback
+
+        owners: Dict[str, set] = defaultdict(set)
+        for index, parser in enumerate(self.parsers):
+            for keyword in parser.KEYWORDS:
+                owners[keyword.lower()].add(index)
+
+        keywords = sorted(owners, key=len, reverse=True)
+
+        # keyword -> [(parser index, weight), ...]
+        self._weights = {
+            keyword: [(index, 1.0 / len(owners[keyword])) for index in sorted(owners[keyword])]
+            for keyword in keywords
+        }
+
+        # The lookahead reports the longest keyword starting at each offset;
+        # shorter keywords that are prefixes of it match at the same offset.
+        self._prefixes = {
+            keyword: [other for other in keywords if other != keyword and keyword.startswith(other)]
+            for keyword in keywords
+        }
+
+        self._pattern = re.compile(
+            "(?=(" + "|".join(re.escape(keyword) for keyword in keywords) + "))",
+            re.IGNORECASE,
+        )
+
+    def matched_keywords(self, text: str) -> set:
+        """Return the distinct (lowercased) keywords present in ``text``."""
+        found = set()
+        for match in self._pattern.finditer(text):
+            keyword = match.group(1).lower()
+            if keyword in found:
+                continue
+            found.add(keyword)
+            found.update(self._prefixes[keyword])
+        return found
+
+    def scores(self, text: str) -> List[float]:
+        """Return one score per parser, aligned with ``self.parsers``."""
+        totals = [0.0] * len(self.parsers)
+        for keyword in self.matched_keywords(text):
+            for index, weight in self._weights[keyword]:
+                totals[index] += weight
+        return totals
+
+    def classify(self, text: str) -> Optional[object]:
+        """
+        Return the best-matching parser for ``text``, or None when no
+        parser keyword occurs at all. Ties go to the earlier parser.
+        """
+        totals = self.scores(text)
+
+        best_index = None
+        for index, parser in enumerate(self.parsers):
+            if parser is self.fallback or totals[index] <= 0:
+                continue
+            if best_index is None or totals[index] > totals[best_index]:
+                best_index = index
+
+        if self.fallback is not None and self.fallback in self.parsers:
+            fallback_score = totals[self.parsers.index(self.fallback)]
+            best_score = totals[best_index] if best_index is not None else 0.0
+            if fallback_score > best_score:
+                return self.fallback
+
+        return self.parsers[best_index] if best_index is not None else None
@@ -0,0 +1,120 @@
+"""
+Parse Executor
+--------------
+Classifies and parses decoded email bodies on a pool of worker processes,
+for backfills and reparses where single-core regex work is the bottleneck.
+
+Bodies are sent in chunks of ``chunk_size``; each worker builds the parsers
+and classifier once, at start-up, and returns every result as a compact
+``(provider, sender, amount_cents, ts_epoch)`` tuple (or None), which is
+cheaper to pickle than a Payment. Results come back in input order.
+
+With ``workers <= 1`` everything runs in the calling process, so the same
+code path serves small batches without process start-up costs.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+from postpay.models import Payment
+from postpay.parsers.classifier import ProviderClassifier
+from postpay.parsers.registry import FALLBACK_PROVIDER, build_parsers
+
+ParsedTuple = Tuple[str, str, int, Optional[int]]
+
+# Set in each worker by _init_worker(); the in-process path builds its own.
+_CLASSIFIER: Optional[ProviderClassifier] = None
+
+
+def _build_classifier() -> ProviderClassifier:
+    parsers = build_parsers()
+    fallback = next(p for p in parsers if p.provider == FALLBACK_PROVIDER)
+    return ProviderClassifier(parsers, fallback=fallback)
+
+
+def _init_worker() -> None:
+    global _CLASSIFIER
+    _CLASSIFIER = _build_classifier()
+
+
+def _parse_chunk(bodies: List[str], classifier: Optional[ProviderClassifier] = None):
+    classifier = classifier or _CLASSIFIER
+    results: List[Optional[ParsedTuple]] = []
+    for body in bodies:
+        parser = classifier.classify(body)
+        parsed = parser.extract(body) if parser else None
+        results.append(
+            (parsed.provider, parsed.sender, parsed.amount_cents, parsed.ts_epoch)
+            if parsed
+            else None
+        )
+    return results
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ParseExecutor:
+    """
+    Parses bodies with a ProcessPoolExecutor of ``workers`` processes.
+
+    Use as a context manager (or call close()) so the worker processes are
+    shut down. The pool is started lazily on the first parse.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = 500):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._local: Optional[ProviderClassifier] = None
+
+    @classmethod
+    def from_config(cls, config: dict, workers: Optional[int] = None) -> "ParseExecutor":
+        """Executor with PARSE_WORKERS / PARSE_CHUNK_SIZE (``workers`` overrides)."""
+        return cls(
+            workers=config["PARSE_WORKERS"] if workers is None else workers,
+            chunk_size=config["PARSE_CHUNK_SIZE"],
+        )
+
+    def parse_tuples(self, bodies: Iterable[str]) -> Iterator[Optional[ParsedTuple]]:
+        """Yield one tuple (or None for no match) per body, in input order."""
+        if self.workers <= 1:
+            if self._local is None:
+                self._local = _build_classifier()
+            for chunk in _chunks(bodies, self.chunk_size):
+                yield from _parse_chunk(chunk, self._local)
+            return
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+        # At most two chunks per worker in flight, so a huge (streamed) input
+        # is never pulled into memory at once; the FIFO keeps input order.
+        in_flight: Deque[Future] = deque()
+        for chunk in _chunks(bodies, self.chunk_size):
+            in_flight.append(self._pool.submit(_parse_chunk, chunk))
+            if len(in_flight) >= 2 * self.workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+    def parse(self, bodies: Iterable[str]) -> Iterator[Optional[Payment]]:
+        """Like parse_tuples(), rebuilt into Payment records."""
+        for parsed in self.parse_tuples(bodies):
+            yield Payment(*parsed) if parsed else None
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "ParseExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,31 @@
+"""
+Parser Registry
+---------------
+Builds the runtime parser list from PROVIDER_SPECS. Providers with a
+dedicated parser class use it; any other spec gets a plain SpecParser, so
+adding a provider only needs a new spec entry.
+"""
+
+from typing import List
+
+from postpay.parsers.apple_parser import ApplePayParser
+from postpay.parsers.cashapp_parser import CashAppParser
+from postpay.parsers.other_parsers import OtherPaymentParser
+from postpay.parsers.spec import OTHER, PROVIDER_SPECS, SpecParser
+from postpay.parsers.venmo_parser import VenmoParser
+from postpay.parsers.zelle_parser import ZelleParser
+
+PARSER_CLASSES = {
+    cls.SPEC.provider: cls
+    for cls in (ApplePayParser, CashAppParser, ZelleParser, VenmoParser, OtherPaymentParser)
+}
+
+FALLBACK_PROVIDER = OTHER.provider
+
+
+def build_parsers(specs=PROVIDER_SPECS) -> List[SpecParser]:
+    """Instantiate one parser per spec, in registry (priority) order."""
+    return [
+        PARSER_CLASSES[spec.provider](spec) if spec.provider in PARSER_CLASSES else SpecParser(spec)
+        for spec in specs
+    ]
@@ -0,0 +1,214 @@
+"""
+Provider Specs
+--------------
+Declarative description of each payment provider's notification format.
+
+A ProviderSpec is plain data: the provider name, its routing KEYWORDS and the
+phrases that surround the sender's name. At import time every spec is compiled
+into one combined regex whose named groups (amount, date, sender) are filled by
+a single left-to-right pass over the body, instead of three separate
+``search()`` calls per parser.
+
+Adding a provider is a new entry in PROVIDER_SPECS.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from postpay.models import UNKNOWN_SENDER, Payment, parse_amount_cents
+
+# Shared field patterns. Sender names are runs of capitalized words (with
+# optional initials) so trailing prose such as "via Zelle on" is not captured.
+AMOUNT_PATTERN = r"\$(?P<amount>[\d,]+\.\d{2})"
+DATE_PATTERN = r"(?P<date>\w+\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}(?:\s*(?i:AM|PM))?)"
+NAME_PATTERN = r"[A-Z](?:[A-Za-z'-]+|\.)(?:[ ][A-Z](?:[A-Za-z'-]+|\.))*"
+
+TIMESTAMP_FORMAT = "%B %d, %Y %I:%M %p"
+
+_FIELDS = ("amount", "date", "sender")
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """
+    Data-only description of one provider.
+
+    sender_prefixes: phrases that precede the sender ("from John Doe")
+    sender_suffixes: phrases that follow the sender ("John Doe paid you")
+    senders: substrings of the From header of the provider's own alerts,
+             used by the header pre-filter
+    stamp_undated: alerts with no date, and no Gmail internalDate either,
+                   are dated at import time instead of left undated
+    """
+
+    provider: str
+    keywords: Tuple[str, ...]
+    sender_prefixes: Tuple[str, ...] = ("from", "sent you", "payment from")
+    sender_suffixes: Tuple[str, ...] = ("paid you", "sent you")
+    senders: Tuple[str, ...] = ()
+    stamp_undated: bool = False
+    pattern: "re.Pattern" = field(init=False, repr=False, compare=False)
+    keyword_pattern: "re.Pattern" = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "pattern", _compile_fields(self))
+        object.__setattr__(
+            self,
+            "keyword_pattern",
+            re.compile("|".join(re.escape(k) for k in self.keywords), re.IGNORECASE),
+        )
+
+    def extract_fields(self, text: str) -> Dict[str, Optional[str]]:
+        """
+        Return the first amount, date and sender in ``text`` from one pass
+        of the combined pattern, stopping as soon as all three are found.
+        """
+        found: Dict[str, Optional[str]] = dict.fromkeys(_FIELDS)
+        missing = len(_FIELDS)
+
+        for match in self.pattern.finditer(text):
+            name = match.lastgroup
+            value = match.group(name)
+            if name.startswith("sender"):
+                name = "sender"
+            if found[name] is None:
+                found[name] = value
+                missing -= 1
+                if not missing:
+                    break
+
+        return found
+
+
+def _alternation(phrases) -> str:
+    return "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+
+
+def _compile_fields(spec: ProviderSpec) -> "re.Pattern":
+    branches = [AMOUNT_PATTERN, DATE_PATTERN]
+    if spec.sender_prefixes:
+        branches.append(
+            rf"\b(?i:{_alternation(spec.sender_prefixes)})\s+(?P<sender_pre>{NAME_PATTERN})"
+        )
+    if spec.sender_suffixes:
+        branches.append(
+            rf"(?P<sender_post>{NAME_PATTERN})\s+(?i:{_alternation(spec.sender_suffixes)})\b"
+        )
+    # Each branch holds exactly one named group, so match.lastgroup names
+    # the field that a given match filled.
+    return re.compile("|".join(branches))
+
+
+class SpecParser:
+    """
+    Parser driven entirely by a ProviderSpec.
+
+    Subclasses only set SPEC; a bare SpecParser(spec) handles providers that
+    have no dedicated class.
+    """
+
+    SPEC: Optional[ProviderSpec] = None
+
+    def __init__(self, spec: Optional[ProviderSpec] = None):
+        self.spec = spec or self.SPEC
+        if self.spec is None:
+            raise ValueError(f"{type(self).__name__} requires a ProviderSpec")
+        self.provider = self.spec.provider
+        self.KEYWORDS = list(self.spec.keywords)
+
+    def matches(self, email_body: str) -> bool:
+        """Return True if any of the provider's KEYWORDS occur in the body."""
+        return self.spec.keyword_pattern.search(email_body) is not None
+
+    def parse(self, email_body: str) -> Optional[Payment]:
+        """
+        Parse the email body into a Payment, or None if the provider's
+        keywords (or an amount) are absent.
+        """
+        if not self.matches(email_body):
+            return None
+
+        return self.extract(email_body)
+
+    def extract(self, email_body: str) -> Optional[Payment]:
+        """
+        Extract a Payment without re-checking KEYWORDS, or None when the
+        body holds no amount.
+        Used when the ProviderClassifier has already routed the body here.
+        """
+        fields = self.spec.extract_fields(email_body)
+
+        amount_cents = parse_amount_cents(fields["amount"])
+        if amount_cents is None:
+            return None
+
+        return Payment(
+            provider=self.provider,
+            sender=fields["sender"] or UNKNOWN_SENDER,
+            amount_cents=amount_cents,
+            ts_epoch=self.normalize_timestamp(fields["date"]),
+        )
+
+    def normalize_timestamp(self, raw_ts: Optional[str]) -> Optional[int]:
+        """Return epoch seconds when the date text parses, else None."""
+        if not raw_ts:
+            return None
+        try:
+            return int(datetime.strptime(raw_ts, TIMESTAMP_FORMAT).timestamp())
+        except ValueError:
+            return None
+
+
+ZELLE = ProviderSpec(
+    provider="Zelle",
+    keywords=("zelle", "received money", "sent you money", "you received"),
+    sender_prefixes=("from", "sender", "sent", "received from"),
+    sender_suffixes=("sent you",),
+    senders=("zellepay.com",),
+)
+
+VENMO = ProviderSpec(
+    provider="Venmo",
+    keywords=("venmo", "paid you", "sent you", "you received a payment", "money from"),
+    sender_prefixes=("from", "paid you", "sent you", "money from"),
+    senders=("venmo.com",),
+)
+
+CASH_APP = ProviderSpec(
+    provider="Cash App",
+    keywords=("cash app", "cashapp", "sent you money", "you received", "received payment"),
+    senders=("cash.app", "square.com"),
+)
+
+APPLE_CASH = ProviderSpec(
+    provider="Apple Cash",
+    keywords=(
+        "apple cash",
+        "apple pay",
+        "apple payment",
+        "sent you",
+        "you received",
+        "received payment",
+    ),
+    senders=("apple.com",),
+    stamp_undated=True,
+)
+
+OTHER = ProviderSpec(
+    provider="Other",
+    keywords=(
+        "payment",
+        "paid you",
+        "sent you",
+        "you received",
+        "received money",
+        "money from",
+        "transaction",
+    ),
+)
+
+# Registry order is parser priority (ties go to the earlier provider);
+# the generic OTHER spec stays last as the fallback.
+PROVIDER_SPECS = (APPLE_CASH, CASH_APP, ZELLE, VENMO, OTHER)
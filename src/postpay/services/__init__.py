@@ -8,13 +8,14 @@ keeping internal structure organized by domain (payments, notifications, schedul
 from .payments.importer import fetch_and_persist_new_payments
 from .notifications.formatter import MessageFormatter
 from .notifications.slack import SlackClient
-from .scheduling.scheduler import maybe_sleep_until_window_ends
+from .scheduling.scheduler import Scheduler, maybe_sleep_until_window_ends
 from .scheduling.sleep_window import is_sleep_window
 
 __all__ = [
     "fetch_and_persist_new_payments",
     "MessageFormatter",
     "SlackClient",
+    "Scheduler",
     "maybe_sleep_until_window_ends",
     "is_sleep_window",
 ]
@@ -6,17 +6,82 @@ This preserves the exact behavior of the original PostPay4 logic, rewritten
 cleanly for the new modular architecture.
 """
 
-import base64
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, NamedTuple, Optional, Tuple
 
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from postpay.services.email import mime
 from postpay.utils.logging_utils import setup_logger
+from postpay.utils.metrics import GMAIL_MESSAGES, GMAIL_REQUEST_SECONDS, track
 
 logger = setup_logger(__name__)
 
+# History records for these labels never carry inbound payment alerts.
+IGNORED_HISTORY_LABELS = {"DRAFT", "SENT"}
+
+# Gmail's batch endpoint accepts at most 100 sub-requests per HTTP call.
+MAX_BATCH_SIZE = 100
+
+# users.messages.list returns at most 500 ids per page.
+MAX_PAGE_SIZE = 500
+
+# 4xx statuses that are auth or rate-limit hiccups; every other 4xx (404 for
+# a message deleted since it was listed, 400 for a bad id) fails the same
+# way on every retry.
+TRANSIENT_CLIENT_STATUSES = {401, 403, 408, 429}
+
+# Header-first fetch: format="metadata" plus a partial-response mask returns
+# only these headers and the snippet (a few hundred bytes per message).
+METADATA_HEADERS = ("From", "Subject", "Date")
+METADATA_FIELDS = "id,snippet,payload/headers"
+
+# Body fetch mask. Gmail cannot return a single MIME part, so this keeps
+# only what the MIME decoder needs per part (mimeType, inline data and the
+# filename/attachmentId that mark attachments), four levels deep, and drops
+# headers, sizes and part ids.
+_PART_FIELDS = "mimeType,filename,body(data,attachmentId)"
+BODY_FIELDS = (
+    f"id,internalDate,payload({_PART_FIELDS},parts({_PART_FIELDS},parts({_PART_FIELDS},parts({_PART_FIELDS}))))"
+)
+
+
+def is_permanent_error(error: Optional[Exception]) -> bool:
+    """True when retrying the request that raised ``error`` cannot succeed."""
+    if not isinstance(error, HttpError):
+        return False
+    try:
+        status = int(getattr(error.resp, "status", 0))
+    except (TypeError, ValueError):
+        return False
+    return 400 <= status < 500 and status not in TRANSIENT_CLIENT_STATUSES
+
+
+class MessageResult(NamedTuple):
+    """Outcome of one message fetch inside a batch."""
+
+    id: str
+    message: Optional[Dict]
+    error: Optional[Exception]
+
+
+def message_headers(message: Dict) -> Dict[str, str]:
+    """
+    Return ``{lowercased header name: value}`` from a message payload.
+    """
+    return {
+        header.get("name", "").lower(): header.get("value", "")
+        for header in message.get("payload", {}).get("headers", [])
+    }
+
+
+class HistoryExpiredError(Exception):
+    """
+    Raised when a stored historyId is older than Gmail's history retention
+    window and users.history.list can no longer serve it (HTTP 404).
+    """
+
 
 class GmailClient:
     def __init__(self, token_path: str, credentials_path: str, query: str):
@@ -44,54 +109,310 @@ class GmailClient:
             logger.error("Failed to authenticate Gmail client.", exc)
             raise
 
+    @staticmethod
+    def _execute(call: str, request):
+        """Execute an API (or batch) request, recording its latency and outcome."""
+        with track(GMAIL_REQUEST_SECONDS, call=call):
+            return request.execute()
+
     def list_messages(self) -> List[Dict]:
         """
         List Gmail messages matching the search query.
         """
         try:
-            response = (
+            response = self._execute(
+                "messages.list",
                 self.service.users()
                 .messages()
-                .list(userId="me", q=self.query, maxResults=10)
-                .execute()
+                .list(userId="me", q=self.query, maxResults=10),
             )
             return response.get("messages", [])
         except HttpError as err:
             logger.error("Gmail API list_messages error: %s", err)
             return []
 
+    def iter_message_pages(
+        self,
+        query: Optional[str] = None,
+        page_size: int = MAX_PAGE_SIZE,
+        page_token: Optional[str] = None,
+    ) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+        """
+        Stream every message matching ``query`` one page at a time.
+
+        Yields ``(messages, next_page_token)``; ``next_page_token`` is None on
+        the last page and can be passed back as ``page_token`` to resume.
+        Only one page is held in memory regardless of mailbox size. API
+        errors are logged and re-raised so callers can stop and resume.
+        """
+        query = self.query if query is None else query
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+        while True:
+            try:
+                response = self._execute(
+                    "messages.list",
+                    self.service.users()
+                    .messages()
+                    .list(userId="me", q=query, maxResults=page_size, pageToken=page_token),
+                )
+            except HttpError as err:
+                logger.error("Gmail API list_messages error: %s", err)
+                raise
+
+            page_token = response.get("nextPageToken")
+            yield response.get("messages", []), page_token
+
+            if not page_token:
+                return
+
+    def clone(self) -> "GmailClient":
+        """
+        Return an independently authenticated client for the same mailbox.
+
+        The underlying httplib2 transport is not thread-safe, so each worker
+        thread needs its own client.
+        """
+        return GmailClient(self.token_path, self.credentials_path, self.query)
+
+    def get_history_id(self) -> Optional[str]:
+        """
+        Return the mailbox's current historyId from users.getProfile.
+        """
+        try:
+            profile = self._execute("getProfile", self.service.users().getProfile(userId="me"))
+            return profile.get("historyId")
+        except HttpError as err:
+            logger.error("Gmail API getProfile error: %s", err)
+            return None
+
+    def list_history(self, start_history_id: str) -> Tuple[List[Dict], str]:
+        """
+        List messages added to the mailbox since ``start_history_id``.
+
+        Follows nextPageToken until the history is exhausted and returns
+        ``(messages, latest_history_id)``. Messages are de-duplicated and keep
+        the ``{"id": ..., "threadId": ...}`` shape used by list_messages().
+
+        Note that users.history.list does not accept a search query, so the
+        result is every added message, not only those matching ``self.query``;
+        sync_messages() narrows it with filter_by_query().
+
+        Raises HistoryExpiredError when Gmail no longer has the cursor. On any
+        other API error the original cursor is returned so nothing is skipped.
+        """
+        messages: List[Dict] = []
+        seen = set()
+        latest = start_history_id
+        page_token = None
+
+        while True:
+            try:
+                response = self._execute(
+                    "history.list",
+                    self.service.users()
+                    .history()
+                    .list(
+                        userId="me",
+                        startHistoryId=start_history_id,
+                        historyTypes=["messageAdded"],
+                        pageToken=page_token,
+                    ),
+                )
+            except HttpError as err:
+                if getattr(err.resp, "status", None) == 404:
+                    raise HistoryExpiredError(start_history_id) from err
+                logger.error("Gmail API history.list error: %s", err)
+                return [], start_history_id
+
+            for record in response.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message = added.get("message", {})
+                    msg_id = message.get("id")
+                    if not msg_id or msg_id in seen:
+                        continue
+                    if IGNORED_HISTORY_LABELS.intersection(message.get("labelIds", [])):
+                        continue
+                    seen.add(msg_id)
+                    messages.append({"id": msg_id, "threadId": message.get("threadId")})
+
+            latest = response.get("historyId", latest)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return messages, latest
+
+    def filter_by_query(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Keep only the ``messages`` that also match ``self.query``.
+
+        Pages through the query's listing until every id has been seen, so
+        the usual case (new mail sits on the first, newest page) costs one
+        messages.list call. API errors are re-raised.
+        """
+        if not messages or not self.query:
+            return messages
+
+        wanted = {message["id"] for message in messages}
+        matched = set()
+        for page, _ in self.iter_message_pages():
+            matched.update(message["id"] for message in page if message["id"] in wanted)
+            if matched == wanted:
+                break
+        return [message for message in messages if message["id"] in matched]
+
+    def sync_messages(self, history_id: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Incremental sync entry point.
+
+        With a stored ``history_id`` only messages added since that cursor and
+        matching ``self.query`` are returned. Without one, or when the cursor has expired, this falls back
+        to a full list_messages() call and re-seeds the cursor from the
+        mailbox profile. The profile is read *before* listing so messages that
+        arrive in between are picked up by the next incremental call.
+
+        The full listing pages through every message matching ``self.query``
+        (list_messages() stops at the first 10), since the re-seeded cursor
+        skips anything it leaves out. If the listing fails, nothing is
+        returned and the old cursor is kept.
+
+        Returns ``(messages, new_history_id)``; persist the new cursor only
+        after the messages have been processed.
+        """
+        if history_id:
+            try:
+                messages, new_history_id = self.list_history(history_id)
+            except HistoryExpiredError:
+                logger.warning(
+                    "Gmail historyId %s expired — falling back to full listing.",
+                    history_id,
+                )
+            else:
+                try:
+                    return self.filter_by_query(messages), new_history_id
+                except HttpError:
+                    return [], history_id
+
+        new_history_id = self.get_history_id()
+        messages: List[Dict] = []
+        try:
+            for page, _ in self.iter_message_pages():
+                messages.extend(page)
+        except HttpError:
+            return [], history_id
+        return messages, new_history_id
+
     def get_message(self, msg_id: str) -> Dict:
         """
         Return a full message payload.
         """
         try:
-            return (
+            return self._execute(
+                "messages.get",
                 self.service.users()
                 .messages()
-                .get(userId="me", id=msg_id, format="full")
-                .execute()
+                .get(userId="me", id=msg_id, format="full"),
             )
         except HttpError as err:
             logger.error("Gmail API get_message error: %s", err)
             return {}
 
-    @staticmethod
-    def extract_text(message: Dict) -> Optional[str]:
+    def get_many(
+        self,
+        msg_ids: Iterable[str],
+        batch_size: int = MAX_BATCH_SIZE,
+        format: str = "full",
+        fields: Optional[str] = None,
+        metadata_headers: Optional[Iterable[str]] = None,
+    ) -> List[MessageResult]:
         """
-        Extract base64-decoded plain text from Gmail message payload.
+        Fetch many message payloads over the Gmail batch endpoint.
+
+        IDs are grouped into batch HTTP requests of up to ``batch_size``
+        sub-requests, so N messages cost ceil(N / batch_size) round trips
+        instead of N. Results are returned in input order; a failed fetch is
+        reported on its own MessageResult (``message=None``, ``error`` set)
+        without affecting the rest of the batch.
+
+        ``format``, ``fields`` (partial-response mask) and
+        ``metadata_headers`` are passed through to users.messages.get.
         """
-        try:
-            parts = message.get("payload", {}).get("parts", [])
-            if not parts:
-                return None
+        ids = list(msg_ids)
+        batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        results: List[Optional[MessageResult]] = [None] * len(ids)
 
-            encoded = parts[0]["body"].get("data")
-            if not encoded:
-                return None
+        options = {"format": format}
+        if fields:
+            options["fields"] = fields
+        if metadata_headers:
+            options["metadataHeaders"] = list(metadata_headers)
 
-            decoded_bytes = base64.urlsafe_b64decode(encoded)
-            return decoded_bytes.decode("utf-8", errors="ignore")
+        def _callback(request_id, response, exception):
+            index = int(request_id)
+            if exception is not None:
+                logger.error("Gmail API batch get error for %s: %s", ids[index], exception)
+                results[index] = MessageResult(ids[index], None, exception)
+            else:
+                results[index] = MessageResult(ids[index], response, None)
 
-        except Exception as exc:
-            logger.error("Failed to decode Gmail message body.", exc)
-            return None
+        for start in range(0, len(ids), batch_size):
+            batch = self.service.new_batch_http_request(callback=_callback)
+            for index in range(start, min(start + batch_size, len(ids))):
+                batch.add(
+                    self.service.users()
+                    .messages()
+                    .get(userId="me", id=ids[index], **options),
+                    request_id=str(index),
+                )
+            try:
+                self._execute(f"batch.messages.get.{format}", batch)
+            except HttpError as err:
+                logger.error("Gmail API batch request error: %s", err)
+                for index in range(start, min(start + batch_size, len(ids))):
+                    if results[index] is None:
+                        results[index] = MessageResult(ids[index], None, err)
+
+        fetched = [
+            result if result is not None
+            else MessageResult(ids[index], None, RuntimeError("no batch response"))
+            for index, result in enumerate(results)
+        ]
+        failed = sum(1 for result in fetched if result.error is not None)
+        if len(fetched) > failed:
+            GMAIL_MESSAGES.inc(len(fetched) - failed, format=format, outcome="ok")
+        if failed:
+            GMAIL_MESSAGES.inc(failed, format=format, outcome="error")
+        return fetched
+
+    def get_headers_many(self, msg_ids: Iterable[str]) -> List[MessageResult]:
+        """
+        Phase one of a header-first fetch: From/Subject/Date and the snippet
+        for each message, without any body data.
+        """
+        return self.get_many(
+            msg_ids,
+            format="metadata",
+            fields=METADATA_FIELDS,
+            metadata_headers=METADATA_HEADERS,
+        )
+
+    def get_bodies_many(self, msg_ids: Iterable[str]) -> List[MessageResult]:
+        """
+        Phase two of a header-first fetch: only the MIME tree and its inline
+        body data, for messages that passed the pre-filter.
+        """
+        return self.get_many(msg_ids, format="full", fields=BODY_FIELDS)
+
+    @staticmethod
+    def decode_body(data: Optional[str]) -> str:
+        """
+        Decode a base64url ``body.data`` string; "" when missing.
+        """
+        return mime.decode_body(data)
+
+    @staticmethod
+    def extract_text(message: Dict) -> Optional[str]:
+        """
+        Extract the plain text of a Gmail message payload (text/plain
+        preferred, HTML fallback), or None when it has no inline text.
+        """
+        return mime.extract_text(message) or None
@@ -0,0 +1,125 @@
+"""
+MIME Body Decoder
+-----------------
+The single place that turns a Gmail API message payload into plain text.
+
+- Walks nested multipart trees (multipart/alternative inside
+  multipart/mixed, forwarded messages, ...) iteratively, in document order.
+- Prefers the first text/plain part, falls back to the first text/html part
+  stripped to text, and handles single-part payloads.
+- Only the chosen part is base64-decoded. Attachments and non-text parts
+  (inline images, PDFs) are never decoded, and a text part larger than
+  ``max_bytes`` is truncated before decoding, so a huge body cannot blow up
+  CPU or memory.
+"""
+
+import binascii
+import html
+import re
+from typing import Dict, Iterator, Optional
+
+from postpay.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Payment alerts are a few KB; anything past this is newsletter or quoted noise.
+MAX_BODY_BYTES = 256 * 1024
+
+_URLSAFE = str.maketrans("-_", "+/")
+
+_HTML_DROP = re.compile(r"<(script|style|head)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_HTML_BREAK = re.compile(r"<(?:br|/p|/div|/tr|/li|/h[1-6])\b[^>]*>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_SPACES = re.compile(r"[ \t\r\f\v\xa0]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def decode_body(data: Optional[str], max_bytes: int = MAX_BODY_BYTES) -> str:
+    """
+    Decode a Gmail base64url ``body.data`` string to text.
+
+    Returns "" for missing or undecodable data. Input longer than
+    ``max_bytes`` decoded bytes is truncated (on a 4-character boundary)
+    before decoding, so only the leading ``max_bytes`` are ever materialized.
+    """
+    if not data:
+        return ""
+
+    limit = (max_bytes // 3) * 4
+    if len(data) > limit:
+        logger.debug("MIME part of ~%d bytes truncated to %d.", len(data) * 3 // 4, max_bytes)
+        data = data[:limit]
+
+    encoded = data.translate(_URLSAFE)
+    encoded += "=" * (-len(encoded) % 4)  # Gmail may omit padding
+
+    try:
+        raw = binascii.a2b_base64(encoded)
+    except (binascii.Error, ValueError) as exc:
+        logger.warning("Undecodable MIME body: %s", exc)
+        return ""
+
+    return raw.decode("utf-8", errors="ignore")
+
+
+def html_to_text(markup: str) -> str:
+    """
+    Cheap HTML-to-text: drop script/style/head, turn block ends into
+    newlines, strip tags, unescape entities and squeeze whitespace.
+    """
+    text = _HTML_COMMENT.sub("", markup)
+    text = _HTML_DROP.sub("", text)
+    text = _HTML_BREAK.sub("\n", text)
+    text = _HTML_TAG.sub(" ", text)
+    text = html.unescape(text)
+    text = _SPACES.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n", text).strip()
+
+
+def iter_text_parts(payload: Dict) -> Iterator[Dict]:
+    """
+    Yield the inline text/* leaf parts of a payload in document order.
+
+    Uses an explicit stack, so arbitrarily deep nesting cannot hit the
+    recursion limit. Attachments (a filename or attachmentId) and non-text
+    leaves are skipped without touching their data.
+    """
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get("parts")
+        if children:
+            stack.extend(reversed(children))
+            continue
+
+        mime_type = (part.get("mimeType") or "").lower()
+        body = part.get("body") or {}
+        if not mime_type.startswith("text/") or part.get("filename") or body.get("attachmentId"):
+            continue
+        if body.get("data"):
+            yield part
+
+
+def extract_text(message: Dict, max_bytes: int = MAX_BODY_BYTES) -> str:
+    """
+    Return the readable text of a Gmail message (or bare payload).
+
+    The first text/plain part wins; otherwise the first text/html part is
+    converted to text. Returns "" when the message has no inline text.
+    """
+    payload = message.get("payload", message) if isinstance(message, dict) else {}
+
+    html_part = None
+    for part in iter_text_parts(payload):
+        mime_type = part.get("mimeType", "").lower()
+        if mime_type == "text/plain":
+            return decode_body(part["body"]["data"], max_bytes)
+        if mime_type == "text/html" and html_part is None:
+            html_part = part
+
+    if html_part is not None:
+        return html_to_text(decode_body(html_part["body"]["data"], max_bytes))
+
+    return ""
@@ -0,0 +1,196 @@
+"""
+Push Ingress
+------------
+Optional built-in HTTP endpoint that turns Gmail watch / Pub/Sub push
+notifications (or any local POST) into an immediate incremental sync.
+
+Gmail's users.watch publishes ``{"emailAddress": ..., "historyId": ...}`` to
+a Pub/Sub topic; a push subscription POSTs it here wrapped in the standard
+envelope ``{"message": {"data": <base64 JSON>, ...}, "subscription": ...}``.
+The body is only used for logging — any POST triggers a sync, since the
+importer always syncs from its own stored historyId.
+
+Notifications go through a SyncTrigger that debounces bursts: the first
+notification arms the trigger and the sync fires ``debounce`` seconds later,
+so ten emails arriving together cause one sync, not ten.
+"""
+
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from postpay.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SyncTrigger:
+    """
+    Debounced, thread-safe "sync now" signal shared by the ingress and the
+    polling loop.
+    """
+
+    def __init__(self, debounce: float = 2.0):
+        self.debounce = debounce
+        self._cond = threading.Condition()
+        self._armed_at: Optional[float] = None
+        self.notifications = 0
+
+    def notify(self) -> None:
+        """Request a sync; calls within the debounce window collapse."""
+        with self._cond:
+            self.notifications += 1
+            if self._armed_at is None:
+                self._armed_at = time.monotonic()
+            self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Block until a debounced sync is due or ``timeout`` elapses.
+
+        Returns True when woken by a notification (the trigger is reset),
+        False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._armed_at is not None:
+                    fire_at = self._armed_at + self.debounce
+                    if now >= fire_at:
+                        self._armed_at = None
+                        return True
+                    wake_at = fire_at if deadline is None else min(fire_at, deadline)
+                else:
+                    wake_at = deadline
+
+                if wake_at is not None and now >= wake_at:
+                    return False
+                self._cond.wait(None if wake_at is None else wake_at - now)
+
+
+def build_pubsub_envelope(email_address: str, history_id: str) -> dict:
+    """
+    Build a Pub/Sub push body as Gmail watch would send it. Used by local
+    stand-in publishers and tests.
+    """
+    data = json.dumps({"emailAddress": email_address, "historyId": history_id})
+    return {
+        "message": {
+            "data": base64.b64encode(data.encode()).decode(),
+            "messageId": str(int(time.time() * 1000)),
+        },
+        "subscription": "projects/local/subscriptions/postpay",
+    }
+
+
+def _decode_notification(body: bytes) -> dict:
+    """Best-effort decode of a Pub/Sub envelope; {} for anything else."""
+    try:
+        envelope = json.loads(body or b"{}")
+        data = envelope.get("message", {}).get("data")
+        return json.loads(base64.b64decode(data)) if data else {}
+    except (ValueError, AttributeError, TypeError):
+        return {}
+
+
+class PushIngress:
+    """
+    Minimal threaded HTTP server feeding a SyncTrigger.
+
+    POST <any path>  -> trigger a sync (204)
+    GET  /healthz    -> 200
+    """
+
+    def __init__(
+        self,
+        trigger: SyncTrigger,
+        host: str = "127.0.0.1",
+        port: int = 8085,
+        verification_token: str = "",
+    ):
+        self.trigger = trigger
+        self.verification_token = verification_token
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def _handler_class(self):
+        ingress = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                if ingress.verification_token:
+                    token = parse_qs(urlparse(self.path).query).get("token", [""])[0]
+                    if token != ingress.verification_token:
+                        self.send_response(403)
+                        self.end_headers()
+                        return
+
+                notification = _decode_notification(body)
+                logger.info(
+                    "Push notification received (historyId=%s).",
+                    notification.get("historyId", "n/a"),
+                )
+                ingress.trigger.notify()
+
+                # Pub/Sub treats any 2xx as an acknowledgement
+                self.send_response(204)
+                self.end_headers()
+
+            def do_GET(self):
+                status = 200 if urlparse(self.path).path == "/healthz" else 404
+                self.send_response(status)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                # Route http.server's stderr access log through our logger
+                logger.debug("push ingress: " + format, *args)
+
+        return Handler
+
+    def start(self) -> "PushIngress":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="postpay-push", daemon=True
+        )
+        self._thread.start()
+        logger.info("Push ingress listening on %s:%d", *self.address)
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def configure_push(config: dict) -> Tuple[SyncTrigger, float]:
+    """
+    Build the SyncTrigger for a runtime and start the ingress when
+    PUSH_INGRESS_PORT is set.
+
+    Returns ``(trigger, poll_interval)``: with push enabled, timer polling
+    drops to the slow PUSH_SAFETY_POLL_SECONDS safety net.
+    """
+    trigger = SyncTrigger(debounce=config["PUSH_DEBOUNCE_SECONDS"])
+
+    if not config["PUSH_INGRESS_PORT"]:
+        return trigger, config["POLL_INTERVAL_SECONDS"]
+
+    PushIngress(
+        trigger,
+        host=config["PUSH_INGRESS_HOST"],
+        port=config["PUSH_INGRESS_PORT"],
+        verification_token=config["PUSH_VERIFICATION_TOKEN"],
+    ).start()
+    return trigger, config["PUSH_SAFETY_POLL_SECONDS"]
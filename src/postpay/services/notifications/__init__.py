@@ -1,10 +1,20 @@
 """
 Notification Service Domain
 
-Handles outbound messaging, Slack integration, and formatting.
+Handles outbound messaging, Slack integration, formatting, and the
+background outbox delivery worker.
 """
 
 from .formatter import MessageFormatter
-from .slack import SlackClient
+from .slack import SlackClient, SlackTransport
+from .outbox_worker import OutboxWorker
+from .routing import RoutingRule, SlackRouter
 
-__all__ = ["MessageFormatter", "SlackClient"]
+__all__ = [
+    "MessageFormatter",
+    "SlackClient",
+    "SlackTransport",
+    "OutboxWorker",
+    "RoutingRule",
+    "SlackRouter",
+]
@@ -1,19 +1,17 @@
 """
 Message Formatter
 -----------------
-Builds Slack-friendly formatted messages from raw payment objects.
+Builds Slack-friendly formatted messages from Payment records.
 """
 
-from datetime import datetime
-
 
 class MessageFormatter:
     @staticmethod
     def format(payment):
-        ts = datetime.fromtimestamp(payment["timestamp"]).strftime("%Y-%m-%d %H:%M")
+        ts = payment.timestamp.strftime("%Y-%m-%d %H:%M") if payment.ts_epoch is not None else "Unknown"
         return (
-            f"*{payment['provider']} Payment Received*\n"
-            f"From: {payment['sender']}\n"
-            f"Amount: ${payment['amount']}\n"
+            f"*{payment.provider} Payment Received*\n"
+            f"From: {payment.sender}\n"
+            f"Amount: {payment.amount}\n"
             f"Time: {ts}"
         )
@@ -0,0 +1,179 @@
+"""
+Outbox Delivery Worker
+----------------------
+Drains the durable ``outbox`` table to Slack in the background.
+
+Payments and their notifications are committed together by the importer;
+this worker posts pending rows, marks them delivered, and reschedules
+failures with exponential backoff. A row is only marked delivered after
+Slack accepts it, so delivery is at-least-once: a crash between the post and
+the update re-sends that one message rather than losing it.
+
+Given a db.access.Database, due rows are read from its reader pool and the
+delivered/failed updates of a drain are committed together by its writer
+thread, instead of the worker opening its own read-write connection.
+
+Each row carries the Slack channel chosen by the routing rules. A drain
+groups due rows by channel and delivers the groups on a small thread pool:
+rows in one channel go out in order, paced by that channel's rate limit in
+the SlackClient, while different channels post concurrently.
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from postpay.db import outbox
+from postpay.db.access import Database
+from postpay.db.connection import get_connection
+from postpay.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class OutboxWorker:
+    """
+    Background thread that delivers outbox rows through a SlackClient.
+    """
+
+    def __init__(
+        self,
+        db,
+        slack,
+        poll_interval: float = 5.0,
+        batch_size: int = 50,
+        backoff_base: float = 5.0,
+        backoff_max: float = 900.0,
+        delivery_workers: int = 4,
+    ):
+        # A Database to share, or a path for a private connection
+        self.db = db
+        self.slack = slack
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.delivery_workers = max(1, delivery_workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _next_attempt_at(self, attempts: int, now: float) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempts))
+        return now + random.uniform(delay / 2, delay)
+
+    def _deliver_channel(
+        self, channel: Optional[str], rows: List[Tuple], record: Callable[[tuple], None]
+    ) -> int:
+        """Post one channel's rows in order, passing each row's update to ``record``."""
+        delivered = 0
+        for outbox_id, text, attempts in rows:
+            try:
+                ok = self.slack.post_message(text, channel=channel)
+                error = None if ok else "Slack rejected the message"
+            except Exception as exc:
+                ok, error = False, str(exc)
+
+            if ok:
+                record((outbox.mark_delivered, outbox_id))
+                delivered += 1
+            else:
+                retry_at = self._next_attempt_at(attempts, time.time())
+                record((outbox.mark_failed, outbox_id, error, retry_at))
+                logger.warning(
+                    "Outbox delivery %d failed (attempt %d): %s", outbox_id, attempts + 1, error
+                )
+        return delivered
+
+    def drain_once(self, conn) -> int:
+        """
+        Deliver every due row once. Returns the number delivered.
+
+        ``conn`` is a SQLite connection or a Database; with a Database the
+        updates are queued on its writer as each post completes and awaited
+        before returning, so the next drain never sees a delivered row as
+        due. A plain connection is only used from the calling thread, so its
+        updates are applied once every channel has finished.
+        """
+        shared = isinstance(conn, Database)
+        now = time.time()
+        pending = []
+        updates = []
+
+        if shared:
+            due = conn.read(outbox.fetch_due, now, self.batch_size)
+
+            def record(update):
+                pending.append(conn.submit(*update))
+        else:
+            due = outbox.fetch_due(conn, now, self.batch_size)
+            record = updates.append
+
+        by_channel: Dict[Optional[str], List[Tuple]] = defaultdict(list)
+        for outbox_id, text, attempts, channel in due:
+            by_channel[channel].append((outbox_id, text, attempts))
+
+        if len(by_channel) <= 1 or self.delivery_workers == 1:
+            delivered = sum(
+                self._deliver_channel(channel, rows, record)
+                for channel, rows in by_channel.items()
+            )
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.delivery_workers, thread_name_prefix="postpay-slack"
+                )
+            futures = [
+                self._pool.submit(self._deliver_channel, channel, rows, record)
+                for channel, rows in by_channel.items()
+            ]
+            delivered = sum(future.result() for future in futures)
+
+        for update in updates:
+            update[0](conn, *update[1:])
+        for future in pending:
+            future.result()
+
+        return delivered
+
+    def notify(self) -> None:
+        """Wake the worker early, e.g. right after new payments commit."""
+        self._wake.set()
+
+    def run(self) -> None:
+        """Delivery loop; runs until stop() is called."""
+        shared = isinstance(self.db, Database)
+        conn = self.db if shared else get_connection(self.db)
+        try:
+            while not self._stop.is_set():
+                try:
+                    # Keep draining while full batches come back
+                    while self.drain_once(conn) >= self.batch_size:
+                        pass
+                except Exception as exc:
+                    logger.exception("Unhandled exception in outbox worker: %s", exc)
+
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        finally:
+            if not shared:
+                conn.close()
+
+    def start(self) -> "OutboxWorker":
+        self._thread = threading.Thread(target=self.run, name="postpay-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,93 @@
+"""
+Slack Channel Routing
+---------------------
+Chooses the Slack channel for each payment notification.
+
+Rules are listed in a JSON file named by SLACK_ROUTES_FILE and checked in
+order; the first rule whose conditions all hold wins, and payments matching
+no rule go to SLACK_CHANNEL_ID. Put the most specific rules first:
+
+    [
+      {"channel": "C0LARGE", "min_amount": "1000.00"},
+      {"channel": "C0ZELLE", "provider": "Zelle"},
+      {"channel": "C0SHOP", "mailbox": "shop"},
+      {"channel": "C0SHOPBIG", "mailbox": "shop", "min_amount": "250"}
+    ]
+
+The channel is chosen when the notification is queued and stored on its
+outbox row, so the delivery worker can post to several channels at once,
+each under its own rate limit.
+"""
+
+import json
+from typing import List, NamedTuple, Optional
+
+from postpay.models import Payment, parse_amount_cents
+
+
+class RoutingRule(NamedTuple):
+    """Send payments matching every given condition to ``channel``."""
+
+    channel: str
+    provider: Optional[str] = None
+    min_amount_cents: Optional[int] = None
+    mailbox: Optional[str] = None
+
+    def matches(self, payment: Payment, mailbox: Optional[str] = None) -> bool:
+        if self.provider is not None and payment.provider.lower() != self.provider.lower():
+            return False
+        if self.min_amount_cents is not None and payment.amount_cents < self.min_amount_cents:
+            return False
+        if self.mailbox is not None and (payment.mailbox or mailbox) != self.mailbox:
+            return False
+        return True
+
+
+def load_routes(path: str) -> List[RoutingRule]:
+    """Read routing rules from a JSON file (see the module docstring)."""
+    with open(path, "r", encoding="utf-8") as fh:
+        entries = json.load(fh)
+
+    rules = []
+    for entry in entries:
+        min_amount = entry.get("min_amount")
+        min_amount_cents = None
+        if min_amount is not None:
+            min_amount_cents = parse_amount_cents(str(min_amount))
+            if min_amount_cents is None:
+                raise ValueError(f"Invalid min_amount in Slack route: {min_amount!r}")
+        rules.append(
+            RoutingRule(
+                channel=entry["channel"],
+                provider=entry.get("provider"),
+                min_amount_cents=min_amount_cents,
+                mailbox=entry.get("mailbox"),
+            )
+        )
+    return rules
+
+
+class SlackRouter:
+    """
+    Maps payments to channels using an ordered list of RoutingRules.
+
+    ``channel_for`` returns None for the default channel, which the
+    SlackClient resolves to its configured channel_id at delivery time.
+    """
+
+    def __init__(self, rules: List[RoutingRule]):
+        self.rules = list(rules)
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["SlackRouter"]:
+        """Router for SLACK_ROUTES_FILE, or None when no routes are configured."""
+        if not config["SLACK_ROUTES_FILE"]:
+            return None
+        return cls(load_routes(config["SLACK_ROUTES_FILE"]))
+
+    def channel_for(self, payment: Payment, mailbox: Optional[str] = None) -> Optional[str]:
+        """Channel of the first matching rule; ``mailbox`` is used when the payment has none."""
+        for rule in self.rules:
+            if rule.matches(payment, mailbox):
+                return rule.channel
+        return None
@@ -2,39 +2,250 @@
 Slack Notification Client
 -------------------------
 Handles posting formatted payment messages to Slack channels.
+
+All Web API calls go through a long-lived SlackTransport: one pooled
+keep-alive requests.Session (no TCP+TLS handshake per message), separate
+connect/read timeouts, bounded retries with jittered exponential backoff,
+HTTP 429 Retry-After handling (a wait longer than backoff_max gives up and
+leaves the message for the outbox's next pass), and per-endpoint latency
+tracking.
+
+Slack allows chat.postMessage about once per second per channel. With
+``channel_rate`` set, SlackClient paces each channel with its own token
+bucket, so concurrent posts to different channels run in parallel while
+each channel stays under its limit instead of drawing 429s.
 """
 
+import random
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+
 from postpay.utils.logging_utils import setup_logger
+from postpay.utils.metrics import SLACK_REQUEST_SECONDS, SLACK_THROTTLE_SECONDS
+from postpay.utils.rate_limit import TokenBucket
 
 logger = setup_logger(__name__)
 
+SLACK_API_BASE = "https://slack.com/api/"
+
+# Statuses worth retrying besides transport errors; 429 uses Retry-After.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LatencyStats:
+    """Running latency summary for one endpoint (seconds)."""
+
+    __slots__ = ("count", "total", "max", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "last": self.last,
+        }
+
+
+class SlackTransport:
+    """
+    Pooled, retrying HTTP transport for the Slack Web API.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        pool_size: int = 10,
+        session: Optional[requests.Session] = None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+        self._latency: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def _record(self, endpoint: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            self._latency.setdefault(endpoint, LatencyStats()).record(seconds)
+        SLACK_REQUEST_SECONDS.observe(seconds, endpoint=endpoint, outcome=outcome)
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return ``{endpoint: {count, avg, max, last}}``."""
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in self._latency.items()}
+
+    def post(
+        self,
+        endpoint: str,
+        payload: dict,
+        headers: dict,
+        before_attempt: Optional[Callable[[], None]] = None,
+    ) -> Optional[requests.Response]:
+        """
+        POST ``payload`` to ``SLACK_API_BASE + endpoint``.
+
+        Retries transport errors and retryable statuses up to max_retries
+        times; a 429 whose Retry-After exceeds backoff_max is returned at
+        once rather than holding the caller. ``before_attempt`` runs before
+        every attempt, retries included (e.g. to take a rate-limit token).
+        Returns the final response, or None if every attempt failed before
+        a response arrived.
+        """
+        url = SLACK_API_BASE + endpoint
+        response = None
+
+        for attempt in range(self.max_retries + 1):
+            if before_attempt is not None:
+                before_attempt()
+            started = time.monotonic()
+            try:
+                response = self.session.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self._record(endpoint, time.monotonic() - started, "transport_error")
+                logger.warning("Slack %s attempt %d failed: %s", endpoint, attempt + 1, exc)
+                delay = self._backoff(attempt)
+            else:
+                self._record(endpoint, time.monotonic() - started, str(response.status_code))
+                if response.status_code not in RETRYABLE_STATUSES:
+                    return response
+
+                delay = self._retry_after(response) if response.status_code == 429 else None
+                if delay is not None and delay > self.backoff_max:
+                    logger.warning(
+                        "Slack %s rate limited for %.0fs; giving up for now",
+                        endpoint, delay,
+                    )
+                    return response
+                if delay is None:
+                    delay = self._backoff(attempt)
+                logger.warning(
+                    "Slack %s returned HTTP %d; retrying in %.2fs",
+                    endpoint, response.status_code, delay,
+                )
+
+            if attempt < self.max_retries:
+                time.sleep(delay)
+
+        return response
+
 
 class SlackClient:
     """
     Sends formatted messages to Slack via the Web API.
+
+    ``channel_rate`` is the most messages per second posted to any one
+    channel (0 disables pacing), with bursts of up to ``channel_burst``.
+    post_message() is safe to call from several threads.
     """
 
-    def __init__(self, webhook_url: str, api_token: str, channel_id: str):
+    def __init__(
+        self,
+        webhook_url: str,
+        api_token: str,
+        channel_id: str,
+        transport: Optional[SlackTransport] = None,
+        channel_rate: float = 0.0,
+        channel_burst: int = 1,
+    ):
         self.webhook_url = webhook_url
         self.api_token = api_token
         self.channel_id = channel_id
+        self.transport = transport or SlackTransport()
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
 
-    def post_message(self, text: str) -> None:
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SlackClient":
+        return cls(
+            webhook_url=config["SLACK_WEBHOOK_URL"],
+            api_token=config["SLACK_API_TOKEN"],
+            channel_id=config["SLACK_CHANNEL_ID"],
+            transport=SlackTransport(
+                connect_timeout=config["SLACK_CONNECT_TIMEOUT"],
+                read_timeout=config["SLACK_READ_TIMEOUT"],
+                max_retries=config["SLACK_MAX_RETRIES"],
+            ),
+            channel_rate=config["SLACK_CHANNEL_RATE"],
+            channel_burst=config["SLACK_CHANNEL_BURST"],
+        )
+
+    def _throttle(self, channel: str) -> None:
+        """Wait for ``channel``'s token bucket when pacing is enabled."""
+        if self.channel_rate <= 0:
+            return
+        with self._buckets_lock:
+            bucket = self._buckets.get(channel)
+            if bucket is None:
+                bucket = TokenBucket(self.channel_rate, self.channel_burst)
+                self._buckets[channel] = bucket
+        SLACK_THROTTLE_SECONDS.observe(bucket.acquire(), channel=channel)
+
+    def post_message(self, text: str, channel: Optional[str] = None) -> bool:
         """
         Sends a message to Slack using chat.postMessage.
+
+        ``channel`` defaults to the client's channel_id. Returns True when
+        Slack accepted the message.
         """
+        channel = channel or self.channel_id
         headers = {"Authorization": f"Bearer {self.api_token}"}
-        payload = {"channel": self.channel_id, "text": text}
+        payload = {"channel": channel, "text": text}
 
-        response = requests.post(
-            "https://slack.com/api/chat.postMessage",
-            headers=headers,
-            json=payload,
-            timeout=10,
+        response = self.transport.post(
+            "chat.postMessage", payload, headers, before_attempt=partial(self._throttle, channel)
         )
 
-        if not response.ok or not response.json().get("ok"):
-            logger.error("Slack error: %s", response.text)
-        else:
-            logger.info("Slack message posted successfully.")
+        if response is None or not response.ok or not response.json().get("ok"):
+            logger.error("Slack error: %s", response.text if response is not None else "no response")
+            return False
+
+        logger.info("Slack message posted successfully.")
+        return True
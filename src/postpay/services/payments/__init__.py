@@ -6,5 +6,6 @@ payment data from multiple providers.
 """
 
 from .importer import fetch_and_persist_new_payments
+from .mailboxes import Mailbox, MailboxPool, load_mailboxes
 
-__all__ = ["fetch_and_persist_new_payments"]
+__all__ = ["fetch_and_persist_new_payments", "Mailbox", "MailboxPool", "load_mailboxes"]
@@ -0,0 +1,144 @@
+"""
+Payment Backfill
+----------------
+Imports historical payment emails (``postpay backfill --since DATE``).
+
+The mailbox is streamed page by page through GmailClient.iter_message_pages,
+so memory stays bounded for any mailbox size. Each page's ids are filtered
+through the processed-message ledger, fetched in 100-message batches spread
+over a thread pool (one GmailClient per worker thread; headers first, bodies
+only for messages that pass the header pre-filter), parsed, and
+persisted in one transaction. A checkpoint with the next page token is saved
+after every page, so an interrupted backfill resumes where it stopped.
+
+Slack notifications are skipped by default; pass ``notify=True`` to queue
+them in the outbox like live payments.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Optional
+
+from postpay.db.ledger import filter_unprocessed
+from postpay.db.sync_state import get_backfill_checkpoint, save_backfill_checkpoint
+from postpay.services.email.gmail_client import MAX_BATCH_SIZE, MAX_PAGE_SIZE
+from postpay.services.payments.importer import (
+    fetch_candidates,
+    parse_fetched,
+    persist_payments,
+)
+from postpay.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def build_backfill_query(since: date, query: str = "") -> str:
+    """Combine an optional Gmail filter with an ``after:`` date bound."""
+    bound = f"after:{since:%Y/%m/%d}"
+    return f"{query} {bound}".strip()
+
+
+def run_backfill(
+    conn,
+    gmail,
+    since: date,
+    query: str = "",
+    workers: int = 4,
+    notify: bool = False,
+    restart: bool = False,
+    page_size: int = MAX_PAGE_SIZE,
+    prefilter: bool = True,
+    dedupe=None,
+    parse_executor=None,
+    router=None,
+) -> Dict[str, int]:
+    """
+    Import every matching message received since ``since``.
+
+    Args:
+        conn: SQLite connection (used only from the calling thread)
+        gmail: GmailClient for the mailbox; cloned once per worker thread
+        since: Earliest date to import
+        query: Extra Gmail search filter
+        workers: Number of parallel fetch threads
+        notify: Queue Slack notifications for imported payments
+        restart: Ignore any saved checkpoint and start from the first page
+        page_size: Message ids listed per page (max 500)
+        prefilter: Skip body downloads for messages rejected on headers
+        dedupe: Optional in-memory DedupeIndex for the duplicate checks
+        parse_executor: Optional ParseExecutor to parse on worker processes
+        router: Optional SlackRouter choosing the channel of each notification
+
+    Returns:
+        Totals: ``{"messages": ..., "payments": ..., "failed": ...}``
+    """
+    full_query = build_backfill_query(since, query)
+
+    page_token: Optional[str] = None
+    messages_seen = 0
+    payments_imported = 0
+
+    checkpoint = None if restart else get_backfill_checkpoint(conn, full_query)
+    if checkpoint:
+        page_token, messages_seen, payments_imported, completed = checkpoint
+        if completed:
+            logger.info("Backfill for '%s' already completed; use restart to rerun.", full_query)
+            return {"messages": messages_seen, "payments": payments_imported, "failed": 0}
+        logger.info("Resuming backfill for '%s' after %d messages.", full_query, messages_seen)
+
+    local = threading.local()
+
+    def fetch_chunk(ids):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = gmail.clone()
+        return fetch_candidates(client, ids, prefilter)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="postpay-backfill") as pool:
+        for messages, next_token in gmail.iter_message_pages(
+            full_query, page_size=page_size, page_token=page_token
+        ):
+            new_ids = filter_unprocessed(conn, (msg["id"] for msg in messages))
+            chunks = [
+                new_ids[start:start + MAX_BATCH_SIZE]
+                for start in range(0, len(new_ids), MAX_BATCH_SIZE)
+            ]
+
+            fetched, filtered = [], []
+            for chunk_fetched, chunk_filtered in pool.map(fetch_chunk, chunks):
+                fetched.extend(chunk_fetched)
+                filtered.extend(chunk_filtered)
+            processed, payments, _ = parse_fetched(fetched, filtered, parse_executor)
+            page_failed = sum(1 for result in fetched if result.error is not None)
+
+            new_payments = persist_payments(
+                conn, payments, processed, notify=notify, dedupe=dedupe, router=router
+            )
+
+            messages_seen += len(messages)
+            payments_imported += len(new_payments)
+            failed += page_failed
+
+            save_backfill_checkpoint(
+                conn,
+                full_query,
+                next_token,
+                messages_seen,
+                payments_imported,
+                completed=next_token is None,
+            )
+            logger.info(
+                "Backfill progress: %d messages, %d payments imported, %d failed.",
+                messages_seen, payments_imported, failed,
+            )
+
+    if failed:
+        logger.warning(
+            "%d messages could not be fetched; rerun with restart to retry them "
+            "(already-imported messages are skipped via the ledger).",
+            failed,
+        )
+
+    return {"messages": messages_seen, "payments": payments_imported, "failed": failed}
@@ -5,128 +5,457 @@ Fetches new payment messages from Gmail, parses them with provider-specific
 parsers, deduplicates entries, and persists new payments to the database.
 """
 
-import base64
+import time
+from functools import partial
 
-from postpay.gmail_client import GmailClient
+from postpay.config import load_config
+from postpay.services.email.gmail_client import GmailClient, is_permanent_error, message_headers
+from postpay.services.email.mime import extract_text
+from postpay.services.notifications.formatter import MessageFormatter
 
-from postpay.parsers.apple_parser import ApplePayParser
-from postpay.parsers.cashapp_parser import CashAppParser
-from postpay.parsers.zelle_parser import ZelleParser
-from postpay.parsers.venmo_parser import VenmoParser
-from postpay.parsers.other_parsers import OtherParser
+from postpay.parsers.classifier import ProviderClassifier
+from postpay.parsers.registry import FALLBACK_PROVIDER, build_parsers
 
-from postpay.db.connection import get_cursor
+from postpay.db import outbox
+from postpay.db.access import after_commit, run_read, run_write
+from postpay.db.ledger import (
+    OUTCOME_DUPLICATE,
+    OUTCOME_EMPTY,
+    OUTCOME_FILTERED,
+    OUTCOME_NO_MATCH,
+    OUTCOME_PAYMENT,
+    OUTCOME_UNAVAILABLE,
+    filter_unprocessed,
+    mark_processed,
+)
+from postpay.db.sync_state import DEFAULT_MAILBOX, get_history_id, set_history_id
 from postpay.utils.logging_utils import setup_logger
+from postpay.utils.metrics import DB_ROWS, DB_SECONDS, DECODE_SECONDS, PARSE_SECONDS, PAYMENTS, track
 
 logger = setup_logger(__name__)
 
-# Instantiate all parsers once
-PARSERS = [
-    ApplePayParser(),
-    CashAppParser(),
-    ZelleParser(),
-    VenmoParser(),
-    OtherParser(),
-]
+# Instantiate all parsers once, from the declarative provider specs
+PARSERS = build_parsers()
+FALLBACK_PARSER = next(p for p in PARSERS if p.provider == FALLBACK_PROVIDER)
+
+# One keyword scan per body picks the single parser that handles it
+CLASSIFIER = ProviderClassifier(PARSERS, fallback=FALLBACK_PARSER)
+
+# From-header substrings of known provider senders, for the header pre-filter
+SENDER_HINTS = tuple(sender for parser in PARSERS for sender in parser.spec.senders)
+
+# Providers whose alerts are dated at import time when no date is known at all
+STAMP_UNDATED = frozenset(parser.provider for parser in PARSERS if parser.spec.stamp_undated)
 
 
 def _decode_email_body(msg_json: dict) -> str:
     """
-    Extracts and decodes the text/plain body from a Gmail API message.
-    Mirrors your original PostPay4 logic exactly.
+    Extracts and decodes the readable body of a Gmail API message
+    (text/plain preferred, HTML fallback); see services.email.mime.
     """
-    try:
-        parts = msg_json["payload"].get("parts", [])
-        for part in parts:
-            if part.get("mimeType") == "text/plain":
-                data = part["body"].get("data")
-                if data:
-                    return base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-    except Exception:
-        pass
+    return extract_text(msg_json)
 
-    return ""
 
+def build_gmail_client(config: dict) -> GmailClient:
+    """Construct the GmailClient described by the loaded configuration."""
+    return GmailClient(
+        token_path=config["TOKEN_PATH"],
+        credentials_path=config["CREDENTIALS_PATH"],
+        query=config["GMAIL_SEARCH_QUERY"],
+    )
 
-def fetch_and_persist_new_payments(conn):
+
+def _list_messages(gmail, conn, incremental: bool):
     """
-    Full ingestion pipeline:
-    - Pull emails from Gmail
-    - Extract and decode bodies
-    - Feed into each parser
-    - Persist new payments (deduped)
-    - Return a list of new payment dicts for Slack posting
+    Return ``(messages, new_history_id)`` for this poll.
+
+    In incremental mode only messages added since the stored historyId are
+    listed; the full listing is used on first run or when the cursor expired.
     """
-    cursor = get_cursor(conn)
-    gmail = GmailClient()
+    if not incremental:
+        return gmail.list_messages(), None
 
-    results = []
-    messages = gmail.list_messages()
+    return gmail.sync_messages(run_read(conn, get_history_id))
 
-    if not messages:
-        logger.info("No Gmail messages to process.")
-        return results
 
-    for msg in messages:
-        msg_json = gmail.get_message(msg["id"])
+def passes_prefilter(metadata: dict) -> bool:
+    """
+    Decide from headers alone whether a message is worth downloading.
+
+    Accepts known provider senders, and any message whose Subject or
+    snippet contains a parser keyword (the snippet is the start of the
+    body, where payment alerts state what happened).
+    """
+    headers = message_headers(metadata)
+
+    sender = headers.get("from", "").lower()
+    if any(hint in sender for hint in SENDER_HINTS):
+        return True
+
+    text = f"{headers.get('subject', '')}\n{metadata.get('snippet', '')}"
+    return bool(CLASSIFIER.matched_keywords(text))
+
+
+def fetch_candidates(gmail, msg_ids, prefilter: bool = True):
+    """
+    Download the messages that may contain a payment.
+
+    With ``prefilter`` enabled this is a two-phase fetch: headers and
+    snippets for every id first, then bodies only for the ids that pass
+    passes_prefilter(). Header fetch failures are returned as failed
+    results so the messages are retried on the next poll.
+
+    Returns ``(fetched, filtered_ids)``: GmailClient results in input order
+    and the ids rejected on headers.
+    """
+    msg_ids = list(msg_ids)
+    if not msg_ids:
+        return [], []
+    if not prefilter:
+        return gmail.get_many(msg_ids), []
+
+    failed = {}
+    candidates = []
+    filtered = []
+    for result in gmail.get_headers_many(msg_ids):
+        if result.error is not None:
+            failed[result.id] = result
+        elif passes_prefilter(result.message):
+            candidates.append(result.id)
+        else:
+            filtered.append(result.id)
+
+    if filtered:
+        logger.info("Skipped %d messages on headers alone.", len(filtered))
+
+    bodies = {result.id: result for result in gmail.get_bodies_many(candidates)} if candidates else {}
+    fetched = [
+        bodies.get(msg_id) or failed[msg_id]
+        for msg_id in msg_ids
+        if msg_id in bodies or msg_id in failed
+    ]
+    return fetched, filtered
+
+
+def parse_message(gmail_id: str, msg_json: dict):
+    """
+    Decode and parse one Gmail message.
+
+    Returns ``(outcome, payment)`` where payment is the parsed Payment (with
+    its Gmail-anchored transaction_id and formatted_message) or None.
+    """
+    started = time.perf_counter()
+    body = _decode_email_body(msg_json)
+    empty = not body.strip()
+    DECODE_SECONDS.observe(time.perf_counter() - started, outcome=OUTCOME_EMPTY if empty else "ok")
+    if empty:
+        return OUTCOME_EMPTY, None
+
+    # Route to the best-matching parser only
+    started = time.perf_counter()
+    parser = CLASSIFIER.classify(body)
+    parsed = parser.extract(body) if parser else None
+    PARSE_SECONDS.observe(
+        time.perf_counter() - started,
+        provider=parser.provider if parser else "none",
+        outcome=OUTCOME_PAYMENT if parsed else OUTCOME_NO_MATCH,
+    )
+    return _finish_payment(gmail_id, msg_json, parsed)
+
+
+def _finish_payment(gmail_id: str, msg_json: dict, parsed):
+    """Attach identity and the Slack text to a parsed Payment (or report no match)."""
+    if not parsed:
+        return OUTCOME_NO_MATCH, None
+
+    # Alerts without a readable date fall back to Gmail's receive time, and
+    # for providers that ask for it, to the import time as a last resort
+    ts_epoch = parsed.ts_epoch
+    if ts_epoch is None and msg_json.get("internalDate"):
+        ts_epoch = int(msg_json["internalDate"]) // 1000
+    elif ts_epoch is None and parsed.provider in STAMP_UNDATED:
+        ts_epoch = int(time.time())
+
+    # Payment identity is anchored on the Gmail message id, which is
+    # stable across polls (parsed timestamps may not be).
+    payment = parsed.with_fields(
+        ts_epoch=ts_epoch,
+        transaction_id=f"{gmail_id}-{parsed.provider}",
+        gmail_id=gmail_id,
+    )
+    return OUTCOME_PAYMENT, payment.with_fields(formatted_message=MessageFormatter.format(payment))
+
+
+def _parse_with_executor(messages, executor):
+    """
+    Decode here, classify + parse on the ParseExecutor's worker processes.
+
+    Yields ``(gmail_id, outcome, payment)`` in input order.
+    """
+    bodies = []
+    for gmail_id, msg_json in messages:
+        started = time.perf_counter()
         body = _decode_email_body(msg_json)
+        empty = not body.strip()
+        DECODE_SECONDS.observe(
+            time.perf_counter() - started, outcome=OUTCOME_EMPTY if empty else "ok"
+        )
+        bodies.append(None if empty else body)
 
-        if not body.strip():
+    parsed_iter = executor.parse(body for body in bodies if body is not None)
+    for (gmail_id, msg_json), body in zip(messages, bodies):
+        if body is None:
+            yield gmail_id, OUTCOME_EMPTY, None
             continue
+        outcome, payment = _finish_payment(gmail_id, msg_json, next(parsed_iter))
+        yield gmail_id, outcome, payment
 
-        # Feed into each parser
-        for parser in PARSERS:
-            parsed = parser.parse(body)
-            if not parsed:
-                continue
 
-            # Each provider must assign a transaction_id
-            transaction_id = f"{parsed['provider']}-{parsed['sender']}-{parsed['amount']}-{parsed['timestamp']}"
+def has_transient_failures(fetched_results) -> bool:
+    """True when a fetch failed in a way the next poll may not repeat."""
+    return any(
+        result.error is not None and not is_permanent_error(result.error)
+        for result in fetched_results
+    )
 
-            # Dedupe against DB
-            cursor.execute(
-                "SELECT COUNT(*) FROM payments WHERE transaction_id = ?",
-                (transaction_id,),
-            )
-            if cursor.fetchone()[0] > 0:
-                continue
-
-            # Format message EXACTLY as original PostPay4 did
-            formatted = (
-                f"*{parsed['provider']} Payment Received*\n"
-                f"From: {parsed['sender']}\n"
-                f"Amount: {parsed['amount']}\n"
-                f"Time: {parsed['timestamp']}"
+
+def parse_fetched(fetched_results, filtered_ids=(), executor=None):
+    """
+    Parse a list of GmailClient.get_many() results.
+
+    Returns ``(processed, payments, fetch_failed)``: ledger entries for every
+    downloaded message (and for ``filtered_ids``, rejected on headers), the
+    parsed payments, and whether any fetch failed transiently (those
+    messages are left out of the ledger so they are retried). Permanent
+    failures, such as a 404 for a message deleted since it was listed, are
+    recorded as OUTCOME_UNAVAILABLE so they never hold back the cursor.
+
+    With a parsers.executor.ParseExecutor, classification and parsing run
+    on its worker processes (bodies are still decoded here).
+    """
+    processed = [(gmail_id, OUTCOME_FILTERED) for gmail_id in filtered_ids]
+    payments = []
+    fetch_failed = False
+
+    messages = []
+    for fetched in fetched_results:
+        if fetched.error is not None:
+            if is_permanent_error(fetched.error):
+                processed.append((fetched.id, OUTCOME_UNAVAILABLE))
+            else:
+                fetch_failed = True
+            continue
+        messages.append((fetched.id, fetched.message))
+
+    if executor is not None:
+        results = _parse_with_executor(messages, executor)
+    else:
+        results = ((gmail_id, *parse_message(gmail_id, msg)) for gmail_id, msg in messages)
+
+    for gmail_id, outcome, parsed in results:
+        processed.append((gmail_id, outcome))
+        if parsed:
+            payments.append(parsed)
+
+    return processed, payments, fetch_failed
+
+
+def _existing_transaction_ids(conn, transaction_ids) -> set:
+    """Bulk-check which transaction ids are already stored."""
+    existing = set()
+    ids = list(transaction_ids)
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT transaction_id FROM payments WHERE transaction_id IN ({placeholders})",
+            chunk,
+        )
+        existing.update(row[0] for row in rows)
+    return existing
+
+
+_INSERT_PAYMENT = """
+    INSERT INTO payments (
+        transaction_id,
+        provider,
+        sender,
+        amount,
+        amount_cents,
+        timestamp,
+        ts_epoch,
+        formatted_message
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(transaction_id) DO NOTHING
+"""
+
+
+def _insert_payments(conn, payments) -> int:
+    """executemany the payments; returns how many rows were actually inserted."""
+    cursor = conn.executemany(
+        _INSERT_PAYMENT,
+        [
+            (
+                p.transaction_id,
+                p.provider,
+                p.sender,
+                p.amount,
+                p.amount_cents,
+                p.timestamp.isoformat(sep=" ") if p.ts_epoch is not None else None,
+                p.ts_epoch,
+                p.formatted_message,
             )
+            for p in payments
+        ],
+    )
+    return cursor.rowcount
+
+
+def persist_payments(
+    conn,
+    payments,
+    processed,
+    new_history_id=None,
+    notify=True,
+    mailbox=DEFAULT_MAILBOX,
+    dedupe=None,
+    router=None,
+):
+    """
+    Write one poll's results in a single transaction:
+    - payments via executemany + INSERT ... ON CONFLICT DO NOTHING
+    - one outbox notification per new payment (unless ``notify`` is False)
+    - ledger outcomes for every handled message
+    - the advanced Gmail cursor of ``mailbox``, when given
+
+    ``processed`` is a list of ``(gmail_id, outcome)`` and is updated in
+    place for payments that turn out to be duplicates.
+
+    ``dedupe`` is an optional db.dedupe.DedupeIndex answering the duplicate
+    check from memory; without it every transaction id is looked up in SQLite.
+
+    ``router`` is an optional services.notifications.routing.SlackRouter
+    choosing each notification's channel; without it every notification
+    goes to the default channel.
+
+    ``payments`` are Payment records. Returns the ones that were actually new.
+    """
+    transaction_ids = [p.transaction_id for p in payments]
+
+    with track(DB_SECONDS, operation="persist"), conn:
+        if dedupe is not None:
+            existing = dedupe.existing(conn, transaction_ids)
+        else:
+            existing = _existing_transaction_ids(conn, transaction_ids)
+        new_payments = [p for p in payments if p.transaction_id not in existing]
+
+        # The checks above only read, so no transaction is open yet on a
+        # plain connection; without this the savepoint below would be the
+        # outermost one and its RELEASE would commit the payments on their
+        # own, apart from their outbox rows and ledger outcomes.
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
 
-            # Persist
-            cursor.execute(
-                """
-                INSERT INTO payments (
-                    transaction_id,
-                    provider,
-                    sender,
-                    amount,
-                    timestamp,
-                    formatted_message
-                )
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    transaction_id,
-                    parsed["provider"],
-                    parsed["sender"],
-                    parsed["amount"],
-                    parsed["timestamp"],
-                    formatted,
-                ),
+        # The UNIQUE index still guards against a concurrent writer. If it
+        # stored some of these ids since the check above, redo the insert
+        # with an exact lookup (we now hold the write lock) so no duplicate
+        # notification is queued.
+        conn.execute("SAVEPOINT persist_payments")
+        if _insert_payments(conn, new_payments) != len(new_payments):
+            conn.execute("ROLLBACK TO persist_payments")
+            existing = _existing_transaction_ids(conn, transaction_ids)
+            new_payments = [p for p in payments if p.transaction_id not in existing]
+            _insert_payments(conn, new_payments)
+        conn.execute("RELEASE persist_payments")
+
+        if existing:
+            duplicate_ids = {p.gmail_id for p in payments if p.transaction_id in existing}
+            processed[:] = [
+                (gmail_id, OUTCOME_DUPLICATE if gmail_id in duplicate_ids else outcome)
+                for gmail_id, outcome in processed
+            ]
+
+        if notify:
+            outbox.enqueue(
+                conn,
+                [
+                    (
+                        p.transaction_id,
+                        p.formatted_message,
+                        router.channel_for(p, mailbox) if router is not None else None,
+                    )
+                    for p in new_payments
+                ],
             )
-            conn.commit()
+        mark_processed(conn, processed)
+
+        if new_history_id:
+            set_history_id(conn, new_history_id, mailbox)
+
+    # Every id in this batch is stored once the transaction commits; inside
+    # a Database write batch that is only after the batch's COMMIT
+    if dedupe is not None:
+        after_commit(conn, partial(dedupe.add, transaction_ids))
+
+    if new_payments:
+        DB_ROWS.inc(len(new_payments), operation="insert", outcome="inserted")
+    if existing:
+        DB_ROWS.inc(len(payments) - len(new_payments), operation="insert", outcome="duplicate")
+    for payment in new_payments:
+        PAYMENTS.inc(provider=payment.provider)
+
+    return new_payments
+
+
+def fetch_and_persist_new_payments(conn, gmail=None, dedupe=None, router=None):
+    """
+    Full ingestion pipeline:
+    - Pull new emails from Gmail (incremental via historyId when enabled)
+    - Fetch headers first; download bodies only for likely payments
+    - Extract and decode bodies
+    - Route each body to its best-matching parser
+    - Persist new payments (deduped) in one transaction
+    - Advance the Gmail sync cursor
+    - Queue a Slack notification per new payment in the outbox
+    - Return the list of new Payment records
+
+    ``conn`` is a SQLite connection, or a db.access.Database whose reader
+    pool serves the lookups and whose writer thread runs the persist step.
+    """
+    config = load_config()
+    if gmail is None:
+        gmail = build_gmail_client(config)
+
+    messages, new_history_id = _list_messages(
+        gmail, conn, config["GMAIL_INCREMENTAL_SYNC"]
+    )
+
+    if not messages:
+        logger.info("No Gmail messages to process.")
+        run_write(conn, persist_payments, [], [], new_history_id)
+        return []
+
+    # Skip everything already in the ledger before downloading anything
+    new_ids = run_read(conn, filter_unprocessed, [msg["id"] for msg in messages])
+    if len(new_ids) < len(messages):
+        logger.info("Skipping %d already-processed messages.", len(messages) - len(new_ids))
 
-            parsed["formatted_message"] = formatted
-            parsed["transaction_id"] = transaction_id
+    # One batched round trip per 100 messages instead of one per message
+    fetched, filtered = fetch_candidates(gmail, new_ids, config["GMAIL_HEADER_PREFILTER"])
+    processed, payments, fetch_failed = parse_fetched(fetched, filtered)
 
-            results.append(parsed)
+    # Only move the cursor once every listed message has been handled, so a
+    # crash or failed fetch replays the same window instead of skipping it.
+    results = run_write(
+        conn,
+        persist_payments,
+        payments,
+        processed,
+        new_history_id if not fetch_failed else None,
+        dedupe=dedupe,
+        router=router,
+    )
 
     logger.info("Imported %d new payments.", len(results))
     return results
@@ -0,0 +1,214 @@
+"""
+Multi-Mailbox Ingestion
+-----------------------
+Syncs several Gmail inboxes in parallel from one PostPay process.
+
+Each mailbox has its own OAuth token, search query and historyId cursor
+(keyed by mailbox name in sync_state). Gmail I/O, header filtering and
+parsing run on a thread pool, one task per mailbox at a time. The calling
+thread performs the ledger lookups and the per-mailbox persist transactions
+as worker results arrive, so workers never contend for the database lock;
+given a db.access.Database, those go through its reader pool and writer
+thread instead of a connection owned by the calling thread.
+
+Mailboxes are listed in a JSON file named by MAILBOXES_FILE:
+
+    [
+      {"name": "shop", "token_path": "credentials/shop-token.json",
+       "credentials_path": "credentials/credentials.json",
+       "query": "newer_than:1d"},
+      ...
+    ]
+"""
+
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from postpay.db.access import run_read, run_write
+from postpay.db.ledger import filter_unprocessed
+from postpay.db.sync_state import DEFAULT_MAILBOX, get_history_id
+from postpay.models import Payment
+from postpay.services.email.gmail_client import GmailClient
+from postpay.services.payments.importer import (
+    fetch_candidates,
+    parse_fetched,
+    persist_payments,
+)
+from postpay.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_LIST = "list"
+_FETCH = "fetch"
+
+
+class Mailbox(NamedTuple):
+    """One inbox to sync."""
+
+    name: str
+    token_path: str
+    credentials_path: str
+    query: str
+
+
+def load_mailboxes(config: dict) -> List[Mailbox]:
+    """
+    Return the configured mailboxes.
+
+    Without MAILBOXES_FILE this is the single default mailbox built from
+    TOKEN_PATH / CREDENTIALS_PATH / GMAIL_SEARCH_QUERY, so its cursor stays
+    compatible with single-mailbox deployments.
+    """
+    if not config["MAILBOXES_FILE"]:
+        return [
+            Mailbox(
+                DEFAULT_MAILBOX,
+                config["TOKEN_PATH"],
+                config["CREDENTIALS_PATH"],
+                config["GMAIL_SEARCH_QUERY"],
+            )
+        ]
+
+    with open(config["MAILBOXES_FILE"], "r", encoding="utf-8") as fh:
+        entries = json.load(fh)
+
+    mailboxes = []
+    for entry in entries:
+        mailboxes.append(
+            Mailbox(
+                name=entry["name"],
+                token_path=entry["token_path"],
+                credentials_path=entry.get("credentials_path", config["CREDENTIALS_PATH"]),
+                query=entry.get("query", config["GMAIL_SEARCH_QUERY"]),
+            )
+        )
+
+    names = [mailbox.name for mailbox in mailboxes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Mailbox names must be unique: {names}")
+
+    return mailboxes
+
+
+def build_mailbox_client(mailbox: Mailbox) -> GmailClient:
+    """Construct the GmailClient for one mailbox."""
+    return GmailClient(
+        token_path=mailbox.token_path,
+        credentials_path=mailbox.credentials_path,
+        query=mailbox.query,
+    )
+
+
+class MailboxPool:
+    """
+    Polls every mailbox concurrently and persists from the calling thread.
+
+    A mailbox whose listing or fetch fails is logged and skipped for this
+    poll without holding back the others; its cursor is left untouched.
+    """
+
+    def __init__(
+        self,
+        conn,
+        mailboxes: List[Mailbox],
+        client_factory: Callable[[Mailbox], object] = build_mailbox_client,
+        max_workers: int = 4,
+        incremental: bool = True,
+        prefilter: bool = True,
+        dedupe=None,
+        router=None,
+    ):
+        self.conn = conn
+        self.mailboxes = list(mailboxes)
+        self.incremental = incremental
+        self.prefilter = prefilter
+        self.dedupe = dedupe
+        self.router = router
+        self.clients: Dict[str, object] = {
+            mailbox.name: client_factory(mailbox) for mailbox in self.mailboxes
+        }
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(self.mailboxes))),
+            thread_name_prefix="postpay-mailbox",
+        )
+
+    @classmethod
+    def from_config(cls, conn, config: dict, **kwargs) -> "MailboxPool":
+        """Build a pool for the mailboxes and settings in ``config``."""
+        return cls(
+            conn,
+            load_mailboxes(config),
+            max_workers=config["MAILBOX_WORKERS"],
+            incremental=config["GMAIL_INCREMENTAL_SYNC"],
+            prefilter=config["GMAIL_HEADER_PREFILTER"],
+            **kwargs,
+        )
+
+    def _list(self, name: str, history_id: Optional[str]):
+        gmail = self.clients[name]
+        if not self.incremental:
+            return gmail.list_messages(), None
+        return gmail.sync_messages(history_id)
+
+    def _fetch(self, name: str, msg_ids: List[str], new_history_id: Optional[str]):
+        fetched, filtered = fetch_candidates(self.clients[name], msg_ids, self.prefilter)
+        processed, payments, fetch_failed = parse_fetched(fetched, filtered)
+        return processed, payments, None if fetch_failed else new_history_id
+
+    def poll_once(self) -> List[Payment]:
+        """
+        Run one sync of every mailbox and return the new payments.
+
+        Each mailbox moves through list -> (writer: ledger filter) ->
+        fetch + parse -> (writer: persist); mailboxes overlap freely, and
+        only the writer steps touch the database.
+        """
+        pending = {}
+        for mailbox in self.mailboxes:
+            cursor = (
+                run_read(self.conn, get_history_id, mailbox.name) if self.incremental else None
+            )
+            future = self._pool.submit(self._list, mailbox.name, cursor)
+            pending[future] = (_LIST, mailbox.name)
+
+        new_payments: List[Payment] = []
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    logger.error("Mailbox '%s' %s failed: %s", name, stage, exc)
+                    continue
+
+                if stage == _LIST:
+                    messages, new_history_id = result
+                    new_ids = run_read(
+                        self.conn, filter_unprocessed, [msg["id"] for msg in messages]
+                    )
+                    future = self._pool.submit(self._fetch, name, new_ids, new_history_id)
+                    pending[future] = (_FETCH, name)
+                    continue
+
+                processed, payments, new_history_id = result
+                imported = run_write(
+                    self.conn,
+                    persist_payments,
+                    payments,
+                    processed,
+                    new_history_id,
+                    mailbox=name,
+                    dedupe=self.dedupe,
+                    router=self.router,
+                )
+                if imported:
+                    logger.info("Imported %d new payments from '%s'.", len(imported), name)
+                new_payments.extend(payment.with_fields(mailbox=name) for payment in imported)
+
+        return new_payments
+
+    def close(self) -> None:
+        """Shut down the worker threads."""
+        self._pool.shutdown(wait=True)
@@ -3,21 +3,172 @@ Scheduler
 ---------
 Enforces the PostPay sleep window and manages timing behavior
 for the main polling loop.
+
+The Scheduler computes the exact next wake-up time and sleeps once:
+
+- Quiet hours: a wake-up that would land inside the sleep window is moved
+  to the window's end, so the loop sleeps through the night in one wait.
+- Adaptive interval: idle polls stretch the interval by ``backoff_factor``
+  up to ``max_interval``; a poll that finds payments tightens it back to
+  ``min_interval``.
+- Jitter: each wait is randomized by ±``jitter`` so several instances do
+  not poll Gmail in lockstep.
+- Early wake-up: a wake event (e.g. the push-ingress SyncTrigger) ends the
+  wait as soon as it fires. With push enabled the timer is only a safety
+  net, so from_config() never tightens it below PUSH_SAFETY_POLL_SECONDS.
 """
 
+import random
 import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
 
-from postpay.services.scheduling.sleep_window import is_sleep_window
+from postpay.services.scheduling.sleep_window import (
+    is_sleep_window,
+    seconds_until_window_ends,
+    sleep_window_end,
+)
 from postpay.utils.logging_utils import setup_logger
 
 logger = setup_logger(__name__)
 
 
+class Scheduler:
+    """
+    Adaptive poll scheduler with exact wake-ups.
+    """
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff_factor: float = 1.5,
+        jitter: float = 0.1,
+        enable_sleep: bool = True,
+        wake_event=None,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        self.min_interval = min(min_interval or base_interval, base_interval)
+        self.max_interval = max(max_interval or base_interval, base_interval)
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.enable_sleep = enable_sleep
+        self.wake_event = wake_event
+        self.clock = clock
+
+        self.interval = float(base_interval)
+
+    @classmethod
+    def from_config(cls, config: dict, base_interval: Optional[float] = None, wake_event=None):
+        """Build a Scheduler from load_config() values."""
+        base = config["POLL_INTERVAL_SECONDS"] if base_interval is None else base_interval
+        # Push delivers the wake-ups; new payments must not tighten the
+        # safety-net timer back to POLL_MIN_INTERVAL_SECONDS
+        if config.get("PUSH_INGRESS_PORT"):
+            min_interval = config["PUSH_SAFETY_POLL_SECONDS"]
+        else:
+            min_interval = config["POLL_MIN_INTERVAL_SECONDS"]
+        return cls(
+            base_interval=base,
+            min_interval=min_interval,
+            max_interval=config["POLL_MAX_INTERVAL_SECONDS"],
+            backoff_factor=config["POLL_BACKOFF_FACTOR"],
+            jitter=config["POLL_JITTER"],
+            enable_sleep=config["ENABLE_SLEEP_MODE"],
+            wake_event=wake_event,
+        )
+
+    def record_poll(self, new_items: int) -> None:
+        """Adapt the interval to the outcome of the last poll."""
+        if new_items:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff_factor)
+
+    def _jittered(self, seconds: float) -> float:
+        if not self.jitter:
+            return seconds
+        return max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def next_wake(self, now: Optional[datetime] = None) -> datetime:
+        """
+        Exact time of the next poll: one jittered interval from ``now``,
+        pushed to the end of the quiet window if it would fall inside it.
+        """
+        now = now or self.clock()
+        wake = now + timedelta(seconds=self._jittered(self.interval))
+        if self.enable_sleep and is_sleep_window(wake):
+            wake = sleep_window_end(wake)
+        return wake
+
+    def _wait(self, seconds: float) -> bool:
+        """Sleep up to ``seconds``; True if the wake event fired first."""
+        if seconds <= 0:
+            return False
+        if self.wake_event is None:
+            time.sleep(seconds)
+            return False
+
+        woke = self.wake_event.wait(seconds)
+        if woke and hasattr(self.wake_event, "clear"):
+            self.wake_event.clear()
+        return bool(woke)
+
+    def wait_until(self, wake: datetime, max_seconds: Optional[float] = None) -> bool:
+        """
+        Block until ``wake``, or for at most ``max_seconds`` when given.
+        Returns True when ended early by the wake event. Early wake-ups
+        during quiet hours are ignored.
+        """
+        stop = wake
+        if max_seconds is not None:
+            stop = min(wake, self.clock() + timedelta(seconds=max_seconds))
+
+        seconds = (stop - self.clock()).total_seconds()
+        while seconds > 0:
+            if self._wait(seconds):
+                if not (self.enable_sleep and is_sleep_window(self.clock())):
+                    return True
+            seconds = (stop - self.clock()).total_seconds()
+        return False
+
+    def wait(self) -> bool:
+        """
+        Block until the next poll is due. Returns True when ended early by
+        the wake event. Early wake-ups during quiet hours are ignored.
+        """
+        now = self.clock()
+        wake = self.next_wake(now)
+
+        if (wake - now).total_seconds() >= 3600:
+            logger.info("Next poll at %s.", wake.strftime("%Y-%m-%d %H:%M"))
+
+        return self.wait_until(wake)
+
+    def wait_out_quiet_window(self) -> None:
+        """If inside the quiet window, sleep exactly until it ends."""
+        if self.enable_sleep:
+            seconds = seconds_until_window_ends(self.clock())
+            if seconds > 0:
+                logger.info("Sleep window active — pausing processing for %.0f seconds.", seconds)
+                time.sleep(seconds)
+
+    def wake(self) -> None:
+        """Wake a waiting scheduler early."""
+        if self.wake_event is None:
+            return
+        if hasattr(self.wake_event, "notify"):
+            self.wake_event.notify()
+        else:
+            self.wake_event.set()
+
+
 def maybe_sleep_until_window_ends(enable_sleep: bool) -> None:
     """
     If sleep mode is enabled, pauses execution until the nightly
-    restricted window has ended (00:00–09:00). Uses a 60-second
-    polling interval while waiting.
+    restricted window has ended (00:00–09:00) with a single sleep up to
+    the exact end of the window.
 
     Parameters
     ----------
@@ -27,6 +178,7 @@ def maybe_sleep_until_window_ends(enable_sleep: bool) -> None:
     if not enable_sleep:
         return
 
-    while is_sleep_window():
-        logger.info("Sleep window active — pausing processing for 60 seconds.")
-        time.sleep(60)
+    seconds = seconds_until_window_ends()
+    if seconds > 0:
+        logger.info("Sleep window active — pausing processing for %.0f seconds.", seconds)
+        time.sleep(seconds)
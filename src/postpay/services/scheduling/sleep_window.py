@@ -4,9 +4,31 @@ Sleep Window Utility
 Defines the quiet hours when the system should not process payments.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 
+SLEEP_START_HOUR = 0  # Midnight
+SLEEP_END_HOUR = 9    # 9am
 
-def is_sleep_window():
-    now = datetime.now().hour
-    return 0 <= now < 9  # Midnight → 9am
+
+def is_sleep_window(now: Optional[datetime] = None):
+    now = (now or datetime.now()).hour
+    return SLEEP_START_HOUR <= now < SLEEP_END_HOUR  # Midnight → 9am
+
+
+def sleep_window_end(now: Optional[datetime] = None) -> datetime:
+    """
+    Return the next moment the quiet window ends (today or tomorrow at
+    SLEEP_END_HOUR:00).
+    """
+    now = now or datetime.now()
+    end = now.replace(hour=SLEEP_END_HOUR, minute=0, second=0, microsecond=0)
+    return end if end > now else end + timedelta(days=1)
+
+
+def seconds_until_window_ends(now: Optional[datetime] = None) -> float:
+    """Seconds left in the current quiet window; 0 outside of it."""
+    now = now or datetime.now()
+    if not is_sleep_window(now):
+        return 0.0
+    return (sleep_window_end(now) - now).total_seconds()
@@ -3,6 +3,7 @@ Utility Modules for PostPay.
 """
 
 from .logging_utils import setup_logger
-from .sleep_window import is_sleep_window
+from .metrics import REGISTRY, MetricsServer, start_metrics
+from postpay.services.scheduling.sleep_window import is_sleep_window
 
-__all__ = ["setup_logger", "is_sleep_window"]
+__all__ = ["setup_logger", "is_sleep_window", "REGISTRY", "MetricsServer", "start_metrics"]
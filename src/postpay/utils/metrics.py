@@ -0,0 +1,391 @@
+"""
+Metrics
+-------
+In-process counters and latency histograms for each pipeline stage, with
+two optional exporters:
+
+- a local HTTP endpoint serving ``/metrics`` (Prometheus text format) and
+  ``/metrics.json``
+- a periodic JSON snapshot file
+
+Instrumented code records into the module-level metrics below; nothing is
+exported unless METRICS_PORT or METRICS_SNAPSHOT_PATH is configured.
+
+    with track(PARSE_SECONDS, provider="Zelle") as result:
+        payment = parser.extract(body)
+        result["outcome"] = "payment" if payment else "no_match"
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from postpay.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Seconds; spans a regex call (~10us) up to a slow Gmail batch (~10s)
+DEFAULT_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005,
+    0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            return [
+                {"labels": dict(zip(self.labelnames, key)), "value": value}
+                for key, value in sorted(self._values.items())
+            ]
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(sample['labels'].items())} {sample['value']}"
+            for sample in self.samples()
+        ]
+
+
+class Histogram(_Metric):
+    """Latency distribution per label set (cumulative buckets, sum, count)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+
+        samples = []
+        for key, (counts, total, count) in items:
+            cumulative, running = [], 0
+            for bucket_count in counts:
+                running += bucket_count
+                cumulative.append(running)
+            samples.append(
+                {
+                    "labels": dict(zip(self.labelnames, key)),
+                    "count": count,
+                    "sum": total,
+                    "buckets": dict(zip([*map(str, self.buckets), "+Inf"], cumulative)),
+                }
+            )
+        return samples
+
+    def render(self) -> List[str]:
+        lines = []
+        for sample in self.samples():
+            pairs = list(sample["labels"].items())
+            for bound, cumulative in sample["buckets"].items():
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {sample['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {sample['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics with Prometheus and JSON renderers."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable view of every metric."""
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "metrics": {
+                metric.name: {"type": metric.kind, "help": metric.help, "samples": metric.samples()}
+                for metric in self._metrics.values()
+            },
+        }
+
+    def clear(self) -> None:
+        """Reset every recorded value (the metric definitions stay)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+GMAIL_REQUEST_SECONDS = REGISTRY.histogram(
+    "postpay_gmail_request_seconds",
+    "Gmail API call latency by call and outcome.",
+    ("call", "outcome"),
+)
+GMAIL_MESSAGES = REGISTRY.counter(
+    "postpay_gmail_messages_total",
+    "Messages fetched through the Gmail batch endpoint by format and outcome.",
+    ("format", "outcome"),
+)
+DECODE_SECONDS = REGISTRY.histogram(
+    "postpay_decode_seconds",
+    "Email body decoding latency by outcome.",
+    ("outcome",),
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "postpay_parse_seconds",
+    "Classification plus field extraction latency by routed provider and outcome.",
+    ("provider", "outcome"),
+)
+DB_SECONDS = REGISTRY.histogram(
+    "postpay_db_seconds",
+    "SQLite operation latency by operation and outcome.",
+    ("operation", "outcome"),
+)
+DB_ROWS = REGISTRY.counter(
+    "postpay_db_rows_total",
+    "Rows handled by dedupe lookups and inserts, by operation and outcome.",
+    ("operation", "outcome"),
+)
+DEDUPE_LOOKUPS = REGISTRY.counter(
+    "postpay_dedupe_lookups_total",
+    "In-memory dedupe index lookups by result "
+    "(recent, bloom_negative, db_hit, false_positive).",
+    ("result",),
+)
+PAYMENTS = REGISTRY.counter(
+    "postpay_payments_total",
+    "New payments persisted, by provider.",
+    ("provider",),
+)
+SLACK_REQUEST_SECONDS = REGISTRY.histogram(
+    "postpay_slack_request_seconds",
+    "Slack Web API attempt latency by endpoint and outcome.",
+    ("endpoint", "outcome"),
+)
+SLACK_THROTTLE_SECONDS = REGISTRY.histogram(
+    "postpay_slack_throttle_seconds",
+    "Time spent waiting on a channel's rate limit before posting.",
+    ("channel",),
+)
+
+
+@contextmanager
+def track(histogram: Histogram, **labels):
+    """
+    Time the block into ``histogram``.
+
+    Yields a dict whose "outcome" (default "ok") may be changed inside the
+    block; an exception records outcome "error" and is re-raised.
+    """
+    result = {"outcome": "ok"}
+    started = time.perf_counter()
+    try:
+        yield result
+    except BaseException:
+        result["outcome"] = "error"
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels, **result)
+
+
+class MetricsServer:
+    """
+    Local HTTP exporter.
+
+    GET /metrics       -> Prometheus text format
+    GET /metrics.json  -> JSON snapshot
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def _handler_class(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body = registry.render_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(registry.snapshot()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics: " + format, *args)
+
+        return Handler
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="postpay-metrics", daemon=True
+        )
+        self._thread.start()
+        logger.info("Metrics endpoint listening on %s:%d", *self.address)
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def write_snapshot(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """Atomically write the registry's JSON snapshot to ``path``."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(registry.snapshot(), fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+class SnapshotWriter:
+    """Background thread writing a JSON snapshot every ``interval`` seconds."""
+
+    def __init__(self, path: str, interval: float = 60.0, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                write_snapshot(self.path, self.registry)
+            except OSError as exc:
+                logger.error("Failed to write metrics snapshot to %s: %s", self.path, exc)
+
+    def start(self) -> "SnapshotWriter":
+        self._thread = threading.Thread(target=self._run, name="postpay-metrics-snapshot", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        write_snapshot(self.path, self.registry)
+
+
+def start_metrics(config: dict) -> None:
+    """Start whichever exporters the configuration enables."""
+    if config["METRICS_PORT"]:
+        MetricsServer(REGISTRY, host=config["METRICS_HOST"], port=config["METRICS_PORT"]).start()
+    if config["METRICS_SNAPSHOT_PATH"]:
+        SnapshotWriter(
+            config["METRICS_SNAPSHOT_PATH"], interval=config["METRICS_SNAPSHOT_SECONDS"]
+        ).start()
@@ -0,0 +1,56 @@
+"""
+Rate Limiting
+-------------
+A thread-safe token bucket for pacing calls to rate-limited APIs.
+
+Tokens refill continuously at ``rate`` per second up to ``capacity``; each
+acquire() takes one, sleeping first when none is left. Concurrent callers
+reserve tokens in arrival order (the balance may go negative), so N waiting
+threads are released one interval apart instead of all at once.
+"""
+
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Args:
+        rate: Tokens added per second (must be > 0)
+        capacity: Most tokens held at once, i.e. the allowed burst
+        clock / sleep: Injectable for tests
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, float(capacity))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token; return how long the caller must wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the seconds waited."""
+        delay = self._reserve()
+        if delay > 0:
+            self._sleep(delay)
+        return delay
@@ -0,0 +1,177 @@
+import asyncio
+import base64
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from postpay import async_main
+from postpay.async_main import AsyncPipeline
+from postpay.services.email.gmail_client import MessageResult
+
+
+def _metadata(text):
+    return {"payload": {"headers": []}, "snippet": text}
+
+
+def _message(text):
+    return {
+        "payload": {
+            "parts": [
+                {
+                    "mimeType": "text/plain",
+                    "body": {"data": base64.urlsafe_b64encode(text.encode()).decode()},
+                }
+            ]
+        }
+    }
+
+
+class FakeGmail:
+    def __init__(self):
+        self.sync_calls = []
+        self.pending = [
+            ([{"id": "m1"}], "101"),
+            ([{"id": "m2"}], "102"),
+        ]
+        self.texts = {
+            "m1": "You received $45.00 from John Doe via Zelle",
+            "m2": "John Smith paid you $27.50 via Venmo",
+        }
+
+    def sync_messages(self, history_id):
+        self.sync_calls.append(history_id)
+        if self.pending:
+            return self.pending.pop(0)
+        return [], history_id
+
+    def get_headers_many(self, ids):
+        return [MessageResult(i, _metadata(self.texts[i]), None) for i in ids]
+
+    def get_bodies_many(self, ids):
+        return [MessageResult(i, _message(self.texts[i]), None) for i in ids]
+
+
+class HistoryGmail(FakeGmail):
+    """Lists by cursor, like history.list, so a rewound cursor re-lists its batch."""
+
+    LISTINGS = {None: (["m1"], "101"), "101": (["m2"], "102")}
+
+    def sync_messages(self, history_id):
+        self.sync_calls.append(history_id)
+        ids, new_history_id = self.LISTINGS.get(history_id, ([], history_id))
+        return [{"id": i} for i in ids], new_history_id
+
+
+class SlowSlack:
+    def __init__(self, delay, gmail=None):
+        self.delay = delay
+        self.gmail = gmail
+        self.posted = []
+        self.fetches_during_post = []
+        self.lock = threading.Lock()
+
+    def post_message(self, text, channel=None):
+        before = len(self.gmail.sync_calls) if self.gmail else 0
+        time.sleep(self.delay)
+        with self.lock:
+            self.posted.append(text)
+            if self.gmail:
+                self.fetches_during_post.append(len(self.gmail.sync_calls) - before)
+        return True
+
+
+class TestAsyncPipeline(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.config = {
+            "DB_PATH": self.db_path,
+            "POLL_INTERVAL_SECONDS": 0.01,
+            "POLL_MIN_INTERVAL_SECONDS": 0.01,
+            "POLL_MAX_INTERVAL_SECONDS": 0.01,
+            "POLL_BACKOFF_FACTOR": 1.5,
+            "POLL_JITTER": 0,
+            "ENABLE_SLEEP_MODE": False,
+            "GMAIL_INCREMENTAL_SYNC": True,
+            "GMAIL_HEADER_PREFILTER": True,
+            "DEDUPE_INDEX": True,
+            "DEDUPE_LRU_SIZE": 100,
+            "DEDUPE_ERROR_RATE": 0.001,
+            "DEDUPE_REBUILD_SECONDS": 3600,
+            "DB_READERS": 2,
+            "DB_WRITE_BATCH_SIZE": 100,
+            "DB_WRITE_BATCH_SECONDS": 0.01,
+            "SLACK_ROUTES_FILE": "",
+        }
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def _run_for(self, pipeline, seconds):
+        async def runner():
+            task = asyncio.create_task(pipeline.run())
+            await asyncio.sleep(seconds)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(runner())
+
+    def test_payments_flow_through_all_stages(self):
+        gmail = FakeGmail()
+        slack = SlowSlack(delay=0)
+
+        self._run_for(AsyncPipeline(self.config, gmail, slack), 0.5)
+
+        self.assertEqual(len(slack.posted), 2)
+        self.assertTrue(slack.posted[0].startswith("*Zelle Payment Received*"))
+        # The in-memory cursor is used for the next listing
+        self.assertEqual(gmail.sync_calls[:3], [None, "101", "102"])
+
+    def test_slow_slack_does_not_block_fetching(self):
+        gmail = FakeGmail()
+        slack = SlowSlack(delay=0.3, gmail=gmail)
+
+        self._run_for(AsyncPipeline(self.config, gmail, slack), 0.5)
+
+        # Fetch kept polling while the first Slack post was still in flight
+        self.assertGreater(slack.fetches_during_post[0], 3)
+
+    def test_failed_batch_is_relisted(self):
+        gmail = HistoryGmail()
+        slack = SlowSlack(delay=0)
+        persist_payments = async_main.persist_payments
+        calls = []
+
+        def persist_once_failing(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("disk I/O error")
+            return persist_payments(*args, **kwargs)
+
+        with patch.object(async_main, "persist_payments", persist_once_failing):
+            self._run_for(AsyncPipeline(self.config, gmail, slack), 0.5)
+
+        # The cursor went back to the committed one (none yet) and m1 came back
+        self.assertEqual(gmail.sync_calls.count(None), 2)
+        self.assertEqual(len(slack.posted), 2)
+
+    def test_idle_polls_stretch_the_interval(self):
+        self.config["POLL_MAX_INTERVAL_SECONDS"] = 0.05
+        pipeline = AsyncPipeline(self.config, FakeGmail(), SlowSlack(delay=0))
+
+        self._run_for(pipeline, 0.5)
+
+        self.assertEqual(pipeline.scheduler.interval, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
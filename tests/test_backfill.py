@@ -0,0 +1,118 @@
+import base64
+import sqlite3
+import unittest
+from datetime import date
+
+from postpay.db import outbox
+from postpay.db.migrate import initialize_schema
+from postpay.services.email.gmail_client import MessageResult
+from postpay.services.payments.backfill import build_backfill_query, run_backfill
+
+
+def _metadata(text):
+    return {"payload": {"headers": []}, "snippet": text}
+
+
+def _message(text):
+    return {
+        "payload": {
+            "parts": [
+                {
+                    "mimeType": "text/plain",
+                    "body": {"data": base64.urlsafe_b64encode(text.encode()).decode()},
+                }
+            ]
+        }
+    }
+
+
+class FakeGmail:
+    """Three pages of two messages; optionally fails while listing page 2."""
+
+    PAGES = {
+        None: ([{"id": "m1"}, {"id": "m2"}], "p2"),
+        "p2": ([{"id": "m3"}, {"id": "m4"}], "p3"),
+        "p3": ([{"id": "m5"}, {"id": "m6"}], None),
+    }
+
+    def __init__(self, fail_on="never"):
+        self.fail_on = fail_on
+        self.clones = 0
+        self.fetched = []
+        self.queries = []
+
+    def iter_message_pages(self, query, page_size=500, page_token=None):
+        self.queries.append(query)
+        while True:
+            if page_token == self.fail_on:
+                raise RuntimeError("Gmail unavailable")
+            messages, page_token = self.PAGES[page_token]
+            yield messages, page_token
+            if not page_token:
+                return
+
+    def clone(self):
+        self.clones += 1
+        return self
+
+    @staticmethod
+    def _text(msg_id):
+        return f"You received ${msg_id[1]}0.00 from Ann Lee via Zelle"
+
+    def get_headers_many(self, ids):
+        return [MessageResult(i, _metadata(self._text(i)), None) for i in ids]
+
+    def get_bodies_many(self, ids):
+        self.fetched.extend(ids)
+        return [MessageResult(i, _message(self._text(i)), None) for i in ids]
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+
+    def test_streams_all_pages_without_slack(self):
+        gmail = FakeGmail()
+
+        totals = run_backfill(self.conn, gmail, date(2024, 1, 1), workers=2)
+
+        self.assertEqual(totals, {"messages": 6, "payments": 6, "failed": 0})
+        self.assertEqual(gmail.queries, ["after:2024/01/01"])
+        self.assertEqual(outbox.pending_count(self.conn), 0)
+
+    def test_resumes_from_checkpoint_after_interruption(self):
+        with self.assertRaises(RuntimeError):
+            run_backfill(self.conn, FakeGmail(fail_on="p3"), date(2024, 1, 1))
+
+        gmail = FakeGmail()
+        totals = run_backfill(self.conn, gmail, date(2024, 1, 1))
+
+        # Only the unfinished page is listed and fetched again
+        self.assertEqual(gmail.fetched, ["m5", "m6"])
+        self.assertEqual(totals["messages"], 6)
+        self.assertEqual(totals["payments"], 6)
+
+        # A completed backfill is not repeated unless restarted
+        gmail = FakeGmail()
+        run_backfill(self.conn, gmail, date(2024, 1, 1))
+        self.assertEqual(gmail.fetched, [])
+
+        run_backfill(self.conn, gmail, date(2024, 1, 1), restart=True)
+        self.assertEqual(gmail.fetched, [])  # ledger skips every download
+
+    def test_notify_queues_outbox_rows(self):
+        run_backfill(self.conn, FakeGmail(), date(2024, 1, 1), notify=True)
+
+        self.assertEqual(outbox.pending_count(self.conn), 6)
+
+    def test_build_backfill_query(self):
+        self.assertEqual(
+            build_backfill_query(date(2024, 3, 5), "from:venmo.com"),
+            "from:venmo.com after:2024/03/05",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Parser benchmark module.
+
+Runs a small corpus by default so it stays fast in the normal test run.
+Set POSTPAY_BENCH_SIZE for a larger corpus, POSTPAY_BENCH_OUTPUT to save the
+JSON report, and POSTPAY_BENCH_BASELINE to fail on throughput regressions
+against an earlier report.
+"""
+
+import json
+import os
+import unittest
+
+from postpay.bench.corpus import iter_corpus, load_templates
+from postpay.bench.parsers import DISPATCH, compare_results, run_parser_bench
+
+BENCH_SIZE = int(os.getenv("POSTPAY_BENCH_SIZE", "2000"))
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+
+    def test_templates_cover_every_sample(self):
+        templates = load_templates()
+
+        self.assertEqual(
+            [t.provider for t in templates],
+            ["Zelle", "Venmo", "Cash App", "Apple Cash", "Other"],
+        )
+        for template in templates:
+            self.assertIn("{name}", template.text)
+            self.assertIn("{amount}", template.text)
+            self.assertIn("{date}", template.text)
+
+    def test_corpus_is_deterministic_and_chunked(self):
+        first = list(iter_corpus(25, seed=7, chunk_size=10))
+        second = list(iter_corpus(25, seed=7, chunk_size=10))
+
+        self.assertEqual([len(chunk) for chunk in first], [10, 10, 5])
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, list(iter_corpus(25, seed=8, chunk_size=10)))
+
+
+class TestParserBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.report = run_parser_bench(size=BENCH_SIZE, chunk_size=500, memory_sample=200)
+
+        output = os.getenv("POSTPAY_BENCH_OUTPUT")
+        if output:
+            with open(output, "w", encoding="utf-8") as fh:
+                json.dump(cls.report, fh, indent=2)
+
+    def test_report_covers_every_parser_and_dispatch(self):
+        results = self.report["results"]
+
+        self.assertEqual(
+            set(results), {"Zelle", "Venmo", "Cash App", "Apple Cash", "Other", DISPATCH}
+        )
+        for entry in results.values():
+            self.assertGreater(entry["emails_per_sec"], 0)
+            self.assertGreater(entry["peak_bytes"], 0)
+        json.dumps(self.report)
+
+    def test_dispatch_routes_every_sample_correctly(self):
+        self.assertEqual(self.report["results"][DISPATCH]["accuracy"], 1.0)
+
+    def test_no_regression_against_baseline(self):
+        baseline_path = os.getenv("POSTPAY_BENCH_BASELINE")
+        if not baseline_path:
+            self.skipTest("POSTPAY_BENCH_BASELINE not set")
+
+        with open(baseline_path, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        self.assertEqual(compare_results(self.report, baseline), [])
+
+
+class TestCompareResults(unittest.TestCase):
+
+    def test_flags_only_drops_beyond_tolerance(self):
+        baseline = {"results": {"Zelle": {"emails_per_sec": 1000}, "Venmo": {"emails_per_sec": 1000}}}
+        current = {"results": {"Zelle": {"emails_per_sec": 700}, "Venmo": {"emails_per_sec": 900}}}
+
+        regressions = compare_results(current, baseline, tolerance=0.2)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("Zelle:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
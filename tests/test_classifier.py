@@ -0,0 +1,52 @@
+import unittest
+
+from postpay.bench.corpus import load_samples
+from postpay.parsers.classifier import ProviderClassifier
+from postpay.parsers.zelle_parser import ZelleParser
+from postpay.parsers.venmo_parser import VenmoParser
+from postpay.parsers.cashapp_parser import CashAppParser
+from postpay.parsers.apple_parser import ApplePayParser
+from postpay.parsers.other_parsers import OtherPaymentParser
+
+
+class TestProviderClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.fallback = OtherPaymentParser()
+        self.parsers = [
+            ApplePayParser(),
+            CashAppParser(),
+            ZelleParser(),
+            VenmoParser(),
+            self.fallback,
+        ]
+        self.classifier = ProviderClassifier(self.parsers, fallback=self.fallback)
+
+    def test_sample_emails_route_to_one_provider(self):
+        samples = load_samples()
+
+        for sample in samples:
+            with self.subTest(provider=sample["provider"]):
+                parser = self.classifier.classify(sample["raw_email_body"])
+                self.assertIsNotNone(parser)
+                self.assertEqual(parser.parse(sample["raw_email_body"])["provider"], sample["provider"])
+
+    def test_generic_phrase_does_not_pick_a_brand(self):
+        """
+        "you received" is shared by several providers and must not make one
+        of them win over the generic fallback.
+        """
+        parser = self.classifier.classify("You received $10.00 for your transaction.")
+        self.assertIs(parser, self.fallback)
+
+    def test_overlapping_keywords_are_all_counted(self):
+        found = self.classifier.matched_keywords("Jane SENT YOU MONEY")
+        self.assertIn("sent you money", found)
+        self.assertIn("sent you", found)
+
+    def test_no_keywords_returns_none(self):
+        self.assertIsNone(self.classifier.classify("Your weekly newsletter is here."))
+
+
+if __name__ == "__main__":
+    unittest.main()
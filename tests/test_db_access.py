@@ -0,0 +1,261 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from postpay.db import outbox
+from postpay.db.access import Database, run_read, run_write
+from postpay.db.dedupe import DedupeIndex
+from postpay.models import Payment
+from postpay.services.notifications.outbox_worker import OutboxWorker
+from postpay.services.payments.importer import persist_payments
+
+
+def _payment(gmail_id):
+    return Payment(
+        provider="Zelle",
+        sender="John Doe",
+        amount_cents=4500,
+        gmail_id=gmail_id,
+        transaction_id=f"{gmail_id}-Zelle",
+        formatted_message=f"*Zelle Payment Received* {gmail_id}",
+    )
+
+
+def _insert_log(conn, value):
+    conn.execute("INSERT INTO logged_payments (formatted_message) VALUES (?)", (value,))
+    return value
+
+
+def _count_logs(conn):
+    return conn.execute("SELECT COUNT(*) FROM logged_payments").fetchone()[0]
+
+
+class _RecordingDatabase(Database):
+    """Records the size of every write batch."""
+
+    def __init__(self, *args, **kwargs):
+        self.batches = []
+        super().__init__(*args, **kwargs)
+
+    def _run_batch(self, conn, ops):
+        self.batches.append(len(ops))
+        super()._run_batch(conn, ops)
+
+
+class _CommitFailingConnection:
+    """Writer connection whose next COMMIT fails, e.g. on a full disk."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            raise sqlite3.OperationalError("database or disk is full")
+        return self._conn.execute(sql, *args)
+
+
+class _CommitFailingDatabase(Database):
+    """Fails the commit of every batch while ``failing`` is set."""
+
+    failing = False
+
+    def _run_batch(self, conn, ops):
+        super()._run_batch(_CommitFailingConnection(conn) if self.failing else conn, ops)
+
+
+class TestDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "payments.db")
+
+    def _open(self, cls=Database, **kwargs):
+        db = cls(self.db_path, **kwargs)
+        self.addCleanup(db.close)
+        return db
+
+    def test_write_commits_before_returning(self):
+        db = self._open()
+
+        self.assertEqual(db.write(_insert_log, "a"), "a")
+
+        with db.reader() as conn:
+            self.assertEqual(_count_logs(conn), 1)
+
+    def test_queued_writes_share_a_transaction(self):
+        db = self._open(_RecordingDatabase, batch_size=50, batch_seconds=0.2)
+        gate = threading.Event()
+
+        # Hold the writer so the following writes queue up behind it
+        blocker = db.submit(lambda conn: gate.wait(5))
+        futures = [db.submit(_insert_log, f"m{i}") for i in range(20)]
+        gate.set()
+
+        self.assertTrue(blocker.result())
+        self.assertEqual([f.result() for f in futures], [f"m{i}" for i in range(20)])
+        self.assertLessEqual(len(db.batches), 2)
+        self.assertEqual(db.read(_count_logs), 20)
+
+    def test_batch_size_caps_a_transaction(self):
+        db = self._open(_RecordingDatabase, batch_size=5, batch_seconds=0.2)
+        gate = threading.Event()
+        db.submit(lambda conn: gate.wait(5))
+        futures = [db.submit(_insert_log, f"m{i}") for i in range(12)]
+        gate.set()
+
+        for future in futures:
+            future.result()
+        self.assertTrue(all(size <= 5 for size in db.batches))
+
+    def test_failed_operation_rolls_back_alone(self):
+        db = self._open(batch_seconds=0.2)
+
+        def half_then_fail(conn):
+            _insert_log(conn, "partial")
+            raise ValueError("bad row")
+
+        ok_before = db.submit(_insert_log, "before")
+        failing = db.submit(half_then_fail)
+        ok_after = db.submit(_insert_log, "after")
+
+        with self.assertRaises(ValueError):
+            failing.result()
+        self.assertEqual((ok_before.result(), ok_after.result()), ("before", "after"))
+        with db.reader() as conn:
+            rows = [r[0] for r in conn.execute("SELECT formatted_message FROM logged_payments")]
+        self.assertEqual(sorted(rows), ["after", "before"])
+
+    def test_helpers_transaction_blocks_fold_into_the_batch(self):
+        db = self._open()
+
+        # persist_payments uses `with conn:` and its own savepoint
+        new = db.write(persist_payments, [_payment("a")], [("a", "payment")])
+
+        self.assertEqual([p.gmail_id for p in new], ["a"])
+        self.assertEqual(db.read(outbox.pending_count), 1)
+
+    def test_concurrent_writers_and_readers(self):
+        db = self._open(readers=2)
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(25):
+                    db.write(_insert_log, f"w{n}-{i}")
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        def reader():
+            try:
+                for _ in range(25):
+                    db.read(_count_logs)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+        threads += [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(db.read(_count_logs), 150)
+
+    def test_readers_are_read_only_and_reused(self):
+        db = self._open(readers=1)
+
+        with db.reader() as first:
+            with self.assertRaises(sqlite3.OperationalError):
+                first.execute("DELETE FROM logged_payments")
+        with db.reader() as second:
+            self.assertIs(second, first)
+
+    def test_close_commits_queued_writes(self):
+        db = Database(self.db_path)
+        futures = [db.submit(_insert_log, f"m{i}") for i in range(10)]
+        db.close()
+
+        self.assertTrue(all(f.done() for f in futures))
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        self.assertEqual(_count_logs(conn), 10)
+        with self.assertRaises(RuntimeError):
+            db.submit(_insert_log, "late")
+
+    def test_run_helpers_accept_plain_connections(self):
+        db = self._open()
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+
+        run_write(db, _insert_log, "via-db")
+        with conn:
+            run_write(conn, _insert_log, "via-conn")
+
+        self.assertEqual(run_read(db, _count_logs), 2)
+        self.assertEqual(run_read(conn, _count_logs), 2)
+
+
+class TestSharedDatabaseConsumers(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db = Database(os.path.join(tmp.name, "payments.db"))
+        self.addCleanup(self.db.close)
+
+    def test_outbox_worker_drains_through_database(self):
+        self.db.write(persist_payments, [_payment("a"), _payment("b")], [])
+        slack = MagicMock()
+        slack.post_message.side_effect = [True, False]
+        worker = OutboxWorker(self.db, slack, backoff_base=60)
+
+        self.assertEqual(worker.drain_once(self.db), 1)
+        self.assertEqual(self.db.read(outbox.pending_count), 1)
+        # The failed row was rescheduled, so nothing is due right now
+        self.assertEqual(worker.drain_once(self.db), 0)
+
+    def test_persist_with_dedupe_index_on_writer(self):
+        dedupe = self.db.read(
+            DedupeIndex.from_config,
+            {
+                "DEDUPE_INDEX": True,
+                "DEDUPE_LRU_SIZE": 10,
+                "DEDUPE_ERROR_RATE": 0.01,
+                "DEDUPE_REBUILD_SECONDS": 0,
+            },
+        )
+
+        first = self.db.write(persist_payments, [_payment("a")], [], dedupe=dedupe)
+        second = self.db.write(persist_payments, [_payment("a")], [], dedupe=dedupe)
+
+        self.assertEqual((len(first), len(second)), (1, 0))
+
+    def test_dedupe_index_only_learns_committed_ids(self):
+        self.db.close()
+        db = _CommitFailingDatabase(self.db.db_path)
+        self.addCleanup(db.close)
+        dedupe = DedupeIndex(min_capacity=100)
+        db.read(dedupe.rebuild)
+
+        db.failing = True
+        with self.assertRaises(sqlite3.OperationalError):
+            db.write(persist_payments, [_payment("a")], [], dedupe=dedupe)
+        self.assertEqual(dedupe.stats()["recent_items"], 0)
+
+        # The retry stores the payment instead of calling it a duplicate
+        db.failing = False
+        new = db.write(persist_payments, [_payment("a")], [], dedupe=dedupe)
+        self.assertEqual([p.gmail_id for p in new], ["a"])
+        self.assertEqual(db.read(outbox.pending_count), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import unittest
+import sqlite3
+from unittest.mock import patch
+
+from postpay.db.dedupe import BloomFilter, DedupeIndex
+from postpay.db.migrate import initialize_schema
+from postpay.models import Payment
+from postpay.services.payments.importer import persist_payments
+
+
+def _payment(transaction_id):
+    return Payment(
+        provider="Zelle",
+        sender="Ann",
+        amount_cents=500,
+        transaction_id=transaction_id,
+        gmail_id=transaction_id,
+        formatted_message=f"msg {transaction_id}",
+    )
+
+
+class _CountingConnection:
+    """Wraps a connection and records every SQL statement executed."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.statements = []
+
+    def execute(self, sql, *args):
+        self.statements.append(" ".join(sql.split()))
+        return self._conn.execute(sql, *args)
+
+    def lookups(self):
+        return [s for s in self.statements if "WHERE transaction_id IN" in s]
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"tx{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate_near_target(self):
+        bloom = BloomFilter(5000, 0.01)
+        for i in range(5000):
+            bloom.add(f"stored{i}")
+
+        hits = sum(1 for i in range(20000) if f"absent{i}" in bloom)
+
+        self.assertLess(hits / 20000, 0.03)
+        self.assertAlmostEqual(bloom.expected_error_rate, 0.01, delta=0.005)
+
+
+class TestDedupeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+        persist_payments(self.conn, [_payment(f"old{i}") for i in range(50)], [])
+
+    def test_rebuild_loads_stored_ids(self):
+        index = DedupeIndex(min_capacity=100)
+        index.rebuild(self.conn)
+
+        self.assertEqual(index.stats()["bloom_items"], 50)
+        self.assertEqual(index.existing(self.conn, ["old3", "new1"]), {"old3"})
+
+    def test_new_ids_skip_the_database(self):
+        index = DedupeIndex(min_capacity=100)
+        index.rebuild(self.conn)
+        counting = _CountingConnection(self.conn)
+
+        existing = index.existing(counting, [f"new{i}" for i in range(200)])
+
+        self.assertEqual(existing, set())
+        stats = index.stats()
+        self.assertEqual(stats["bloom_negative"] + stats["false_positive"], 200)
+        self.assertLessEqual(len(counting.lookups()), 1)  # only Bloom hits are queried
+
+    def test_recent_ids_answered_from_memory(self):
+        index = DedupeIndex(min_capacity=100)
+        index.rebuild(self.conn)
+        index.existing(self.conn, ["old1"])  # DB hit, now remembered
+        counting = _CountingConnection(self.conn)
+
+        self.assertEqual(index.existing(counting, ["old1"]), {"old1"})
+        self.assertEqual(counting.lookups(), [])
+        self.assertEqual(index.stats()["recent"], 1)
+
+    def test_lru_is_bounded(self):
+        index = DedupeIndex(lru_size=3, min_capacity=100)
+        index.rebuild(self.conn)
+
+        index.add(["a", "b", "c", "d"])
+
+        self.assertEqual(index.stats()["recent_items"], 3)
+
+    def test_false_positives_are_counted(self):
+        index = DedupeIndex(min_capacity=100)
+        index.rebuild(self.conn)
+
+        with patch.object(BloomFilter, "__contains__", return_value=True):
+            existing = index.existing(self.conn, ["old1", "ghost"])
+
+        self.assertEqual(existing, {"old1"})
+        stats = index.stats()
+        self.assertEqual((stats["db_hit"], stats["false_positive"]), (1, 1))
+        self.assertEqual(stats["false_positive_rate"], 1.0)
+
+    def test_periodic_rebuild(self):
+        now = [0.0]
+        index = DedupeIndex(rebuild_seconds=60, min_capacity=100, clock=lambda: now[0])
+        index.existing(self.conn, ["x"])
+        self.assertEqual(index.rebuilds, 1)
+
+        now[0] = 30
+        index.existing(self.conn, ["x"])
+        self.assertEqual(index.rebuilds, 1)
+
+        now[0] = 61
+        index.existing(self.conn, ["x"])
+        self.assertEqual(index.rebuilds, 2)
+
+    def test_rebuild_when_over_capacity(self):
+        index = DedupeIndex(rebuild_seconds=0, min_capacity=1)
+        index.rebuild(self.conn)  # sized for 2 * MAX(id) = 100
+        index.add(f"more{i}" for i in range(60))
+
+        index.existing(self.conn, ["x"])
+
+        self.assertEqual(index.rebuilds, 2)
+
+
+class TestPersistWithDedupe(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+        self.index = DedupeIndex(min_capacity=100)
+        self.index.rebuild(self.conn)
+
+    def test_duplicates_detected_and_not_requeued(self):
+        first = persist_payments(self.conn, [_payment("a")], [("a", "payment")], dedupe=self.index)
+        processed = [("a", "payment"), ("b", "payment")]
+        second = persist_payments(
+            self.conn, [_payment("a"), _payment("b")], processed, dedupe=self.index
+        )
+
+        self.assertEqual([p.transaction_id for p in first], ["a"])
+        self.assertEqual([p.transaction_id for p in second], ["b"])
+        self.assertEqual(processed, [("a", "duplicate"), ("b", "payment")])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0], 2)
+
+    def test_row_from_another_writer_is_not_reported_new(self):
+        """
+        An id stored after the filter was built is a Bloom negative; the
+        insert's conflict check still keeps it out of the new payments.
+        """
+        self.conn.execute(
+            "INSERT INTO payments (transaction_id, provider, amount) VALUES ('late', 'Zelle', '$1.00')"
+        )
+        self.conn.commit()
+
+        new = persist_payments(
+            self.conn, [_payment("late"), _payment("fresh")], [], dedupe=self.index
+        )
+
+        self.assertEqual([p.transaction_id for p in new], ["fresh"])
+        self.assertEqual(
+            [row[0] for row in self.conn.execute("SELECT transaction_id FROM outbox")], ["fresh"]
+        )
+        self.assertEqual(self.index.existing(self.conn, ["late"]), {"late"})
+
+
+if __name__ == "__main__":
+    unittest.main()
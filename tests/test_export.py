@@ -0,0 +1,115 @@
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch
+
+from postpay.db.export import COLUMNS, export_payments, iter_payment_frames
+from postpay.db.migrate import initialize_schema
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pq = None
+
+
+def _epoch(day: str) -> int:
+    return int(datetime.fromisoformat(f"{day}T12:00:00").timestamp())
+
+
+class TestPaymentExport(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+        for i, day in enumerate(["2023-12-30", "2024-01-05", "2024-02-10"]):
+            self.conn.execute(
+                """
+                INSERT INTO payments (transaction_id, provider, sender, amount, amount_cents, ts_epoch)
+                VALUES (?, 'Zelle', ?, ?, ?, ?)
+                """,
+                (f"tx{i}", f"Sender {i}", f"${i + 1}.25", (i + 1) * 100 + 25, _epoch(day)),
+            )
+        # Stored before integer cents / epochs were recorded
+        self.conn.execute(
+            "INSERT INTO payments (transaction_id, provider, sender, amount, created_at) "
+            "VALUES ('legacy', 'Venmo', 'Old', '$1,234.50', '2024-03-01 12:00:00')"
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_frames_are_chunked_and_typed(self):
+        frames = list(iter_payment_frames(self.conn, chunk_size=3))
+
+        self.assertEqual([len(frame) for frame in frames], [3, 1])
+        for frame in frames:
+            self.assertEqual(tuple(frame.columns), COLUMNS)
+            self.assertEqual(str(frame["amount_cents"].dtype), "Int64")
+            self.assertEqual(str(frame["payment_time"].dtype.tz), "UTC")
+
+        legacy = frames[1].iloc[0]
+        self.assertEqual(legacy["amount_cents"], 123450)
+        self.assertEqual(legacy["amount"], 1234.5)
+
+    def test_csv_export_writes_header_once(self):
+        path = self._path("payments.csv")
+
+        total = export_payments(self.conn, path, "csv", chunk_size=2)
+
+        with open(path, newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual(total, 4)
+        self.assertEqual([row["transaction_id"] for row in rows], ["tx0", "tx1", "tx2", "legacy"])
+        self.assertEqual(rows[1]["amount_cents"], "225")
+        self.assertEqual(rows[3]["payment_time"], "")
+
+    def test_ndjson_export_with_since(self):
+        path = self._path("payments.ndjson")
+
+        total = export_payments(self.conn, path, "ndjson", since=date(2024, 1, 1), chunk_size=1)
+
+        with open(path, encoding="utf-8") as fh:
+            records = [json.loads(line) for line in fh]
+        self.assertEqual(total, 3)
+        self.assertEqual([r["transaction_id"] for r in records], ["tx1", "tx2", "legacy"])
+        self.assertEqual(records[0]["amount_cents"], 225)
+        self.assertIsNone(records[2]["ts_epoch"])
+
+    def test_empty_export_has_header_only(self):
+        path = self._path("empty.csv")
+
+        total = export_payments(self.conn, path, "csv", since=date(2030, 1, 1))
+
+        with open(path, encoding="utf-8") as fh:
+            self.assertEqual(fh.read(), ",".join(COLUMNS) + "\n")
+        self.assertEqual(total, 0)
+
+    @unittest.skipIf(pq is None, "pyarrow not installed")
+    def test_parquet_export(self):
+        path = self._path("payments.parquet")
+
+        total = export_payments(self.conn, path, "parquet", chunk_size=3)
+
+        table = pq.read_table(path)
+        self.assertEqual(total, 4)
+        self.assertEqual(table.column_names, list(COLUMNS))
+        self.assertEqual(table.column("amount_cents").to_pylist(), [125, 225, 325, 123450])
+
+    def test_parquet_without_pyarrow_raises(self):
+        with patch.dict("sys.modules", {"pyarrow": None, "pyarrow.parquet": None}):
+            with self.assertRaises(ImportError):
+                export_payments(self.conn, self._path("x.parquet"), "parquet")
+
+    def test_unknown_format_rejected(self):
+        with self.assertRaises(ValueError):
+            export_payments(self.conn, self._path("x.xml"), "xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
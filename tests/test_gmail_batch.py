@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from postpay.services.email.gmail_client import (
+    BODY_FIELDS,
+    METADATA_FIELDS,
+    GmailClient,
+)
+
+
+class FakeBatch:
+    """Minimal stand-in for googleapiclient's BatchHttpRequest."""
+
+    def __init__(self, callback, failing_ids):
+        self.callback = callback
+        self.failing_ids = failing_ids
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        # Gmail does not guarantee response order inside a batch
+        for request_id, request in reversed(self.requests):
+            msg_id = request.msg_id
+            if msg_id in self.failing_ids:
+                self.callback(request_id, None, Exception("404 not found"))
+            else:
+                self.callback(request_id, {"id": msg_id}, None)
+
+
+class TestGmailGetMany(unittest.TestCase):
+
+    @patch("postpay.services.email.gmail_client.build")
+    @patch("postpay.services.email.gmail_client.Credentials")
+    def setUp(self, MockCreds, MockBuild):
+        self.mock_service = MagicMock()
+        MockBuild.return_value = self.mock_service
+        self.client = GmailClient("token.json", "credentials.json", "from:payments")
+
+        self.batches = []
+        self.get_options = []
+
+        def new_batch(callback):
+            batch = FakeBatch(callback, failing_ids={"m2"})
+            self.batches.append(batch)
+            return batch
+
+        def get(userId, id, **options):
+            self.get_options.append(options)
+            return MagicMock(msg_id=id)
+
+        self.mock_service.new_batch_http_request.side_effect = new_batch
+        self.mock_service.users.return_value.messages.return_value.get.side_effect = get
+
+    def test_get_many_preserves_order_and_reports_errors(self):
+        results = self.client.get_many(["m1", "m2", "m3"])
+
+        self.assertEqual([r.id for r in results], ["m1", "m2", "m3"])
+        self.assertEqual(results[0].message, {"id": "m1"})
+        self.assertIsNone(results[1].message)
+        self.assertIsNotNone(results[1].error)
+        self.assertEqual(results[2].message, {"id": "m3"})
+        self.assertEqual(len(self.batches), 1)
+
+    def test_get_many_splits_into_batches_of_100(self):
+        ids = [f"id{i}" for i in range(250)]
+
+        results = self.client.get_many(ids)
+
+        self.assertEqual([len(b.requests) for b in self.batches], [100, 100, 50])
+        self.assertEqual([r.id for r in results], ids)
+        self.assertTrue(all(r.error is None for r in results))
+
+    def test_get_headers_many_requests_metadata_mask(self):
+        self.client.get_headers_many(["m1"])
+
+        self.assertEqual(
+            self.get_options,
+            [
+                {
+                    "format": "metadata",
+                    "fields": METADATA_FIELDS,
+                    "metadataHeaders": ["From", "Subject", "Date"],
+                }
+            ],
+        )
+
+    def test_get_bodies_many_requests_body_mask(self):
+        self.client.get_bodies_many(["m1"])
+
+        self.assertEqual(self.get_options, [{"format": "full", "fields": BODY_FIELDS}])
+        self.assertNotIn("headers", BODY_FIELDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sqlite3
+
+from googleapiclient.errors import HttpError
+
+from postpay.services.email.gmail_client import GmailClient
+from postpay.db.migrate import initialize_schema
+from postpay.db.sync_state import get_history_id, set_history_id
+
+
+def _http_error(status):
+    resp = MagicMock()
+    resp.status = status
+    resp.reason = "error"
+    return HttpError(resp, b"")
+
+
+class TestGmailIncrementalSync(unittest.TestCase):
+
+    @patch("postpay.services.email.gmail_client.build")
+    @patch("postpay.services.email.gmail_client.Credentials")
+    def setUp(self, MockCreds, MockBuild):
+        self.mock_service = MagicMock()
+        MockBuild.return_value = self.mock_service
+        self.client = GmailClient("token.json", "credentials.json", "from:payments")
+
+        self.mock_users = self.mock_service.users.return_value
+        self.mock_history = self.mock_users.history.return_value
+        self.mock_messages = self.mock_users.messages.return_value
+
+    def test_list_history_follows_pages_and_dedupes(self):
+        """
+        Ensures list_history() walks nextPageToken, skips sent mail and
+        returns each added message once with the newest historyId.
+        """
+        self.mock_history.list.return_value.execute.side_effect = [
+            {
+                "history": [
+                    {"messagesAdded": [{"message": {"id": "a", "threadId": "t1", "labelIds": ["INBOX"]}}]},
+                    {"messagesAdded": [{"message": {"id": "s", "threadId": "t2", "labelIds": ["SENT"]}}]},
+                ],
+                "historyId": "105",
+                "nextPageToken": "page-2",
+            },
+            {
+                "history": [
+                    {"messagesAdded": [{"message": {"id": "a", "threadId": "t1"}}]},
+                    {"messagesAdded": [{"message": {"id": "b", "threadId": "t3"}}]},
+                ],
+                "historyId": "110",
+            },
+        ]
+
+        messages, history_id = self.client.list_history("100")
+
+        self.assertEqual(messages, [{"id": "a", "threadId": "t1"}, {"id": "b", "threadId": "t3"}])
+        self.assertEqual(history_id, "110")
+        self.assertEqual(self.mock_history.list.call_count, 2)
+        self.assertEqual(
+            self.mock_history.list.call_args_list[0].kwargs["startHistoryId"], "100"
+        )
+
+    def test_sync_messages_applies_the_search_query(self):
+        """
+        history.list ignores the search query, so incremental results are
+        narrowed to the ids that messages.list returns for it.
+        """
+        self.mock_history.list.return_value.execute.return_value = {
+            "history": [
+                {"messagesAdded": [{"message": {"id": "a", "threadId": "t1"}}]},
+                {"messagesAdded": [{"message": {"id": "news", "threadId": "t2"}}]},
+            ],
+            "historyId": "110",
+        }
+        self.mock_messages.list.return_value.execute.side_effect = [
+            {"messages": [{"id": "a"}], "nextPageToken": "page-2"},
+            {"messages": [{"id": "older"}]},
+        ]
+
+        messages, history_id = self.client.sync_messages("100")
+
+        self.assertEqual(messages, [{"id": "a", "threadId": "t1"}])
+        self.assertEqual(history_id, "110")
+        self.assertEqual(
+            self.mock_messages.list.call_args_list[0].kwargs["q"], "from:payments"
+        )
+
+    def test_sync_messages_keeps_cursor_when_query_listing_fails(self):
+        self.mock_history.list.return_value.execute.return_value = {
+            "history": [{"messagesAdded": [{"message": {"id": "a"}}]}],
+            "historyId": "110",
+        }
+        self.mock_messages.list.return_value.execute.side_effect = _http_error(500)
+
+        messages, history_id = self.client.sync_messages("100")
+
+        self.assertEqual(messages, [])
+        self.assertEqual(history_id, "100")
+
+    def test_sync_messages_falls_back_when_cursor_expired(self):
+        """
+        An expired historyId (HTTP 404) triggers a full listing and a fresh
+        cursor from the mailbox profile.
+        """
+        self.mock_history.list.return_value.execute.side_effect = _http_error(404)
+        self.mock_users.getProfile.return_value.execute.return_value = {"historyId": "900"}
+        self.mock_messages.list.return_value.execute.return_value = {
+            "messages": [{"id": "x"}]
+        }
+
+        messages, history_id = self.client.sync_messages("1")
+
+        self.assertEqual(messages, [{"id": "x"}])
+        self.assertEqual(history_id, "900")
+
+    def test_sync_messages_fallback_reads_every_page(self):
+        """
+        The first-run listing follows nextPageToken, since the fresh cursor
+        skips any matching message it leaves out.
+        """
+        self.mock_users.getProfile.return_value.execute.return_value = {"historyId": "900"}
+        self.mock_messages.list.return_value.execute.side_effect = [
+            {"messages": [{"id": "x"}], "nextPageToken": "page-2"},
+            {"messages": [{"id": "y"}]},
+        ]
+
+        messages, history_id = self.client.sync_messages(None)
+
+        self.assertEqual(messages, [{"id": "x"}, {"id": "y"}])
+        self.assertEqual(history_id, "900")
+        self.assertEqual(
+            self.mock_messages.list.call_args_list[1].kwargs["pageToken"], "page-2"
+        )
+
+    def test_sync_messages_fallback_keeps_cursor_when_listing_fails(self):
+        self.mock_history.list.return_value.execute.side_effect = _http_error(404)
+        self.mock_users.getProfile.return_value.execute.return_value = {"historyId": "900"}
+        self.mock_messages.list.return_value.execute.side_effect = _http_error(500)
+
+        messages, history_id = self.client.sync_messages("1")
+
+        self.assertEqual(messages, [])
+        self.assertEqual(history_id, "1")
+
+    def test_sync_messages_keeps_cursor_on_transient_error(self):
+        self.mock_history.list.return_value.execute.side_effect = _http_error(500)
+
+        messages, history_id = self.client.sync_messages("42")
+
+        self.assertEqual(messages, [])
+        self.assertEqual(history_id, "42")
+        self.mock_messages.list.assert_not_called()
+
+
+class TestSyncState(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+
+    def test_history_id_roundtrip(self):
+        self.assertIsNone(get_history_id(self.conn))
+
+        set_history_id(self.conn, "123")
+        set_history_id(self.conn, "456")
+        set_history_id(self.conn, "7", mailbox="other")
+
+        self.assertEqual(get_history_id(self.conn), "456")
+        self.assertEqual(get_history_id(self.conn, mailbox="other"), "7")
+
+
+if __name__ == "__main__":
+    unittest.main()
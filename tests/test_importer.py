@@ -4,10 +4,23 @@ import sqlite3
 import base64
 
 from postpay.services.payments.importer import fetch_and_persist_new_payments
+from postpay.services.email.gmail_client import MessageResult
 from postpay.services.notifications.formatter import MessageFormatter
 from postpay.db.migrate import initialize_schema
 
 
+def _metadata(sender, subject, snippet=""):
+    return {
+        "payload": {
+            "headers": [
+                {"name": "From", "value": sender},
+                {"name": "Subject", "value": subject},
+            ]
+        },
+        "snippet": snippet,
+    }
+
+
 class TestPaymentImporter(unittest.TestCase):
 
     def setUp(self):
@@ -26,7 +39,7 @@ class TestPaymentImporter(unittest.TestCase):
         """
 
         mock_client = MockGmailClient.return_value
-        mock_client.list_messages.return_value = [{"id": "123"}]
+        mock_client.sync_messages.return_value = ([{"id": "123"}], "500")
 
         # Base64 for "You received $45.00 from John Doe via Zelle"
         mock_msg_json = {
@@ -44,7 +57,10 @@ class TestPaymentImporter(unittest.TestCase):
             }
         }
 
-        mock_client.get_message.return_value = mock_msg_json
+        mock_client.get_headers_many.return_value = [
+            MessageResult("123", _metadata("alerts@zellepay.com", "You received money"), None)
+        ]
+        mock_client.get_bodies_many.return_value = [MessageResult("123", mock_msg_json, None)]
 
         # Execute importer
         results = fetch_and_persist_new_payments(self.conn)
@@ -62,6 +78,66 @@ class TestPaymentImporter(unittest.TestCase):
         count = cursor.fetchone()[0]
         self.assertEqual(count, 1)
 
+    @patch("postpay.services.payments.importer.GmailClient")
+    def test_relisted_messages_are_not_downloaded_again(self, MockGmailClient):
+        """
+        Ensures:
+        - A second poll listing the same message skips it via the ledger
+        - Messages rejected on headers are recorded without a body download
+        - The payment, ledger and cursor are committed together
+        """
+        mock_client = MockGmailClient.return_value
+        mock_client.sync_messages.return_value = ([{"id": "123"}, {"id": "456"}], "500")
+
+        payment_json = {
+            "payload": {
+                "parts": [
+                    {
+                        "mimeType": "text/plain",
+                        "body": {
+                            "data": base64.urlsafe_b64encode(
+                                b"John Smith paid you $27.50 via Venmo"
+                            ).decode()
+                        },
+                    }
+                ]
+            }
+        }
+        newsletter_json = {
+            "payload": {
+                "parts": [
+                    {
+                        "mimeType": "text/plain",
+                        "body": {"data": base64.urlsafe_b64encode(b"Weekly newsletter").decode()},
+                    }
+                ]
+            }
+        }
+        headers = {
+            "123": MessageResult("123", _metadata("venmo@venmo.com", "John Smith paid you"), None),
+            "456": MessageResult("456", _metadata("news@example.com", "Weekly newsletter"), None),
+        }
+        fetched = {
+            "123": MessageResult("123", payment_json, None),
+            "456": MessageResult("456", newsletter_json, None),
+        }
+        mock_client.get_headers_many.side_effect = lambda ids: [headers[i] for i in ids]
+        mock_client.get_bodies_many.side_effect = lambda ids: [fetched[i] for i in ids]
+
+        first = fetch_and_persist_new_payments(self.conn)
+        second = fetch_and_persist_new_payments(self.conn)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first[0]["provider"], "Venmo")
+        self.assertEqual(second, [])
+        mock_client.get_headers_many.assert_called_once_with(["123", "456"])
+        mock_client.get_bodies_many.assert_called_once_with(["123"])
+
+        outcomes = dict(self.conn.execute("SELECT gmail_id, outcome FROM processed_messages"))
+        self.assertEqual(outcomes, {"123": "payment", "456": "filtered"})
+        cursor_row = self.conn.execute("SELECT history_id FROM sync_state").fetchone()
+        self.assertEqual(cursor_row[0], "500")
+
     def test_inserts_and_detects_duplicates(self):
         """
         Confirms SQL-level duplicate detection works.
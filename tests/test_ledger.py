@@ -0,0 +1,48 @@
+import unittest
+import sqlite3
+
+from postpay.db.migrate import initialize_schema
+from postpay.db.ledger import (
+    OUTCOME_NO_MATCH,
+    OUTCOME_PAYMENT,
+    filter_unprocessed,
+    mark_processed,
+)
+
+
+class TestProcessedLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+
+    def test_filter_unprocessed_skips_marked_ids(self):
+        mark_processed(self.conn, [("a", OUTCOME_PAYMENT), ("c", OUTCOME_NO_MATCH)])
+
+        remaining = filter_unprocessed(self.conn, ["a", "b", "c", "d", "b"])
+
+        self.assertEqual(remaining, ["b", "d"])
+
+    def test_filter_unprocessed_handles_large_batches(self):
+        """
+        Lookups are chunked so more ids than SQLite's parameter limit work.
+        """
+        ids = [f"id{i}" for i in range(2500)]
+        mark_processed(self.conn, [(i, OUTCOME_NO_MATCH) for i in ids[::2]])
+
+        remaining = filter_unprocessed(self.conn, ids)
+
+        self.assertEqual(remaining, ids[1::2])
+
+    def test_mark_processed_updates_outcome(self):
+        mark_processed(self.conn, [("a", OUTCOME_NO_MATCH)])
+        mark_processed(self.conn, [("a", OUTCOME_PAYMENT)])
+
+        row = self.conn.execute(
+            "SELECT outcome FROM processed_messages WHERE gmail_id = 'a'"
+        ).fetchone()
+        self.assertEqual(row[0], OUTCOME_PAYMENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
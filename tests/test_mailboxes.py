@@ -0,0 +1,159 @@
+import base64
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from postpay.db.migrate import initialize_schema
+from postpay.db.sync_state import get_history_id
+from postpay.services.email.gmail_client import MessageResult
+from postpay.services.payments.mailboxes import Mailbox, MailboxPool, load_mailboxes
+
+
+def _message(text):
+    return {
+        "payload": {
+            "parts": [
+                {
+                    "mimeType": "text/plain",
+                    "body": {"data": base64.urlsafe_b64encode(text.encode()).decode()},
+                }
+            ]
+        }
+    }
+
+
+class FakeGmail:
+    def __init__(self, texts, history_id, delay=0.0, fail=False):
+        self.texts = texts
+        self.history_id = history_id
+        self.delay = delay
+        self.fail = fail
+        self.cursors = []
+        self.threads = set()
+
+    def sync_messages(self, history_id):
+        self.threads.add(threading.get_ident())
+        self.cursors.append(history_id)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("token revoked")
+        return [{"id": msg_id} for msg_id in self.texts], self.history_id
+
+    def get_headers_many(self, ids):
+        return [MessageResult(i, {"snippet": self.texts[i]}, None) for i in ids]
+
+    def get_bodies_many(self, ids):
+        return [MessageResult(i, _message(self.texts[i]), None) for i in ids]
+
+
+def _mailbox(name):
+    return Mailbox(name, f"{name}-token.json", "credentials.json", "newer_than:1d")
+
+
+class TestMailboxPool(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+
+    def _pool(self, clients, **kwargs):
+        return MailboxPool(
+            self.conn,
+            [_mailbox(name) for name in clients],
+            client_factory=lambda mailbox: clients[mailbox.name],
+            **kwargs,
+        )
+
+    def test_syncs_mailboxes_in_parallel_with_own_cursors(self):
+        clients = {
+            "shop": FakeGmail({"s1": "You received $45.00 from John Doe via Zelle"}, "100", delay=0.3),
+            "cafe": FakeGmail({"c1": "John Smith paid you $27.50 via Venmo"}, "900", delay=0.3),
+        }
+        pool = self._pool(clients)
+
+        started = time.monotonic()
+        payments = pool.poll_once()
+        elapsed = time.monotonic() - started
+        pool.close()
+
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(
+            sorted((p["mailbox"], p["provider"]) for p in payments),
+            [("cafe", "Venmo"), ("shop", "Zelle")],
+        )
+        self.assertEqual(get_history_id(self.conn, "shop"), "100")
+        self.assertEqual(get_history_id(self.conn, "cafe"), "900")
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0], 2)
+
+    def test_second_poll_passes_stored_cursor(self):
+        clients = {"shop": FakeGmail({"s1": "You received $45.00 from John Doe via Zelle"}, "100")}
+        pool = self._pool(clients)
+
+        pool.poll_once()
+        second = pool.poll_once()
+        pool.close()
+
+        self.assertEqual(clients["shop"].cursors, [None, "100"])
+        self.assertEqual(second, [])
+
+    def test_failing_mailbox_does_not_block_others(self):
+        clients = {
+            "broken": FakeGmail({}, "1", fail=True),
+            "shop": FakeGmail({"s1": "You received $45.00 from John Doe via Zelle"}, "100"),
+        }
+        pool = self._pool(clients)
+
+        payments = pool.poll_once()
+        pool.close()
+
+        self.assertEqual([p["mailbox"] for p in payments], ["shop"])
+        self.assertIsNone(get_history_id(self.conn, "broken"))
+
+
+class TestLoadMailboxes(unittest.TestCase):
+
+    def _config(self, mailboxes_file=""):
+        return {
+            "MAILBOXES_FILE": mailboxes_file,
+            "TOKEN_PATH": "token.json",
+            "CREDENTIALS_PATH": "credentials.json",
+            "GMAIL_SEARCH_QUERY": "newer_than:1d",
+        }
+
+    def test_defaults_to_single_mailbox(self):
+        mailboxes = load_mailboxes(self._config())
+
+        self.assertEqual(
+            mailboxes,
+            [Mailbox("default", "token.json", "credentials.json", "newer_than:1d")],
+        )
+
+    def test_reads_json_file_with_defaults(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(
+                [
+                    {"name": "shop", "token_path": "shop.json"},
+                    {"name": "cafe", "token_path": "cafe.json", "query": "from:venmo"},
+                ],
+                fh,
+            )
+        self.addCleanup(os.remove, path)
+
+        mailboxes = load_mailboxes(self._config(path))
+
+        self.assertEqual(
+            mailboxes,
+            [
+                Mailbox("shop", "shop.json", "credentials.json", "newer_than:1d"),
+                Mailbox("cafe", "cafe.json", "credentials.json", "from:venmo"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
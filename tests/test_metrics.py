@@ -0,0 +1,130 @@
+import base64
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+import urllib.request
+
+from postpay.db.ledger import filter_unprocessed
+from postpay.db.migrate import initialize_schema
+from postpay.services.payments.importer import parse_message, persist_payments
+from postpay.utils.metrics import (
+    DB_ROWS,
+    PARSE_SECONDS,
+    REGISTRY,
+    MetricsRegistry,
+    MetricsServer,
+    track,
+    write_snapshot,
+)
+
+
+def _message(text):
+    return {
+        "payload": {
+            "parts": [
+                {
+                    "mimeType": "text/plain",
+                    "body": {"data": base64.urlsafe_b64encode(text.encode()).decode()},
+                }
+            ]
+        }
+    }
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_histogram_render_prometheus_text(self):
+        calls = self.registry.counter("demo_calls_total", "Demo calls.", ("outcome",))
+        latency = self.registry.histogram("demo_seconds", "Demo latency.", ("call",), buckets=(0.1, 1.0))
+
+        calls.inc(outcome="ok")
+        calls.inc(2, outcome="ok")
+        latency.observe(0.05, call="list")
+        latency.observe(0.5, call="list")
+
+        text = self.registry.render_prometheus()
+
+        self.assertIn("# TYPE demo_calls_total counter", text)
+        self.assertIn('demo_calls_total{outcome="ok"} 3', text)
+        self.assertIn('demo_seconds_bucket{call="list",le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{call="list",le="1.0"} 2', text)
+        self.assertIn('demo_seconds_bucket{call="list",le="+Inf"} 2', text)
+        self.assertIn('demo_seconds_count{call="list"} 2', text)
+
+    def test_labels_must_match_definition(self):
+        calls = self.registry.counter("demo_total", "Demo.", ("outcome",))
+
+        with self.assertRaises(ValueError):
+            calls.inc(provider="Zelle")
+
+    def test_track_records_error_outcome(self):
+        latency = self.registry.histogram("demo_seconds", "Demo.", ("call", "outcome"))
+
+        with self.assertRaises(RuntimeError):
+            with track(latency, call="get"):
+                raise RuntimeError("boom")
+        with track(latency, call="get") as result:
+            result["outcome"] = "empty"
+
+        self.assertEqual(latency.count(call="get", outcome="error"), 1)
+        self.assertEqual(latency.count(call="get", outcome="empty"), 1)
+
+    def test_snapshot_file_is_json(self):
+        self.registry.counter("demo_total", "Demo.").inc()
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        write_snapshot(path, self.registry)
+
+        with open(path) as fh:
+            snapshot = json.load(fh)
+        self.assertEqual(snapshot["metrics"]["demo_total"]["samples"], [{"labels": {}, "value": 1}])
+
+
+class TestPipelineInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        REGISTRY.clear()
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+
+    def test_parse_and_db_stages_are_recorded(self):
+        outcome, payment = parse_message("m1", _message("You received $45.00 from John Doe via Zelle"))
+        parse_message("m2", _message("Weekly newsletter"))
+
+        filter_unprocessed(self.conn, ["m1", "m2"])
+        persist_payments(self.conn, [payment], [("m1", outcome)])
+        persist_payments(self.conn, [payment], [("m1", outcome)])
+
+        self.assertEqual(PARSE_SECONDS.count(provider="Zelle", outcome="payment"), 1)
+        self.assertEqual(PARSE_SECONDS.count(provider="none", outcome="no_match"), 1)
+        self.assertEqual(DB_ROWS.value(operation="dedupe_lookup", outcome="new"), 2)
+        self.assertEqual(DB_ROWS.value(operation="insert", outcome="inserted"), 1)
+        self.assertEqual(DB_ROWS.value(operation="insert", outcome="duplicate"), 1)
+
+
+class TestMetricsServer(unittest.TestCase):
+
+    def test_serves_prometheus_and_json(self):
+        registry = MetricsRegistry()
+        registry.counter("demo_total", "Demo.").inc()
+        server = MetricsServer(registry, port=0).start()
+        self.addCleanup(server.stop)
+        base = "http://%s:%d" % server.address
+
+        with urllib.request.urlopen(base + "/metrics") as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+            self.assertIn("demo_total 1", response.read().decode())
+
+        with urllib.request.urlopen(base + "/metrics.json") as response:
+            self.assertIn("demo_total", json.load(response)["metrics"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import sqlite3
+from unittest.mock import patch
+
+from postpay.db import migrate as migrate_module
+from postpay.db.migrate import (
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    get_schema_version,
+    initialize_schema,
+    migrate,
+)
+
+
+def _plan(conn, sql, params=()):
+    return " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+class TestSchemaMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+
+    def test_fresh_database_reaches_latest_version(self):
+        applied = migrate(self.conn)
+
+        self.assertEqual(applied, [version for version, _, _ in MIGRATIONS])
+        self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION)
+        rows = self.conn.execute("SELECT version, name FROM schema_version ORDER BY version")
+        self.assertEqual([tuple(r) for r in rows], [(v, n) for v, n, _ in MIGRATIONS])
+
+    def test_versions_are_strictly_increasing(self):
+        versions = [version for version, _, _ in MIGRATIONS]
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_rerun_is_a_no_op(self):
+        initialize_schema(self.conn)
+
+        self.assertEqual(migrate(self.conn), [])
+
+    def test_partial_target_then_upgrade(self):
+        self.assertEqual(migrate(self.conn, target=4), [1, 2, 3, 4])
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(payments)")}
+        self.assertNotIn("amount_cents", columns)
+
+        self.assertEqual(migrate(self.conn), list(range(5, SCHEMA_VERSION + 1)))
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(payments)")}
+        self.assertIn("amount_cents", columns)
+
+    def test_unversioned_database_is_upgraded_in_place(self):
+        """
+        Databases created before schema_version existed start at version 0;
+        every step tolerates the objects they already hold.
+        """
+        self.conn.execute(
+            "CREATE TABLE payments (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "transaction_id TEXT NOT NULL, provider TEXT, sender TEXT, amount TEXT, "
+            "timestamp TEXT, formatted_message TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+        )
+        self.conn.execute(
+            "CREATE TABLE processed_messages (gmail_id TEXT PRIMARY KEY, outcome TEXT NOT NULL, "
+            "processed_at TEXT DEFAULT CURRENT_TIMESTAMP) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "INSERT INTO payments (transaction_id, provider, amount) VALUES ('t1', 'Zelle', '$5.00')"
+        )
+        self.conn.commit()
+
+        initialize_schema(self.conn)
+
+        self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION)
+        self.assertEqual(
+            self.conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0], 1
+        )
+
+    def test_failed_step_rolls_back(self):
+        migrate(self.conn, target=6)
+
+        def broken(cursor):
+            cursor.execute("CREATE INDEX idx_half_done ON payments (sender)")
+            raise RuntimeError("boom")
+
+        steps = MIGRATIONS + [(SCHEMA_VERSION + 1, "broken", broken)]
+        with patch.object(migrate_module, "MIGRATIONS", steps), \
+                patch.object(migrate_module, "SCHEMA_VERSION", SCHEMA_VERSION + 1):
+            with self.assertRaises(RuntimeError):
+                migrate(self.conn)
+
+        self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION)
+        indexes = {row[1] for row in self.conn.execute("PRAGMA index_list(payments)")}
+        self.assertNotIn("idx_half_done", indexes)
+        self.assertIn("idx_payments_created_at", indexes)
+
+
+class TestPaymentIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+
+    def test_dedupe_lookup_seeks_transaction_id(self):
+        plan = _plan(
+            self.conn,
+            "SELECT transaction_id FROM payments WHERE transaction_id IN (?, ?)",
+            ("a", "b"),
+        )
+
+        self.assertIn("USING COVERING INDEX idx_payments_transaction_id", plan)
+
+    def test_created_at_range_uses_index(self):
+        plan = _plan(
+            self.conn,
+            "SELECT * FROM payments WHERE created_at >= ?",
+            ("2024-01-01",),
+        )
+
+        self.assertIn("idx_payments_created_at", plan)
+
+    def test_provider_range_uses_composite_index(self):
+        plan = _plan(
+            self.conn,
+            "SELECT * FROM payments WHERE provider = ? AND created_at >= ?",
+            ("Zelle", "2024-01-01"),
+        )
+
+        self.assertIn("idx_payments_provider_created_at", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
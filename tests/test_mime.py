@@ -0,0 +1,108 @@
+import base64
+import unittest
+
+from postpay.services.email.gmail_client import GmailClient
+from postpay.services.email.mime import decode_body, extract_text, html_to_text
+
+
+def _data(text):
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def _part(mime_type, text=None, **extra):
+    part = {"mimeType": mime_type, "body": {"data": _data(text)} if text is not None else {}}
+    part.update(extra)
+    return part
+
+
+class TestDecodeBody(unittest.TestCase):
+
+    def test_decodes_unpadded_urlsafe_data(self):
+        encoded = _data("Tip: café? ~~>").rstrip("=")
+
+        self.assertEqual(decode_body(encoded), "Tip: café? ~~>")
+
+    def test_missing_or_invalid_data_is_empty(self):
+        self.assertEqual(decode_body(None), "")
+        self.assertEqual(decode_body("!!!!"), "")
+
+    def test_oversized_body_is_truncated_before_decoding(self):
+        decoded = decode_body(_data("x" * 10_000), max_bytes=300)
+
+        self.assertEqual(decoded, "x" * 300)
+
+
+class TestExtractText(unittest.TestCase):
+
+    def test_nested_alternative_prefers_plain_text(self):
+        message = {
+            "payload": _part(
+                "multipart/mixed",
+                parts=[
+                    _part(
+                        "multipart/alternative",
+                        parts=[
+                            _part("text/html", "<p>You received <b>$45.00</b></p>"),
+                            _part("text/plain", "You received $45.00 from John Doe"),
+                        ],
+                    ),
+                    _part("application/pdf", "PDF", filename="receipt.pdf"),
+                ],
+            )
+        }
+
+        self.assertEqual(extract_text(message), "You received $45.00 from John Doe")
+
+    def test_single_part_payload(self):
+        message = {"payload": _part("text/plain", "John Smith paid you $27.50")}
+
+        self.assertEqual(extract_text(message), "John Smith paid you $27.50")
+
+    def test_html_only_falls_back_to_stripped_text(self):
+        markup = (
+            "<html><head><style>p {color: red}</style></head><body>"
+            "<p>You received&nbsp;<b>$18.25</b></p><div>from Jane&nbsp;Roe</div>"
+            "<script>track()</script></body></html>"
+        )
+        message = {"payload": _part("multipart/alternative", parts=[_part("text/html", markup)])}
+
+        self.assertEqual(extract_text(message), "You received $18.25\nfrom Jane Roe")
+
+    def test_attachments_and_images_are_never_decoded(self):
+        message = {
+            "payload": _part(
+                "multipart/mixed",
+                parts=[
+                    _part("image/png", "not-an-image"),
+                    _part("text/plain", "notes", filename="notes.txt"),
+                    {"mimeType": "text/plain", "body": {"attachmentId": "att-1"}},
+                ],
+            )
+        }
+
+        self.assertEqual(extract_text(message), "")
+
+    def test_deep_nesting_does_not_recurse(self):
+        payload = _part("text/plain", "deep payment")
+        for _ in range(5000):
+            payload = {"mimeType": "multipart/mixed", "parts": [payload]}
+
+        self.assertEqual(extract_text({"payload": payload}), "deep payment")
+
+    def test_html_to_text_unescapes_entities(self):
+        self.assertEqual(html_to_text("A&amp;B<br>C"), "A&B\nC")
+
+
+class TestGmailClientDecoding(unittest.TestCase):
+
+    def test_gmail_client_uses_shared_decoder(self):
+        message = {"payload": _part("multipart/alternative", parts=[_part("text/plain", "hi")])}
+
+        self.assertEqual(GmailClient.extract_text(message), "hi")
+        self.assertIsNone(GmailClient.extract_text({"payload": {}}))
+        self.assertEqual(GmailClient.decode_body(_data("hello")), "hello")
+        self.assertEqual(GmailClient.decode_body(None), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
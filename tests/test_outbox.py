@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sqlite3
+
+from postpay.db import outbox
+from postpay.db.migrate import initialize_schema
+from postpay.models import Payment
+from postpay.services.notifications.outbox_worker import OutboxWorker
+from postpay.services.payments.importer import persist_payments
+
+
+def _payment(gmail_id):
+    return Payment(
+        provider="Zelle",
+        sender="John Doe",
+        amount_cents=4500,
+        gmail_id=gmail_id,
+        transaction_id=f"{gmail_id}-Zelle",
+        formatted_message=f"*Zelle Payment Received* {gmail_id}",
+    )
+
+
+class TestOutbox(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+
+    def test_payment_and_notification_commit_together(self):
+        persist_payments(self.conn, [_payment("a")], [("a", "payment")])
+
+        self.assertEqual(outbox.pending_count(self.conn), 1)
+
+        # Re-importing the same payment queues nothing new
+        persist_payments(self.conn, [_payment("a")], [("a", "payment")])
+        self.assertEqual(outbox.pending_count(self.conn), 1)
+
+    def test_failure_after_insert_leaves_no_payment(self):
+        with patch.object(outbox, "enqueue", side_effect=sqlite3.OperationalError("disk full")):
+            with self.assertRaises(sqlite3.OperationalError):
+                persist_payments(self.conn, [_payment("a")], [("a", "payment")])
+
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0], 0)
+        self.assertEqual(
+            self.conn.execute("SELECT COUNT(*) FROM processed_messages").fetchone()[0], 0
+        )
+
+        # The retry imports the payment and queues its notification
+        new = persist_payments(self.conn, [_payment("a")], [("a", "payment")])
+        self.assertEqual(len(new), 1)
+        self.assertEqual(outbox.pending_count(self.conn), 1)
+
+    def test_backfill_can_skip_notifications(self):
+        persist_payments(self.conn, [_payment("a")], [("a", "payment")], notify=False)
+
+        self.assertEqual(outbox.pending_count(self.conn), 0)
+
+    def test_failed_delivery_is_retried_later(self):
+        persist_payments(self.conn, [_payment("a"), _payment("b")], [])
+
+        slack = MagicMock()
+        slack.post_message.side_effect = [True, False]
+        worker = OutboxWorker(":memory:", slack, backoff_base=60)
+
+        self.assertEqual(worker.drain_once(self.conn), 1)
+        self.assertEqual(outbox.pending_count(self.conn), 1)
+
+        row = self.conn.execute(
+            "SELECT attempts, last_error, next_attempt_at FROM outbox WHERE delivered_at IS NULL"
+        ).fetchone()
+        self.assertEqual(row[0], 1)
+        self.assertIsNotNone(row[1])
+
+        # Not due yet, so nothing is re-sent immediately
+        slack.post_message.side_effect = None
+        slack.post_message.return_value = True
+        self.assertEqual(worker.drain_once(self.conn), 0)
+
+        # Once due, the row is delivered
+        self.conn.execute("UPDATE outbox SET next_attempt_at = 0")
+        self.assertEqual(worker.drain_once(self.conn), 1)
+        self.assertEqual(outbox.pending_count(self.conn), 0)
+
+    def test_exceptions_from_slack_do_not_lose_messages(self):
+        persist_payments(self.conn, [_payment("a")], [])
+
+        slack = MagicMock()
+        slack.post_message.side_effect = RuntimeError("network down")
+        worker = OutboxWorker(":memory:", slack)
+
+        self.assertEqual(worker.drain_once(self.conn), 0)
+        self.assertEqual(outbox.pending_count(self.conn), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
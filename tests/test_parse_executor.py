@@ -0,0 +1,83 @@
+import base64
+import unittest
+
+from postpay.bench.corpus import iter_corpus
+from postpay.parsers.executor import ParseExecutor
+from postpay.services.email.gmail_client import MessageResult
+from postpay.services.payments.importer import parse_fetched
+
+
+def _message(body):
+    data = base64.urlsafe_b64encode(body.encode()).decode()
+    return {
+        "internalDate": "1700000000000",
+        "payload": {"mimeType": "text/plain", "body": {"data": data}},
+    }
+
+
+class TestParseExecutor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bodies = [body for chunk in iter_corpus(300, seed=7) for _, body in chunk]
+        cls.bodies[10] = "Lunch on Friday?"  # no payment
+
+    def test_in_process_results_are_compact_tuples(self):
+        with ParseExecutor(workers=0, chunk_size=50) as executor:
+            results = list(executor.parse_tuples(self.bodies))
+
+        self.assertEqual(len(results), len(self.bodies))
+        self.assertIsNone(results[10])
+        provider, sender, amount_cents, ts_epoch = results[0]
+        self.assertIsInstance(amount_cents, int)
+        self.assertIsInstance(provider, str)
+
+    def test_process_pool_matches_in_process_order(self):
+        with ParseExecutor(workers=0, chunk_size=50) as local:
+            expected = list(local.parse(self.bodies))
+        with ParseExecutor(workers=2, chunk_size=7) as pool:
+            results = list(pool.parse(self.bodies))
+
+        self.assertEqual(results, expected)
+
+    def test_pool_is_reused_across_calls(self):
+        with ParseExecutor(workers=2, chunk_size=20) as pool:
+            first = list(pool.parse_tuples(self.bodies[:40]))
+            worker_pool = pool._pool
+            second = list(pool.parse_tuples(self.bodies[:40]))
+
+            self.assertIs(pool._pool, worker_pool)
+        self.assertEqual(first, second)
+        self.assertIsNone(pool._pool)
+
+    def test_from_config(self):
+        executor = ParseExecutor.from_config({"PARSE_WORKERS": 3, "PARSE_CHUNK_SIZE": 250})
+        override = ParseExecutor.from_config(
+            {"PARSE_WORKERS": 3, "PARSE_CHUNK_SIZE": 250}, workers=0
+        )
+
+        self.assertEqual((executor.workers, executor.chunk_size), (3, 250))
+        self.assertEqual(override.workers, 0)
+
+
+class TestParseFetchedWithExecutor(unittest.TestCase):
+
+    def test_same_outcomes_as_in_process_parsing(self):
+        bodies = [body for chunk in iter_corpus(40, seed=3) for _, body in chunk]
+        fetched = [MessageResult(f"m{i}", _message(body), None) for i, body in enumerate(bodies)]
+        fetched.insert(5, MessageResult("empty", _message("   "), None))
+        fetched.insert(9, MessageResult("failed", None, error=RuntimeError("boom")))
+
+        expected = parse_fetched(fetched, ["filtered"])
+        with ParseExecutor(workers=2, chunk_size=8) as executor:
+            actual = parse_fetched(fetched, ["filtered"], executor)
+
+        self.assertEqual(actual, expected)
+        processed, payments, fetch_failed = actual
+        self.assertTrue(fetch_failed)
+        self.assertIn(("empty", "empty"), processed)
+        self.assertTrue(all(p.formatted_message for p in payments))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import base64
+import sqlite3
+import unittest
+from datetime import datetime
+
+from postpay.db.migrate import initialize_schema
+from postpay.models import Payment, parse_amount_cents
+from postpay.parsers.zelle_parser import ZelleParser
+from postpay.services.notifications.formatter import MessageFormatter
+from postpay.services.payments.importer import parse_message
+
+
+class TestPaymentModel(unittest.TestCase):
+
+    def test_parse_amount_cents_is_exact(self):
+        self.assertEqual(parse_amount_cents("$1,234.56"), 123456)
+        self.assertEqual(parse_amount_cents("0.10"), 10)
+        self.assertEqual(parse_amount_cents("45"), 4500)
+        self.assertEqual(parse_amount_cents("12.5"), 1250)
+        self.assertIsNone(parse_amount_cents("12.345"))
+        self.assertIsNone(parse_amount_cents("abc"))
+        self.assertIsNone(parse_amount_cents(None))
+
+    def test_record_is_compact_and_normalized(self):
+        payment = Payment(provider="".join(["Ze", "lle"]), sender="  John \n Doe ", amount_cents=123400)
+
+        self.assertFalse(hasattr(payment, "__dict__"))
+        self.assertIs(payment.provider, "Zelle")
+        self.assertEqual(payment.sender, "John Doe")
+        self.assertEqual(payment.amount, "$1,234.00")
+        self.assertEqual(Payment("Venmo", "", 1).sender, "Unknown Sender")
+
+    def test_dict_style_access_is_kept(self):
+        payment = Payment("Zelle", "John Doe", 4500, ts_epoch=0)
+
+        self.assertEqual(payment["amount"], "$45.00")
+        self.assertEqual(payment["provider"], "Zelle")
+        self.assertEqual(payment["timestamp"], datetime.fromtimestamp(0))
+        self.assertIsNone(payment.get("mailbox"))
+        with self.assertRaises(KeyError):
+            payment["with_fields"]
+
+    def test_records_sort_by_integers(self):
+        payments = [Payment("Zelle", "A", 500, ts_epoch=20), Payment("Zelle", "B", 100, ts_epoch=10)]
+
+        self.assertEqual([p.sender for p in sorted(payments, key=lambda p: p.ts_epoch)], ["B", "A"])
+        self.assertEqual(sum(p.amount_cents for p in payments), 600)
+
+    def test_formatter_consumes_payment(self):
+        payment = Payment("Zelle", "John Doe", 4500, ts_epoch=int(datetime(2024, 2, 3, 13, 14).timestamp()))
+
+        self.assertEqual(
+            MessageFormatter.format(payment),
+            "*Zelle Payment Received*\nFrom: John Doe\nAmount: $45.00\nTime: 2024-02-03 13:14",
+        )
+
+
+class TestParsersProducePayments(unittest.TestCase):
+
+    def test_parser_returns_payment_with_epoch(self):
+        result = ZelleParser().parse("You received $45.00 from John Doe via Zelle on February 3, 2024 1:14 PM.")
+
+        self.assertIsInstance(result, Payment)
+        self.assertEqual(result.amount_cents, 4500)
+        self.assertEqual(result.ts_epoch, int(datetime(2024, 2, 3, 13, 14).timestamp()))
+
+    def test_body_without_amount_is_not_a_payment(self):
+        self.assertIsNone(ZelleParser().parse("Zelle: your payment limit has changed"))
+
+    def test_missing_date_falls_back_to_gmail_receive_time(self):
+        message = {
+            "internalDate": "1707000000000",
+            "payload": {
+                "mimeType": "text/plain",
+                "body": {"data": base64.urlsafe_b64encode(b"You received $5.00 from Ann Lee via Zelle").decode()},
+            },
+        }
+
+        outcome, payment = parse_message("m1", message)
+
+        self.assertEqual(outcome, "payment")
+        self.assertEqual(payment.ts_epoch, 1707000000)
+        self.assertEqual(payment.transaction_id, "m1-Zelle")
+        self.assertIn("Amount: $5.00", payment.formatted_message)
+
+    def test_undated_apple_cash_uses_gmail_receive_time(self):
+        body = b"Apple Cash: Ann Lee sent you $5.00"
+        message = {
+            "internalDate": "1707000000000",
+            "payload": {
+                "mimeType": "text/plain",
+                "body": {"data": base64.urlsafe_b64encode(body).decode()},
+            },
+        }
+
+        outcome, payment = parse_message("m1", message)
+        self.assertEqual((outcome, payment.provider), ("payment", "Apple Cash"))
+        self.assertEqual(payment.ts_epoch, 1707000000)
+
+        # Only with no receive time either is the payment dated now
+        del message["internalDate"]
+        _, payment = parse_message("m1", message)
+        self.assertAlmostEqual(payment.ts_epoch, datetime.now().timestamp(), delta=5)
+
+
+class TestSchemaUpgrade(unittest.TestCase):
+
+    def test_existing_payments_table_gains_integer_columns(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute(
+            "CREATE TABLE payments (id INTEGER PRIMARY KEY AUTOINCREMENT, transaction_id TEXT NOT NULL, "
+            "provider TEXT, sender TEXT, amount TEXT, timestamp TEXT, formatted_message TEXT, "
+            "created_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+        )
+
+        initialize_schema(conn)
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(payments)")}
+        self.assertTrue({"amount_cents", "ts_epoch"} <= columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
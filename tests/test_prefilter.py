@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import MagicMock
+
+from googleapiclient.errors import HttpError
+
+from postpay.services.email.gmail_client import MessageResult
+from postpay.services.payments.importer import fetch_candidates, parse_fetched, passes_prefilter
+
+
+def _metadata(sender, subject, snippet=""):
+    return {
+        "payload": {
+            "headers": [
+                {"name": "From", "value": sender},
+                {"name": "Subject", "value": subject},
+            ]
+        },
+        "snippet": snippet,
+    }
+
+
+def _http_error(status):
+    resp = MagicMock()
+    resp.status = status
+    resp.reason = "error"
+    return HttpError(resp, b"")
+
+
+class FakeGmail:
+    def __init__(self, headers, header_errors=()):
+        self.headers = headers
+        self.header_errors = set(header_errors)
+        self.body_requests = []
+        self.full_requests = []
+
+    def get_headers_many(self, ids):
+        return [
+            MessageResult(i, None, Exception("timeout")) if i in self.header_errors
+            else MessageResult(i, self.headers[i], None)
+            for i in ids
+        ]
+
+    def get_bodies_many(self, ids):
+        self.body_requests.append(list(ids))
+        return [MessageResult(i, {"id": i}, None) for i in ids]
+
+    def get_many(self, ids):
+        self.full_requests.append(list(ids))
+        return [MessageResult(i, {"id": i}, None) for i in ids]
+
+
+class TestHeaderPrefilter(unittest.TestCase):
+
+    def test_accepts_known_provider_sender(self):
+        self.assertTrue(passes_prefilter(_metadata("Venmo <venmo@venmo.com>", "Hello")))
+
+    def test_accepts_keyword_in_subject_or_snippet(self):
+        self.assertTrue(passes_prefilter(_metadata("alerts@bank.com", "Zelle payment received")))
+        self.assertTrue(
+            passes_prefilter(_metadata("alerts@bank.com", "Alert", "You received $45.00 from Ann"))
+        )
+
+    def test_rejects_newsletters(self):
+        self.assertFalse(passes_prefilter(_metadata("news@shop.com", "Spring sale", "Save 20% today")))
+
+    def test_downloads_only_candidate_bodies(self):
+        gmail = FakeGmail(
+            {
+                "m1": _metadata("cash@square.com", "Cash App"),
+                "m2": _metadata("news@shop.com", "Spring sale"),
+                "m3": _metadata("alerts@bank.com", "You received money"),
+            },
+            header_errors={"m4"},
+        )
+
+        fetched, filtered = fetch_candidates(gmail, ["m1", "m2", "m3", "m4"])
+
+        self.assertEqual(gmail.body_requests, [["m1", "m3"]])
+        self.assertEqual([r.id for r in fetched], ["m1", "m3", "m4"])
+        self.assertIsNotNone(fetched[2].error)
+        self.assertEqual(filtered, ["m2"])
+
+        processed, _, fetch_failed = parse_fetched(fetched, filtered)
+        self.assertIn(("m2", "filtered"), processed)
+        self.assertNotIn("m4", [gmail_id for gmail_id, _ in processed])
+        self.assertTrue(fetch_failed)
+
+    def test_disabled_prefilter_fetches_everything(self):
+        gmail = FakeGmail({})
+
+        fetched, filtered = fetch_candidates(gmail, ["m1", "m2"], prefilter=False)
+
+        self.assertEqual(gmail.full_requests, [["m1", "m2"]])
+        self.assertEqual(gmail.body_requests, [])
+        self.assertEqual(filtered, [])
+        self.assertEqual(len(fetched), 2)
+
+
+class TestFetchErrors(unittest.TestCase):
+
+    def test_deleted_message_is_recorded_and_does_not_hold_the_cursor(self):
+        fetched = [
+            MessageResult("gone", None, _http_error(404)),
+            MessageResult("bad", None, _http_error(400)),
+        ]
+
+        processed, _, fetch_failed = parse_fetched(fetched)
+
+        self.assertEqual(processed, [("gone", "unavailable"), ("bad", "unavailable")])
+        self.assertFalse(fetch_failed)
+
+    def test_transient_errors_are_retried(self):
+        for error in (_http_error(429), _http_error(503), _http_error(403), Exception("timeout")):
+            with self.subTest(error=error):
+                processed, _, fetch_failed = parse_fetched([MessageResult("m1", None, error)])
+
+                self.assertEqual(processed, [])
+                self.assertTrue(fetch_failed)
+
+
+if __name__ == "__main__":
+    unittest.main()
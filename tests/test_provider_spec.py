@@ -0,0 +1,48 @@
+import unittest
+
+from postpay.parsers.spec import ProviderSpec, SpecParser, VENMO
+from postpay.parsers.registry import build_parsers
+
+
+class TestProviderSpec(unittest.TestCase):
+
+    def test_single_pass_extracts_all_fields(self):
+        fields = VENMO.extract_fields(
+            "John Smith paid you $27.50 on February 4, 2024 9:32 AM. Thanks for using Venmo."
+        )
+
+        self.assertEqual(fields["amount"], "27.50")
+        self.assertEqual(fields["sender"], "John Smith")
+        self.assertEqual(fields["date"], "February 4, 2024 9:32 AM")
+
+    def test_first_occurrence_of_each_field_wins(self):
+        fields = VENMO.extract_fields("$1.00 from Ann Lee, then $2.00 from Bob Ray")
+
+        self.assertEqual(fields["amount"], "1.00")
+        self.assertEqual(fields["sender"], "Ann Lee")
+        self.assertIsNone(fields["date"])
+
+    def test_new_provider_is_a_spec_entry(self):
+        """
+        A provider without a dedicated class is handled by a plain SpecParser.
+        """
+        paypal = ProviderSpec(provider="PayPal", keywords=("paypal",))
+        parsers = build_parsers((paypal,))
+
+        self.assertIsInstance(parsers[0], SpecParser)
+        result = parsers[0].parse("You've got money! Ann Lee sent you $9.99 via PayPal.")
+
+        self.assertEqual(result["provider"], "PayPal")
+        self.assertEqual(result["amount"], "$9.99")
+        self.assertEqual(result["sender"], "Ann Lee")
+
+    def test_unparseable_date_has_no_timestamp(self):
+        parser = SpecParser(VENMO)
+        result = parser.parse("Venmo: $5.00 from Ann Lee on Smarch 40, 2024 9:99 AM")
+
+        self.assertEqual(result.amount_cents, 500)
+        self.assertIsNone(result.ts_epoch)
+
+
+if __name__ == "__main__":
+    unittest.main()
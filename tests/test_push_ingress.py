@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from postpay.services.email.push import PushIngress, SyncTrigger, build_pubsub_envelope
+
+
+def publish(url, payload):
+    """Local stand-in for a Pub/Sub push subscription."""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status
+
+
+class TestSyncTrigger(unittest.TestCase):
+
+    def test_wait_times_out_without_notifications(self):
+        trigger = SyncTrigger(debounce=0)
+        started = time.monotonic()
+
+        self.assertFalse(trigger.wait(0.05))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    def test_burst_collapses_into_one_sync(self):
+        trigger = SyncTrigger(debounce=0.1)
+        for _ in range(10):
+            trigger.notify()
+
+        self.assertTrue(trigger.wait(1))
+        # The burst was consumed by the first wake-up
+        self.assertFalse(trigger.wait(0.2))
+        self.assertEqual(trigger.notifications, 10)
+
+    def test_notification_wakes_a_blocked_waiter(self):
+        trigger = SyncTrigger(debounce=0)
+        threading.Timer(0.05, trigger.notify).start()
+
+        started = time.monotonic()
+        self.assertTrue(trigger.wait(5))
+        self.assertLess(time.monotonic() - started, 1)
+
+
+class TestPushIngress(unittest.TestCase):
+
+    def setUp(self):
+        self.trigger = SyncTrigger(debounce=0.05)
+        self.ingress = PushIngress(self.trigger, port=0, verification_token="s3cret").start()
+        host, port = self.ingress.address
+        self.base_url = f"http://{host}:{port}"
+
+    def tearDown(self):
+        self.ingress.stop()
+
+    def test_pubsub_push_triggers_sync(self):
+        status = publish(
+            f"{self.base_url}/gmail?token=s3cret",
+            build_pubsub_envelope("payments@example.com", "12345"),
+        )
+
+        self.assertEqual(status, 204)
+        self.assertTrue(self.trigger.wait(2))
+
+    def test_wrong_token_is_rejected(self):
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            publish(f"{self.base_url}/gmail?token=nope", {})
+
+        self.assertEqual(ctx.exception.code, 403)
+        self.assertFalse(self.trigger.wait(0.1))
+
+    def test_healthz(self):
+        with urllib.request.urlopen(f"{self.base_url}/healthz", timeout=5) as response:
+            self.assertEqual(response.status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import sqlite3
+from datetime import date, datetime
+
+from postpay.db.migrate import initialize_schema
+from postpay.db.reports import ReportRow, payment_report
+
+
+def _epoch(day: str, hour: int = 12) -> int:
+    return int(datetime.fromisoformat(f"{day}T{hour:02d}:00:00").timestamp())
+
+
+class TestPaymentReport(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+        self.next_id = 0
+
+    def _insert(self, provider, sender, cents, day):
+        self.next_id += 1
+        self.conn.execute(
+            """
+            INSERT INTO payments (transaction_id, provider, sender, amount, amount_cents, ts_epoch)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (f"tx{self.next_id}", provider, sender, f"${cents / 100:.2f}", cents, _epoch(day)),
+        )
+
+    def test_report_by_provider_orders_by_amount(self):
+        self._insert("Zelle", "Ann", 1000, "2024-01-01")
+        self._insert("Venmo", "Bo", 5000, "2024-01-02")
+        self._insert("Zelle", "Cy", 2500, "2024-01-03")
+
+        rows = payment_report(self.conn, date(2024, 1, 1), date(2024, 1, 31))
+
+        self.assertEqual(rows, [ReportRow("Venmo", 1, 5000), ReportRow("Zelle", 2, 3500)])
+
+    def test_report_by_sender_and_day(self):
+        self._insert("Zelle", "Ann", 1000, "2024-01-02")
+        self._insert("Venmo", "Ann", 200, "2024-01-01")
+        self._insert("Venmo", "Bo", 300, "2024-01-02")
+
+        by_sender = payment_report(self.conn, date(2024, 1, 1), date(2024, 1, 2), by="sender")
+        by_day = payment_report(self.conn, date(2024, 1, 1), date(2024, 1, 2), by="day")
+
+        self.assertEqual(by_sender, [ReportRow("Ann", 2, 1200), ReportRow("Bo", 1, 300)])
+        self.assertEqual(
+            by_day,
+            [ReportRow("2024-01-01", 1, 200), ReportRow("2024-01-02", 2, 1300)],
+        )
+
+    def test_range_is_inclusive(self):
+        self._insert("Zelle", "Ann", 100, "2023-12-31")
+        self._insert("Zelle", "Ann", 200, "2024-01-01")
+        self._insert("Zelle", "Ann", 300, "2024-01-31")
+        self._insert("Zelle", "Ann", 400, "2024-02-01")
+
+        rows = payment_report(self.conn, date(2024, 1, 1), date(2024, 1, 31))
+
+        self.assertEqual(rows, [ReportRow("Zelle", 2, 500)])
+
+    def test_delete_decrements_rollups(self):
+        self._insert("Zelle", "Ann", 100, "2024-01-01")
+        self._insert("Zelle", "Bo", 200, "2024-01-01")
+        self.conn.execute("DELETE FROM payments WHERE sender = 'Bo'")
+
+        by_provider = payment_report(self.conn, date(2024, 1, 1), date(2024, 1, 1))
+        by_sender = payment_report(self.conn, date(2024, 1, 1), date(2024, 1, 1), by="sender")
+
+        self.assertEqual(by_provider, [ReportRow("Zelle", 1, 100)])
+        self.assertEqual(by_sender, [ReportRow("Ann", 1, 100)])
+
+    def test_update_moves_payment_between_rollups(self):
+        self._insert("Zelle", "Ann", 100, "2024-01-01")
+        self._insert("Zelle", "Bo", 200, "2024-01-01")
+        self.conn.execute(
+            "UPDATE payments SET provider = 'Venmo', amount_cents = 250, ts_epoch = ? "
+            "WHERE sender = 'Bo'",
+            (_epoch("2024-01-02"),),
+        )
+        self.conn.execute("UPDATE payments SET sender = 'Cy' WHERE sender = 'Ann'")
+
+        start, end = date(2024, 1, 1), date(2024, 1, 2)
+        self.assertEqual(
+            payment_report(self.conn, start, end),
+            [ReportRow("Venmo", 1, 250), ReportRow("Zelle", 1, 100)],
+        )
+        self.assertEqual(
+            payment_report(self.conn, start, end, by="sender"),
+            [ReportRow("Bo", 1, 250), ReportRow("Cy", 1, 100)],
+        )
+        self.assertEqual(
+            payment_report(self.conn, start, end, by="day"),
+            [ReportRow("2024-01-01", 1, 100), ReportRow("2024-01-02", 1, 250)],
+        )
+
+    def test_existing_payments_are_seeded(self):
+        """
+        Rows stored before the rollups existed (text amounts, no cents or
+        epoch) are folded in when the schema is upgraded.
+        """
+        conn = sqlite3.connect(":memory:")
+        conn.execute(
+            """
+            CREATE TABLE payments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transaction_id TEXT NOT NULL,
+                provider TEXT,
+                sender TEXT,
+                amount TEXT,
+                timestamp TEXT,
+                formatted_message TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO payments (transaction_id, provider, sender, amount, created_at) "
+            "VALUES ('old', 'Zelle', 'Ann', '$1,234.50', '2024-01-15 12:00:00')"
+        )
+
+        initialize_schema(conn)
+        initialize_schema(conn)  # idempotent: no double seeding
+
+        rows = payment_report(conn, date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(rows, [ReportRow("Zelle", 1, 123450)])
+
+    def test_query_uses_rollup_primary_key(self):
+        plan = " ".join(
+            row[-1]
+            for row in self.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT provider, SUM(amount_cents) "
+                "FROM daily_provider_totals WHERE day BETWEEN ? AND ? GROUP BY provider",
+                ("2024-01-01", "2024-01-31"),
+            )
+        )
+
+        self.assertIn("SEARCH daily_provider_totals USING PRIMARY KEY", plan)
+        self.assertNotIn("payments", plan.replace("daily_provider_totals", ""))
+
+    def test_unknown_grouping_rejected(self):
+        with self.assertRaises(ValueError):
+            payment_report(self.conn, date(2024, 1, 1), date(2024, 1, 2), by="month")
+
+
+if __name__ == "__main__":
+    unittest.main()
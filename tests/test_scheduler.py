@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from postpay.services.scheduling.scheduler import Scheduler
+from postpay.services.scheduling.sleep_window import seconds_until_window_ends, sleep_window_end
+
+
+class TestSleepWindow(unittest.TestCase):
+
+    def test_window_end_is_exact(self):
+        self.assertEqual(
+            sleep_window_end(datetime(2024, 2, 3, 2, 30)),
+            datetime(2024, 2, 3, 9, 0),
+        )
+        self.assertEqual(
+            sleep_window_end(datetime(2024, 2, 3, 23, 0)),
+            datetime(2024, 2, 4, 9, 0),
+        )
+
+    def test_seconds_until_window_ends(self):
+        self.assertEqual(seconds_until_window_ends(datetime(2024, 2, 3, 8, 59)), 60)
+        self.assertEqual(seconds_until_window_ends(datetime(2024, 2, 3, 12, 0)), 0)
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_backs_off_when_idle_and_tightens_after_activity(self):
+        scheduler = Scheduler(30, min_interval=10, max_interval=100, backoff_factor=2, jitter=0)
+
+        for expected in (60, 100, 100):
+            scheduler.record_poll(0)
+            self.assertEqual(scheduler.interval, expected)
+
+        scheduler.record_poll(3)
+        self.assertEqual(scheduler.interval, 10)
+
+    def test_push_keeps_the_safety_interval_as_floor(self):
+        config = {
+            "POLL_INTERVAL_SECONDS": 30,
+            "POLL_MIN_INTERVAL_SECONDS": 15,
+            "POLL_MAX_INTERVAL_SECONDS": 600,
+            "POLL_BACKOFF_FACTOR": 2,
+            "POLL_JITTER": 0,
+            "ENABLE_SLEEP_MODE": False,
+            "PUSH_INGRESS_PORT": 8085,
+            "PUSH_SAFETY_POLL_SECONDS": 300,
+        }
+        scheduler = Scheduler.from_config(config, base_interval=300, wake_event=threading.Event())
+
+        scheduler.record_poll(5)
+        self.assertEqual(scheduler.interval, 300)
+
+        config["PUSH_INGRESS_PORT"] = 0
+        scheduler = Scheduler.from_config(config)
+        scheduler.record_poll(5)
+        self.assertEqual(scheduler.interval, 15)
+
+    def test_next_wake_skips_to_end_of_quiet_window(self):
+        scheduler = Scheduler(60, jitter=0)
+
+        wake = scheduler.next_wake(datetime(2024, 2, 3, 23, 59, 30))
+
+        self.assertEqual(wake, datetime(2024, 2, 4, 9, 0))
+
+    def test_next_wake_outside_window_uses_interval(self):
+        scheduler = Scheduler(60, jitter=0)
+
+        wake = scheduler.next_wake(datetime(2024, 2, 3, 12, 0))
+
+        self.assertEqual(wake, datetime(2024, 2, 3, 12, 1))
+
+    def test_jitter_stays_within_bounds(self):
+        scheduler = Scheduler(100, jitter=0.2, enable_sleep=False)
+        now = datetime(2024, 2, 3, 12, 0)
+
+        for _ in range(50):
+            seconds = (scheduler.next_wake(now) - now).total_seconds()
+            self.assertTrue(80 <= seconds <= 120)
+
+    @patch("postpay.services.scheduling.scheduler.time.sleep")
+    def test_sleeps_once_through_the_night(self, mock_sleep):
+        scheduler = Scheduler(30, clock=lambda: datetime(2024, 2, 3, 1, 0))
+
+        scheduler.wait_out_quiet_window()
+
+        mock_sleep.assert_called_once_with(8 * 3600)
+
+    def test_wake_event_ends_wait_early(self):
+        event = threading.Event()
+        scheduler = Scheduler(30, jitter=0, enable_sleep=False, wake_event=event)
+        threading.Timer(0.05, scheduler.wake).start()
+
+        started = time.monotonic()
+        self.assertTrue(scheduler.wait())
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(event.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,14 @@
 import unittest
 from unittest.mock import patch, MagicMock
 
-from postpay.services.notifications.slack import SlackClient
+import requests
+
+from postpay.services.notifications.slack import SlackClient, SlackTransport
 
 
 class TestSlackClient(unittest.TestCase):
 
-    @patch("postpay.services.notifications.slack.requests.post")
+    @patch("postpay.services.notifications.slack.requests.Session.post")
     def test_post_message_success(self, mock_post):
         # Mock Slack API successful response
         mock_response = MagicMock()
@@ -44,7 +46,7 @@ class TestSlackClient(unittest.TestCase):
         self.assertIn("Authorization", headers)
         self.assertEqual(headers["Authorization"], "Bearer xoxb-testtoken")
 
-    @patch("postpay.services.notifications.slack.requests.post")
+    @patch("postpay.services.notifications.slack.requests.Session.post")
     def test_post_message_failure(self, mock_post):
         # Mock Slack API error response
         mock_response = MagicMock()
@@ -63,6 +65,86 @@ class TestSlackClient(unittest.TestCase):
         # Should return False on Slack failure
         self.assertFalse(ok)
 
+    @patch("postpay.services.notifications.slack.time.sleep")
+    @patch("postpay.services.notifications.slack.requests.Session.post")
+    def test_post_message_honors_retry_after(self, mock_post, mock_sleep):
+        # First attempt is rate limited, second succeeds
+        limited = MagicMock(status_code=429, ok=False, headers={"Retry-After": "2"})
+        success = MagicMock(status_code=200, ok=True)
+        success.json.return_value = {"ok": True}
+        mock_post.side_effect = [limited, success]
+
+        client = SlackClient(
+            webhook_url="",
+            api_token="xoxb-testtoken",
+            channel_id="C1234567890",
+        )
+
+        self.assertTrue(client.post_message("Test"))
+        self.assertEqual(mock_post.call_count, 2)
+        mock_sleep.assert_called_once_with(2.0)
+
+        stats = client.transport.latency_stats()["chat.postMessage"]
+        self.assertEqual(stats["count"], 2)
+
+    @patch("postpay.services.notifications.slack.time.sleep")
+    @patch("postpay.services.notifications.slack.requests.Session.post")
+    def test_long_retry_after_is_left_for_the_next_pass(self, mock_post, mock_sleep):
+        mock_post.return_value = MagicMock(
+            status_code=429, ok=False, headers={"Retry-After": "600"}
+        )
+
+        client = SlackClient(
+            webhook_url="",
+            api_token="xoxb-testtoken",
+            channel_id="C1234567890",
+            transport=SlackTransport(backoff_max=30.0),
+        )
+
+        self.assertFalse(client.post_message("Test"))
+        self.assertEqual(mock_post.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("postpay.services.notifications.slack.time.sleep")
+    @patch("postpay.services.notifications.slack.requests.Session.post")
+    def test_retries_take_a_channel_token(self, mock_post, mock_sleep):
+        limited = MagicMock(status_code=429, ok=False, headers={"Retry-After": "1"})
+        success = MagicMock(status_code=200, ok=True)
+        success.json.return_value = {"ok": True}
+        mock_post.side_effect = [limited, success]
+
+        client = SlackClient(
+            webhook_url="",
+            api_token="xoxb-testtoken",
+            channel_id="C1234567890",
+            channel_rate=1.0,
+        )
+
+        with patch.object(client, "_throttle") as mock_throttle:
+            self.assertTrue(client.post_message("Test", channel="C-ZELLE"))
+
+        self.assertEqual(mock_throttle.call_count, 2)
+        mock_throttle.assert_called_with("C-ZELLE")
+
+    @patch("postpay.services.notifications.slack.time.sleep")
+    @patch("postpay.services.notifications.slack.requests.Session.post")
+    def test_post_message_gives_up_after_max_retries(self, mock_post, mock_sleep):
+        mock_post.side_effect = requests.ConnectionError("reset")
+
+        client = SlackClient(
+            webhook_url="",
+            api_token="xoxb-testtoken",
+            channel_id="C1234567890",
+            transport=SlackTransport(max_retries=2),
+        )
+
+        self.assertFalse(client.post_message("Test"))
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+        # Connect/read timeouts are passed separately
+        self.assertEqual(mock_post.call_args[1]["timeout"], (3.05, 10.0))
+
 
 if __name__ == "__main__":
     unittest.main()
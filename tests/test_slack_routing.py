@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+from postpay.db import outbox
+from postpay.db.migrate import initialize_schema
+from postpay.models import Payment
+from postpay.services.notifications.outbox_worker import OutboxWorker
+from postpay.services.notifications.routing import RoutingRule, SlackRouter, load_routes
+from postpay.services.notifications.slack import SlackClient
+from postpay.services.payments.importer import persist_payments
+from postpay.utils.rate_limit import TokenBucket
+
+
+def _payment(gmail_id, provider="Zelle", amount_cents=4500):
+    return Payment(
+        provider=provider,
+        sender="John Doe",
+        amount_cents=amount_cents,
+        gmail_id=gmail_id,
+        transaction_id=f"{gmail_id}-{provider}",
+        formatted_message=f"*{provider} Payment Received* {gmail_id}",
+    )
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_paces_after_the_burst(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=2.0, capacity=2, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.5)
+        self.assertAlmostEqual(clock.now, 1.0)
+
+    def test_refills_while_idle(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=1.0, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+
+        clock.now += 5  # never holds more than ``capacity`` tokens
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+
+class TestSlackRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = SlackRouter(
+            [
+                RoutingRule("C-BIG", min_amount_cents=100000),
+                RoutingRule("C-ZELLE", provider="Zelle"),
+                RoutingRule("C-SHOP", mailbox="shop"),
+            ]
+        )
+
+    def test_first_matching_rule_wins(self):
+        self.assertEqual(self.router.channel_for(_payment("a", amount_cents=250000)), "C-BIG")
+        self.assertEqual(self.router.channel_for(_payment("b")), "C-ZELLE")
+        self.assertEqual(self.router.channel_for(_payment("c", "Venmo"), "shop"), "C-SHOP")
+        self.assertIsNone(self.router.channel_for(_payment("d", "Venmo")))
+
+    def test_load_routes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "routes.json")
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(
+                    [
+                        {"channel": "C-BIG", "min_amount": "1,000.00"},
+                        {"channel": "C-ZELLE", "provider": "zelle", "mailbox": "shop"},
+                    ],
+                    fh,
+                )
+            rules = load_routes(path)
+
+        self.assertEqual(rules[0], RoutingRule("C-BIG", min_amount_cents=100000))
+        self.assertTrue(rules[1].matches(_payment("a"), "shop"))
+        self.assertFalse(rules[1].matches(_payment("a"), "personal"))
+        self.assertIsNone(SlackRouter.from_config({"SLACK_ROUTES_FILE": ""}))
+
+    def test_routed_channel_is_stored_with_the_notification(self):
+        conn = sqlite3.connect(":memory:")
+        initialize_schema(conn)
+
+        persist_payments(
+            conn, [_payment("a"), _payment("b", "Venmo")], [], router=self.router
+        )
+
+        due = outbox.fetch_due(conn, time.time() + 1)
+        self.assertEqual([row[3] for row in due], ["C-ZELLE", None])
+
+
+def _slack_response():
+    response = MagicMock()
+    response.ok = True
+    response.json.return_value = {"ok": True}
+    return response
+
+
+class TestMultiChannelDelivery(unittest.TestCase):
+
+    RATE = 20.0  # messages per second per channel; Slack's real limit is ~1
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        initialize_schema(self.conn)
+        self.posted = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def _record_post(self, url, headers, json, timeout):
+        with self.lock:
+            self.posted[json["channel"]].append(time.monotonic())
+        return _slack_response()
+
+    def _drain(self, channels, count=12):
+        for i in range(count):
+            channel = channels[i % len(channels)]
+            outbox.enqueue(self.conn, [(f"tx{i}", f"msg {i}", channel)])
+        self.conn.commit()
+
+        slack = SlackClient("", "xoxb-test", "C-DEFAULT", channel_rate=self.RATE)
+        worker = OutboxWorker(":memory:", slack, delivery_workers=4)
+        self.addCleanup(worker.stop)
+
+        with patch(
+            "postpay.services.notifications.slack.requests.Session.post",
+            side_effect=self._record_post,
+        ):
+            started = time.monotonic()
+            delivered = worker.drain_once(self.conn)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(delivered, count)
+        self.assertEqual(outbox.pending_count(self.conn), 0)
+        return elapsed
+
+    def test_channels_are_delivered_concurrently(self):
+        single = self._drain([None])
+        self.conn.execute("DELETE FROM outbox")
+        self.posted.clear()
+
+        split = self._drain([None, "C-ZELLE", "C-BIG"])
+
+        self.assertEqual(sorted(self.posted), ["C-BIG", "C-DEFAULT", "C-ZELLE"])
+        self.assertLess(split, single / 2)
+
+    def test_each_channel_stays_under_its_rate(self):
+        self._drain(["C-ZELLE", "C-BIG"])
+
+        # Measured from each channel's first post, so a late thread wake-up
+        # on one post cannot make the next gap look too short
+        for times in self.posted.values():
+            for k, posted_at in enumerate(times):
+                self.assertGreaterEqual(posted_at - times[0], k / self.RATE - 0.005)
+
+
+if __name__ == "__main__":
+    unittest.main()